@@ -0,0 +1 @@
+"""Performance benchmarks for Tab-Maker (run from the repository root)."""
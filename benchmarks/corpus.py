@@ -0,0 +1,114 @@
+"""Seeded generator for realistic Ultimate Guitar sheets and ChordPro files."""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import List, Tuple
+
+_ROOTS = ("C", "C#", "Db", "D", "Eb", "E", "F", "F#", "Gb", "G", "Ab", "A", "Bb", "B")
+_QUALITIES = ("", "", "", "m", "m", "7", "maj7", "m7", "sus4", "sus2", "add9", "dim", "6")
+_SECTIONS = ("Intro", "Verse", "Pre-Chorus", "Chorus", "Bridge", "Solo", "Outro")
+_WORDS = (
+    "love", "light", "night", "heart", "golden", "shine", "hold", "on", "we", "are",
+    "going", "home", "the", "a", "and", "you", "me", "sky", "river", "fire", "never",
+    "always", "together", "down", "up", "dream", "run", "stay", "free", "morning",
+)
+
+
+@dataclass(slots=True)
+class CorpusSpec:
+    """Shape of one generated song.
+
+    ``chord_density`` is the probability that a lyric word carries a chord.
+    """
+    sections: int = 8
+    lines_per_section: int = 8
+    line_length: int = 40
+    chord_density: float = 0.15
+    seed: int = 0
+
+
+def _chord(rng: random.Random) -> str:
+    chord = rng.choice(_ROOTS) + rng.choice(_QUALITIES)
+    if rng.random() < 0.08:
+        chord += "/" + rng.choice(_ROOTS)
+    return chord
+
+
+def _lyric_words(rng: random.Random, length: int) -> List[str]:
+    words: List[str] = []
+    total = 0
+    while total < length:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        total += len(word) + 1
+    words[0] = words[0].capitalize()
+    return words
+
+
+def _placed_line(rng: random.Random, spec: CorpusSpec) -> Tuple[str, List[Tuple[int, str]]]:
+    """Return a lyric line and (column, chord) placements over it."""
+    placements: List[Tuple[int, str]] = []
+    column = 0
+    words = _lyric_words(rng, spec.line_length)
+    for word in words:
+        if rng.random() < spec.chord_density:
+            # Keep chords from overlapping on the chord line.
+            if not placements or column > placements[-1][0] + len(placements[-1][1]):
+                placements.append((column, _chord(rng)))
+        column += len(word) + 1
+    return " ".join(words), placements
+
+
+def generate_ug(spec: CorpusSpec) -> str:
+    """Return an Ultimate Guitar style sheet with chord lines above lyrics."""
+    rng = random.Random(spec.seed)
+    lines: List[str] = []
+    for index in range(spec.sections):
+        lines.append(f"[{rng.choice(_SECTIONS)} {index + 1}]")
+        if rng.random() < 0.3:
+            lines.append("  ".join(_chord(rng) for _ in range(4)))
+        for _ in range(spec.lines_per_section):
+            lyric, placements = _placed_line(rng, spec)
+            if placements:
+                chord_line = ""
+                for column, chord in placements:
+                    chord_line = chord_line.ljust(column) + chord
+                lines.append(chord_line)
+            lines.append(lyric)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def generate_chordpro(spec: CorpusSpec) -> str:
+    """Return a ChordPro song with inline ``[chord]`` markers."""
+    rng = random.Random(spec.seed)
+    lines = [
+        f"{{title: Song {spec.seed}}}",
+        f"{{artist: Artist {spec.seed % 97}}}",
+        f"{{key: {rng.choice(_ROOTS)}}}",
+    ]
+    for index in range(spec.sections):
+        lines.append(f"{{comment: {rng.choice(_SECTIONS)} {index + 1}}}")
+        for _ in range(spec.lines_per_section):
+            lyric, placements = _placed_line(rng, spec)
+            pieces: List[str] = []
+            last = 0
+            for column, chord in placements:
+                pieces.append(lyric[last:column])
+                pieces.append(f"[{chord}]")
+                last = column
+            pieces.append(lyric[last:])
+            lines.append("".join(pieces))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def spec_for_lines(total_lines: int, **overrides: object) -> CorpusSpec:
+    """Return a spec whose generated sheet has roughly ``total_lines`` lyric lines."""
+    spec = CorpusSpec(**overrides)  # type: ignore[arg-type]
+    spec.sections = max(1, total_lines // max(spec.lines_per_section, 1))
+    return spec
+
+
+__all__ = ["CorpusSpec", "generate_chordpro", "generate_ug", "spec_for_lines"]
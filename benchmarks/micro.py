@@ -0,0 +1,107 @@
+"""Micro-benchmarks for the per-line hot paths of both parsers.
+
+The ChordPro line cases are also timed against the per-character tokenizer
+the slice-based one replaced, kept here as :func:`_reference_chordpro_line`.
+
+    python -m benchmarks.micro --number 2000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from tab_maker.chordpro_parser import _parse_chordpro_text_line  # noqa: E402
+from tab_maker.models import ChordLyricLine, ChordPlacement, LyricLine  # noqa: E402
+from tab_maker.parser import _extract_chords  # noqa: E402
+
+from .corpus import _WORDS, _chord  # noqa: E402
+
+
+Case = Tuple[Callable[[], object], Optional[Callable[[], object]]]
+
+
+def _reference_chordpro_line(line: str) -> ChordLyricLine | LyricLine:
+    """The per-character ChordPro tokenizer, as it was before slicing."""
+    placements: List[ChordPlacement] = []
+    lyric_chars: List[str] = []
+    idx = 0
+    column = 0
+    length = len(line)
+
+    while idx < length:
+        char = line[idx]
+        if char == "[":
+            closing = line.find("]", idx + 1)
+            if closing == -1:  # treat unmatched '[' as literal
+                lyric_chars.append(char)
+                column += 1
+                idx += 1
+                continue
+            chord = line[idx + 1 : closing].strip()
+            if chord:
+                placements.append(ChordPlacement(chord=chord, column=column))
+            idx = closing + 1
+            continue
+        lyric_chars.append(char)
+        column += 1
+        idx += 1
+
+    lyrics = "".join(lyric_chars)
+    if placements:
+        return ChordLyricLine(lyrics=lyrics, placements=placements)
+    return LyricLine(text=lyrics)
+
+
+def _chordpro_case(line: str) -> Case:
+    if _parse_chordpro_text_line(line) != _reference_chordpro_line(line):
+        raise AssertionError(f"tokenizers disagree on {line!r}")
+    return lambda: _parse_chordpro_text_line(line), lambda: _reference_chordpro_line(line)
+
+
+def _cases(line_words: int) -> Dict[str, Case]:
+    rng = random.Random(0)
+    words = [rng.choice(_WORDS) for _ in range(line_words)]
+    plain = " ".join(words)
+    bracketed = " ".join(
+        f"[{_chord(rng)}]{word}" if rng.random() < 0.2 else word for word in words
+    )
+    chord_line = "   ".join(_chord(rng) for _ in range(max(1, line_words // 4)))
+    return {
+        "chordpro line, no chords": _chordpro_case(plain),
+        "chordpro line, inline chords": _chordpro_case(bracketed),
+        "ug detect, lyric line": (lambda: _extract_chords(plain), None),
+        "ug detect, chord line": (lambda: _extract_chords(chord_line), None),
+    }
+
+
+def _time(func: Callable[[], object], number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time per-line parser hot paths.")
+    parser.add_argument("--number", type=int, default=2000, help="Calls per measurement.")
+    parser.add_argument("--words", type=int, default=200, help="Words per generated line.")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    print(f"{'case':<30} {'us/call':>10} {'baseline':>10} {'speedup':>8}")
+    for name, (func, baseline) in _cases(args.words).items():
+        current = _time(func, args.number)
+        row = f"{name:<30} {current:>10.2f}"
+        if baseline is not None:
+            before = _time(baseline, args.number)
+            row += f" {before:>10.2f} {before / current:>7.1f}x"
+        print(row)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
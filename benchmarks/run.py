@@ -0,0 +1,260 @@
+"""Time each conversion stage over a generated corpus and gate on a baseline.
+
+    python -m benchmarks.run                      # one typical song
+    python -m benchmarks.run --lines 100000       # one very large sheet
+    python -m benchmarks.run --songs 500 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --songs 500 --baseline benchmarks/baseline.json --threshold 0.2
+
+Each stage reports its best wall time over ``--repeat`` runs, lines and songs
+per second, and peak traced memory from a separate tracemalloc pass. With
+``--baseline`` the exit status is 1 when any stage is slower than the stored
+time by more than ``--threshold``. Baselines are machine specific, so store
+one per machine rather than committing it.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .corpus import CorpusSpec, generate_chordpro, generate_ug, spec_for_lines
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from tab_maker.chord_layout import RenderSegment, song_to_two_line_segments  # noqa: E402
+from tab_maker.chordpro import song_to_chordpro  # noqa: E402
+from tab_maker.chordpro_parser import parse_chordpro  # noqa: E402
+from tab_maker.docx_export import _load_docx, song_to_docx  # noqa: E402
+from tab_maker.models import Song  # noqa: E402
+from tab_maker.parser import parse_song  # noqa: E402
+from tab_maker.rtf import segments_to_rtf  # noqa: E402
+from tab_maker.text import song_to_plain_lines  # noqa: E402
+
+
+@dataclass(slots=True)
+class StageResult:
+    stage: str
+    seconds: float
+    lines_per_second: float
+    songs_per_second: float
+    peak_kib: float
+
+
+def _best_time(func: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _peak_kib(func: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+StageFactory = Callable[[], Callable[[], Any]]
+
+
+def _each(func: Callable[[Any], Any], inputs: Callable[[], List[Any]]) -> StageFactory:
+    def factory() -> Callable[[], Any]:
+        items = inputs()
+        return lambda: [func(item) for item in items]
+
+    return factory
+
+
+def build_stages(
+    ug_texts: List[str], cho_texts: List[str], docx_dir: Path
+) -> Dict[str, StageFactory]:
+    """Return a factory per stage that prepares its input and returns the timed callable.
+
+    Only selected stages are prepared. A factory raises ``RuntimeError`` when
+    its stage cannot run here.
+    """
+
+    def ug_songs() -> List[Song]:
+        return [parse_song(text) for text in ug_texts]
+
+    def cho_songs() -> List[Song]:
+        return [parse_chordpro(text) for text in cho_texts]
+
+    def segments() -> List[List[RenderSegment]]:
+        return [song_to_two_line_segments(song) for song in cho_songs()]
+
+    def docx(backend: str) -> StageFactory:
+        def factory() -> Callable[[], Any]:
+            if backend == "python-docx":
+                _load_docx()
+            songs = cho_songs()
+
+            def stage() -> None:
+                for index, song in enumerate(songs):
+                    song_to_docx(song, docx_dir / f"{index}.docx", backend=backend)
+
+            return stage
+
+        return factory
+
+    return {
+        "parse_song": _each(parse_song, lambda: ug_texts),
+        "parse_chordpro": _each(parse_chordpro, lambda: cho_texts),
+        "song_to_chordpro": _each(song_to_chordpro, ug_songs),
+        "song_to_two_line_segments": _each(song_to_two_line_segments, cho_songs),
+        "segments_to_rtf": _each(segments_to_rtf, segments),
+        "song_to_plain_lines": _each(song_to_plain_lines, cho_songs),
+        "song_to_docx": docx("builtin"),
+        "song_to_docx_python_docx": docx("python-docx"),
+    }
+
+
+def run(
+    spec: CorpusSpec,
+    songs: int,
+    repeat: int,
+    only: Optional[Iterable[str]] = None,
+) -> List[StageResult]:
+    ug_texts: List[str] = []
+    cho_texts: List[str] = []
+    for offset in range(songs):
+        song_spec = CorpusSpec(**{**asdict(spec), "seed": spec.seed + offset})
+        ug_texts.append(generate_ug(song_spec))
+        cho_texts.append(generate_chordpro(song_spec))
+    total_lines = sum(text.count("\n") + 1 for text in cho_texts)
+
+    results: List[StageResult] = []
+    selected = set(only) if only else None
+    with tempfile.TemporaryDirectory(prefix="tab-maker-bench-") as docx_dir:
+        for name, factory in build_stages(ug_texts, cho_texts, Path(docx_dir)).items():
+            if selected is not None and name not in selected:
+                continue
+            try:
+                func = factory()
+            except RuntimeError as exc:  # python-docx not installed
+                print(f"skipping {name}: {exc}", file=sys.stderr)
+                continue
+            seconds = _best_time(func, repeat)
+            results.append(
+                StageResult(
+                    stage=name,
+                    seconds=seconds,
+                    lines_per_second=total_lines / seconds,
+                    songs_per_second=songs / seconds,
+                    peak_kib=_peak_kib(func),
+                )
+            )
+    return results
+
+
+def compare(
+    results: List[StageResult], baseline: Dict[str, Dict[str, float]], threshold: float
+) -> List[str]:
+    """Return a message for every stage slower than baseline by more than ``threshold``."""
+    regressions: List[str] = []
+    for result in results:
+        reference = baseline.get(result.stage)
+        if reference is None:
+            continue
+        limit = reference["seconds"] * (1 + threshold)
+        if result.seconds > limit:
+            change = result.seconds / reference["seconds"] - 1
+            regressions.append(
+                f"{result.stage}: {result.seconds * 1000:.2f} ms vs baseline "
+                f"{reference['seconds'] * 1000:.2f} ms (+{change:.0%})"
+            )
+    return regressions
+
+
+def _format_table(results: List[StageResult]) -> str:
+    lines = [f"{'stage':<27} {'ms':>10} {'lines/s':>12} {'songs/s':>10} {'peak KiB':>10}"]
+    for result in results:
+        lines.append(
+            f"{result.stage:<27} {result.seconds * 1000:>10.2f} "
+            f"{result.lines_per_second:>12,.0f} {result.songs_per_second:>10,.1f} "
+            f"{result.peak_kib:>10,.0f}"
+        )
+    return "\n".join(lines)
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark Tab-Maker conversion stages.")
+    parser.add_argument("--songs", type=int, default=1, help="Number of generated songs.")
+    parser.add_argument(
+        "--lines",
+        type=int,
+        default=None,
+        help="Lyric lines per song; overrides --sections (e.g. 100000 for one huge sheet).",
+    )
+    parser.add_argument("--sections", type=int, default=8, help="Sections per song.")
+    parser.add_argument("--lines-per-section", type=int, default=8)
+    parser.add_argument("--line-length", type=int, default=40, help="Lyric characters per line.")
+    parser.add_argument(
+        "--chord-density",
+        type=float,
+        default=0.15,
+        help="Probability that a lyric word carries a chord.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per stage.")
+    parser.add_argument("--stage", action="append", help="Only run this stage (may repeat).")
+    parser.add_argument("--json", action="store_true", help="Emit JSON instead of a table.")
+    parser.add_argument("--save-baseline", help="Write stage timings to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against timings stored in this JSON file.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown versus the baseline as a fraction (default: 0.25).",
+    )
+    return parser
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    args = build_argument_parser().parse_args(list(argv) if argv is not None else None)
+    options: Dict[str, Any] = dict(
+        lines_per_section=args.lines_per_section,
+        line_length=args.line_length,
+        chord_density=args.chord_density,
+        seed=args.seed,
+    )
+    if args.lines is not None:
+        spec = spec_for_lines(args.lines, **options)
+    else:
+        spec = CorpusSpec(sections=args.sections, **options)
+
+    results = run(spec, args.songs, args.repeat, args.stage)
+    if args.json:
+        print(json.dumps([asdict(result) for result in results], indent=2))
+    else:
+        print(_format_table(results))
+
+    if args.save_baseline:
+        payload = {result.stage: asdict(result) for result in results}
+        Path(args.save_baseline).write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,118 @@
+"""Measure cold import time of each Tab-Maker entry point.
+
+Every sample runs in a fresh interpreter. Entry points are timed once with
+python-docx hidden from the import system and, when it is installed, once
+with it available, so a regression that makes a CLI load the DOCX backend
+shows up as a difference between the two columns.
+
+    python -m benchmarks.startup --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+ENTRY_POINTS: Dict[str, str] = {
+    "package": "import tab_maker",
+    "cli": "import tab_maker.cli",
+    "cho_to_rtf_cli": "import tab_maker.cho_to_rtf_cli",
+    "server": "import tab_maker.server",
+    "song_to_docx": "from tab_maker import song_to_docx",
+}
+
+_HIDE_DOCX = """
+import sys
+class _HideDocx:
+    def find_spec(self, name, path=None, target=None):
+        if name == "docx" or name.startswith("docx."):
+            raise ImportError(name)
+sys.meta_path.insert(0, _HideDocx())
+"""
+
+_TIMED = """
+import sys, time
+_start = time.perf_counter()
+{statement}
+print(time.perf_counter() - _start, "docx" in sys.modules)
+"""
+
+
+def _sample(statement: str, hide_docx: bool) -> Dict[str, float]:
+    code = (_HIDE_DOCX if hide_docx else "") + _TIMED.format(statement=statement)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+    )
+    wall = time.perf_counter() - started
+    import_seconds, docx_loaded = completed.stdout.split()
+    return {
+        "import_ms": float(import_seconds) * 1000,
+        "process_ms": wall * 1000,
+        "docx_loaded": docx_loaded == "True",
+    }
+
+
+def measure(repeat: int, names: Optional[Iterable[str]] = None) -> List[Dict[str, object]]:
+    docx_installed = importlib.util.find_spec("docx") is not None
+    modes = [("without python-docx", True)]
+    if docx_installed:
+        modes.append(("with python-docx", False))
+
+    rows: List[Dict[str, object]] = []
+    for name in names or ENTRY_POINTS:
+        statement = ENTRY_POINTS[name]
+        for mode, hide_docx in modes:
+            samples = [_sample(statement, hide_docx) for _ in range(repeat)]
+            rows.append(
+                {
+                    "entry_point": name,
+                    "mode": mode,
+                    "import_ms": statistics.median(s["import_ms"] for s in samples),
+                    "process_ms": statistics.median(s["process_ms"] for s in samples),
+                    "docx_loaded": any(s["docx_loaded"] for s in samples),
+                }
+            )
+    return rows
+
+
+def _format_table(rows: List[Dict[str, object]]) -> str:
+    lines = [f"{'entry point':<16} {'mode':<22} {'import ms':>10} {'process ms':>11}  docx"]
+    for row in rows:
+        lines.append(
+            f"{row['entry_point']:<16} {row['mode']:<22} {row['import_ms']:>10.1f} "
+            f"{row['process_ms']:>11.1f}  {'loaded' if row['docx_loaded'] else '-'}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="Samples per entry point.")
+    parser.add_argument(
+        "--entry-point",
+        action="append",
+        choices=sorted(ENTRY_POINTS),
+        help="Only time this entry point (may repeat).",
+    )
+    parser.add_argument("--json", action="store_true", help="Emit JSON instead of a table.")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    rows = measure(args.repeat, args.entry_point)
+    print(json.dumps(rows, indent=2) if args.json else _format_table(rows))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
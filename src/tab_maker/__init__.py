@@ -1,18 +1,77 @@
-"""Tab-Maker package providing chord sheet parsing and format conversions."""
-from .chord_layout import (
-    RenderSegment,
-    song_to_two_line_plain_text,
-    song_to_two_line_segments,
-)
-from .chordpro import song_to_chordpro
-from .chordpro_parser import parse_chordpro
-from .docx_export import song_to_docx
-from .parser import parse_song
-from .rtf import lines_to_rtf, song_to_rtf
-from .text import song_to_plain_lines
+"""Tab-Maker package providing chord sheet parsing and format conversions.
+
+Public names are resolved lazily on first access, so importing one CLI does
+not load every renderer (or python-docx) along with it.
+"""
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List
+
+__version__ = "0.1.0"
+
+_EXPORTS: Dict[str, str] = {
+    "ChordTable": ".compact",
+    "CompactSong": ".compact",
+    "RenderSegment": ".chord_layout",
+    "compact_song": ".compact",
+    "expand_song": ".compact",
+    "export_song": ".export",
+    "iter_chordpro_songs": ".chordpro_parser",
+    "iter_sections": ".parser",
+    "lines_to_rtf": ".rtf",
+    "parse_chordpro": ".chordpro_parser",
+    "parse_song": ".parser",
+    "song_to_chordpro": ".chordpro",
+    "song_to_docx": ".docx_export",
+    "song_to_plain_lines": ".text",
+    "song_to_rtf": ".rtf",
+    "song_to_two_line_plain_text": ".chord_layout",
+    "song_to_two_line_segments": ".chord_layout",
+    "transpose": ".transpose",
+    "transpose_chord": ".transpose",
+}
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .chord_layout import (
+        RenderSegment,
+        song_to_two_line_plain_text,
+        song_to_two_line_segments,
+    )
+    from .chordpro import song_to_chordpro
+    from .chordpro_parser import iter_chordpro_songs, parse_chordpro
+    from .compact import ChordTable, CompactSong, compact_song, expand_song
+    from .docx_export import song_to_docx
+    from .export import export_song
+    from .parser import iter_sections, parse_song
+    from .rtf import lines_to_rtf, song_to_rtf
+    from .text import song_to_plain_lines
+    from .transpose import transpose, transpose_chord
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module_name = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
+
 
 __all__ = [
+    "ChordTable",
+    "CompactSong",
     "RenderSegment",
+    "compact_song",
+    "expand_song",
+    "export_song",
+    "iter_chordpro_songs",
+    "iter_sections",
     "parse_chordpro",
     "parse_song",
     "song_to_chordpro",
@@ -22,4 +81,6 @@ __all__ = [
     "song_to_two_line_plain_text",
     "song_to_two_line_segments",
     "lines_to_rtf",
+    "transpose",
+    "transpose_chord",
 ]
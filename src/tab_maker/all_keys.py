@@ -0,0 +1,300 @@
+"""Render one parsed song in every key without re-parsing or re-laying out lyrics.
+
+:class:`KeyVariants` lays a song out once. Lyric, section and blank segments
+are shared by every variant; only chord lines are rebuilt with
+``_build_chord_line`` for each transposition. ChordPro output is rendered
+once with placeholder chords, and each key only fills in the chord names.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+from .chord_layout import (
+    RenderSegment,
+    _build_chord_line,
+    iter_metadata_segments,
+    line_segments,
+)
+from .cache import ConversionCache, cache_key
+from .chordpro import song_to_chordpro
+from .models import ChordLyricLine, ChordOnlyLine, ChordPlacement, Section, Song
+from .profiling import profiling, stage
+from .rtf import segments_to_rtf
+from .transpose import (
+    _first_chord,
+    _resolve_prefer_flats,
+    _transpose_metadata,
+    _transpose_raw_text,
+    chord_key,
+    transpose,
+    transpose_chord,
+    transpose_key,
+)
+
+KEY_COUNT = 12
+# Stands in for chord number N (or the key, for "k") in the ChordPro template.
+_SLOT = "\x00{}\x00"
+_SLOT_RE = re.compile("\x00(k|[0-9]+)\x00")
+_KEY_SLOT = -1
+
+
+@dataclass(slots=True)
+class _ChordSlot:
+    """A chord line that must be rebuilt for every key."""
+
+    line: Union[ChordLyricLine, ChordOnlyLine]
+
+
+_TemplateItem = Union[RenderSegment, _ChordSlot]
+
+
+class KeyVariants:
+    """Two-line layouts of ``song`` in any key, sharing everything but chords."""
+
+    def __init__(self, song: Song) -> None:
+        self.song = song
+        self._first_chord = _first_chord(song)
+        self._template: List[_TemplateItem] = []
+        chords: Dict[str, None] = {}
+        last = len(song.sections) - 1
+        for idx, section in enumerate(song.sections):
+            if section.name:
+                self._template.append(RenderSegment(kind="section", text=section.name))
+            for entry in section.lines:
+                if isinstance(entry, ChordLyricLine) and entry.placements:
+                    self._template.append(_ChordSlot(entry))
+                    self._template.append(RenderSegment(kind="lyric", text=entry.lyrics.rstrip()))
+                    chords.update(dict.fromkeys(p.chord for p in entry.placements))
+                elif isinstance(entry, ChordOnlyLine):
+                    self._template.append(_ChordSlot(entry))
+                    chords.update(dict.fromkeys(entry.chords))
+                else:
+                    self._template.extend(line_segments(entry))
+            if idx != last:
+                self._template.append(RenderSegment(kind="blank", text=""))
+        self.chords = list(chords)
+        self._chordpro: Optional[List[Union[str, int]]] = None
+
+    def spelling(self, semitones: int, prefer_flats: Optional[bool] = None) -> Optional[bool]:
+        return _resolve_prefer_flats(self.song.metadata, self._first_chord, semitones, prefer_flats)
+
+    def key_name(self, semitones: int, prefer_flats: Optional[bool] = None) -> str:
+        """Name of the key ``semitones`` away, or a signed offset if it is unknown."""
+        key = self.song.metadata.get("key")
+        if key is None and self._first_chord is not None:
+            key = chord_key(self._first_chord)
+        if key is None or chord_key(key.strip()) is None:
+            return f"{semitones:+d}"
+        return "".join(transpose_key(key, semitones, prefer_flats).split()).replace("/", "-")
+
+    def _metadata(self, semitones: int, prefer_flats: Optional[bool]) -> Dict[str, str]:
+        if semitones % KEY_COUNT == 0 and prefer_flats is None:
+            return dict(self.song.metadata)
+        return _transpose_metadata(self.song.metadata, semitones, prefer_flats)
+
+    def _chord_map(self, semitones: int, prefer_flats: Optional[bool]) -> Dict[str, str]:
+        if semitones % KEY_COUNT == 0 and prefer_flats is None:
+            return {chord: chord for chord in self.chords}
+        spelling = self.spelling(semitones, prefer_flats)
+        return {chord: transpose_chord(chord, semitones, spelling) for chord in self.chords}
+
+    def iter_segments(
+        self, semitones: int, prefer_flats: Optional[bool] = None
+    ) -> Iterator[RenderSegment]:
+        """Yield the two-line layout of the song transposed by ``semitones``."""
+        chords = self._chord_map(semitones, prefer_flats)
+        yield from iter_metadata_segments(self._metadata(semitones, prefer_flats))
+        for item in self._template:
+            if isinstance(item, RenderSegment):
+                yield item
+            elif isinstance(item.line, ChordLyricLine):
+                placements = [
+                    ChordPlacement(chord=chords[p.chord], column=p.column)
+                    for p in item.line.placements
+                ]
+                text = _build_chord_line(placements, len(item.line.lyrics))
+                if text:
+                    yield RenderSegment(kind="chord", text=text)
+            else:
+                raw_text = _transpose_raw_text(item.line.raw_text, chords)
+                yield RenderSegment(kind="chord", text=raw_text.rstrip())
+
+    def segments(self, semitones: int, prefer_flats: Optional[bool] = None) -> List[RenderSegment]:
+        return list(self.iter_segments(semitones, prefer_flats))
+
+    def transposed(self, semitones: int, prefer_flats: Optional[bool] = None) -> Song:
+        return transpose(self.song, semitones, prefer_flats)
+
+    def _chordpro_template(self) -> List[Union[str, int]]:
+        # Literal text alternating with chord numbers (or _KEY_SLOT).
+        if self._chordpro is None:
+            slots = {chord: _SLOT.format(index) for index, chord in enumerate(self.chords)}
+            sections: List[Section] = []
+            for section in self.song.sections:
+                lines = []
+                for entry in section.lines:
+                    if isinstance(entry, ChordLyricLine):
+                        placements = [
+                            ChordPlacement(chord=slots[p.chord], column=p.column)
+                            for p in entry.placements
+                        ]
+                        entry = ChordLyricLine(lyrics=entry.lyrics, placements=placements)
+                    elif isinstance(entry, ChordOnlyLine):
+                        entry = ChordOnlyLine([slots[c] for c in entry.chords], entry.raw_text)
+                    lines.append(entry)
+                sections.append(Section(name=section.name, lines=lines))
+            metadata = dict(self.song.metadata)
+            if "key" in metadata:
+                metadata["key"] = _SLOT.format("k")
+            rendered = song_to_chordpro(Song(sections=sections, metadata=metadata))
+            parts: List[Union[str, int]] = _SLOT_RE.split(rendered)
+            for index in range(1, len(parts), 2):
+                parts[index] = _KEY_SLOT if parts[index] == "k" else int(parts[index])
+            self._chordpro = parts
+        return self._chordpro
+
+    def chordpro(self, semitones: int, prefer_flats: Optional[bool] = None) -> str:
+        """ChordPro text of the song transposed by ``semitones``."""
+        names = list(self._chord_map(semitones, prefer_flats).values())
+        names.append(self._metadata(semitones, prefer_flats).get("key", ""))
+        parts = list(self._chordpro_template())
+        for index in range(1, len(parts), 2):
+            parts[index] = names[parts[index]]
+        return "".join(parts)
+
+
+def _render_rtf(variants: KeyVariants, semitones: int, prefer_flats: Optional[bool]) -> str:
+    return segments_to_rtf(variants.iter_segments(semitones, prefer_flats))
+
+
+def _render_chordpro(variants: KeyVariants, semitones: int, prefer_flats: Optional[bool]) -> str:
+    return variants.chordpro(semitones, prefer_flats)
+
+
+KeyRenderer = Callable[[KeyVariants, int, Optional[bool]], str]
+
+# Output suffix -> (target format, as named by the converters and the cache; renderer).
+KEY_RENDERERS: Dict[str, Tuple[str, KeyRenderer]] = {
+    ".rtf": ("rtf", _render_rtf),
+    ".cho": ("chordpro", _render_chordpro),
+}
+# (source bytes, source format, metadata overrides): what the cache keys entries by.
+CacheInput = Tuple[bytes, str, Optional[Mapping[str, str]]]
+
+
+def write_all_keys(
+    song: Song,
+    output_dir: Path,
+    stem: str,
+    suffix: str,
+    prefer_flats: Optional[bool] = None,
+    cache: Optional[ConversionCache] = None,
+    cache_input: Optional[CacheInput] = None,
+) -> List[Path]:
+    """Write ``song`` in all 12 keys as ``<stem>.<key><suffix>`` under ``output_dir``.
+
+    ``suffix`` selects the format (``.rtf`` or ``.cho``). With a ``cache``,
+    each key is looked up under the same entry a single ``--transpose``
+    conversion of ``cache_input`` would use, and stored on a miss. Raises
+    ``ValueError`` if two keys would get the same file name. Returns the
+    written paths.
+    """
+    try:
+        target_format, render = KEY_RENDERERS[suffix]
+    except KeyError:
+        raise ValueError(f"Unsupported all-keys output format: {suffix!r}") from None
+    if cache is not None and cache_input is None:
+        raise ValueError("cache_input is required with a cache")
+    variants = KeyVariants(song)
+    paths: List[Path] = []
+    for semitones in range(KEY_COUNT):
+        path = output_dir / f"{stem}.{variants.key_name(semitones, prefer_flats)}{suffix}"
+        if path in paths:
+            raise ValueError(f"Two keys would both be written to {path}")
+        paths.append(path)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for semitones, path in enumerate(paths):
+        text: Optional[str] = None
+        if cache is not None:
+            data, source_format, metadata = cache_input
+            key = cache_key(data, source_format, target_format, metadata, semitones, prefer_flats)
+            text = cache.get(key)
+        if text is None:
+            with stage("render"):
+                text = render(variants, semitones, prefer_flats)
+            if cache is not None:
+                cache.put(key, text)
+        with stage("write"):
+            path.write_text(text, encoding="utf-8")
+    return paths
+
+
+def check_all_keys_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if args.output_dir or args.output:
+        parser.error("--all-keys writes its own files; do not combine with -o or --output-dir")
+    if args.transpose:
+        parser.error("--all-keys cannot be combined with --transpose")
+    if len(args.source) > 1 or args.files_from:
+        parser.error("--all-keys converts a single source")
+
+
+def _all_keys_from_args(
+    args: argparse.Namespace,
+    source_format: str,
+    suffix: str,
+    metadata: Optional[Mapping[str, str]],
+    cache: Optional[ConversionCache],
+) -> List[Path]:
+    from .convert import load_song
+
+    source = args.source[0] if args.source else None
+    with stage("read"):
+        if source:
+            text = Path(source).read_text(encoding="utf-8")
+        else:
+            text = sys.stdin.read()
+    song = load_song(text, source_format)
+    if metadata:
+        song.metadata.update(metadata)
+    stem = Path(source).stem if source else "song"
+    cache_input = (text.encode("utf-8"), source_format, metadata)
+    return write_all_keys(
+        song, Path(args.all_keys), stem, suffix, args.prefer_flats, cache, cache_input
+    )
+
+
+def run_all_keys_cli(
+    args: argparse.Namespace,
+    source_format: str,
+    suffix: str,
+    metadata: Optional[Mapping[str, str]] = None,
+    cache: Optional[ConversionCache] = None,
+) -> int:
+    """Run ``--all-keys`` mode from parsed CLI arguments, reporting to stderr."""
+    started = time.perf_counter()
+    if args.profile:
+        with profiling() as profiler:
+            written = _all_keys_from_args(args, source_format, suffix, metadata, cache)
+        profiler.write_json(args.profile)
+    else:
+        written = _all_keys_from_args(args, source_format, suffix, metadata, cache)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {len(written)} keys to {args.all_keys} in {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+__all__ = [
+    "KEY_COUNT",
+    "KEY_RENDERERS",
+    "KeyVariants",
+    "check_all_keys_arguments",
+    "run_all_keys_cli",
+    "write_all_keys",
+]
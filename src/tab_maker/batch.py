@@ -0,0 +1,403 @@
+"""Batch conversion of many songs over a process pool."""
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .cache import ConversionCache
+from .profiling import Profiler, profiling, stage
+
+_GLOB_CHARS = frozenset("*?[")
+# Conversion and pool modules are imported inside the functions that use them,
+# since both CLIs import this module just to register their batch options.
+
+
+@dataclass(slots=True)
+class BatchJob:
+    source: Path
+    destination: Path
+
+
+@dataclass(slots=True)
+class BatchResult:
+    source: Path
+    destination: Path
+    error: Optional[str] = None
+    lines: int = 0
+    cached: Optional[bool] = None  # None when no cache is in use
+    profile: Optional[Dict[str, Any]] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass(slots=True)
+class BatchSummary:
+    results: List[BatchResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def converted(self) -> int:
+        return sum(1 for result in self.results if result.ok)
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for result in self.results if not result.ok)
+
+    @property
+    def lines(self) -> int:
+        return sum(result.lines for result in self.results)
+
+    @property
+    def cache_hits(self) -> int:
+        return sum(1 for result in self.results if result.cached)
+
+    @property
+    def cache_misses(self) -> int:
+        return sum(1 for result in self.results if result.cached is False)
+
+    def format(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        text = (
+            f"Converted {self.converted} of {len(self.results)} files "
+            f"({self.failed} failed) in {self.elapsed:.2f}s: "
+            f"{len(self.results) / elapsed:.1f} files/s, {self.lines / elapsed:.0f} lines/s"
+        )
+        if self.cache_hits or self.cache_misses:
+            text += f"; cache {self.cache_hits} hits, {self.cache_misses} misses"
+        return text
+
+
+def _iter_directory(root: Path, pattern: str) -> Iterator[Tuple[Path, Path]]:
+    for path in sorted(root.rglob(pattern)):
+        if path.is_file():
+            yield path, path.relative_to(root)
+
+
+def _glob_root(pattern: str) -> Path:
+    """The leading directories of ``pattern`` that hold no wildcard."""
+    root = Path()
+    for part in Path(pattern).parent.parts:
+        if _GLOB_CHARS.intersection(part):
+            break
+        root /= part
+    return root
+
+
+def collect_sources(sources: Iterable[str], pattern: str) -> List[Tuple[Path, Path]]:
+    """Expand files, directories and glob patterns into ``(path, relative_path)`` pairs.
+
+    Directories are searched recursively for ``pattern`` and keep their layout
+    relative to the directory. Glob matches keep theirs relative to the
+    pattern's directories before the first wildcard. Files are placed by name.
+    """
+    collected: List[Tuple[Path, Path]] = []
+    seen: set[Path] = set()
+
+    def add(path: Path, relative: Path) -> None:
+        resolved = path.resolve()
+        if resolved not in seen:
+            seen.add(resolved)
+            collected.append((path, relative))
+
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            for found, relative in _iter_directory(path, pattern):
+                add(found, relative)
+        elif not path.exists() and _GLOB_CHARS.intersection(source):
+            root = _glob_root(source)
+            for match in sorted(glob.glob(source, recursive=True)):
+                match_path = Path(match)
+                if match_path.is_file():
+                    add(match_path, match_path.relative_to(root))
+        else:
+            add(path, Path(path.name))
+    return collected
+
+
+def read_file_list(path: str) -> List[str]:
+    """Return the non-empty lines of ``path`` (or stdin for ``-``)."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip()]
+
+
+def plan_jobs(
+    sources: Iterable[Tuple[Path, Path]],
+    output_dir: Path,
+    suffix: str,
+) -> List[BatchJob]:
+    """Map sources to destinations under ``output_dir``.
+
+    Raises ``ValueError`` when two sources would be written to the same file.
+    """
+    jobs: List[BatchJob] = []
+    claimed: Dict[Path, Path] = {}
+    for path, relative in sources:
+        destination = output_dir / relative.with_suffix(suffix)
+        other = claimed.setdefault(destination, path)
+        if other is not path:
+            raise ValueError(f"{other} and {path} would both be written to {destination}")
+        jobs.append(BatchJob(source=path, destination=destination))
+    return jobs
+
+
+CacheSpec = Tuple[str, int]  # (directory, max_bytes)
+
+
+@dataclass(slots=True)
+class _JobOptions:
+    source_format: str
+    target_format: str
+    metadata: Optional[Dict[str, str]] = None
+    cache_spec: Optional[CacheSpec] = None
+    profile: bool = False
+    transpose: int = 0
+    prefer_flats: Optional[bool] = None
+
+
+# One cache per worker process, so its size estimate survives across jobs.
+_worker_caches: Dict[CacheSpec, ConversionCache] = {}
+
+
+def _worker_cache(spec: CacheSpec) -> ConversionCache:
+    cache = _worker_caches.get(spec)
+    if cache is None:
+        cache = _worker_caches[spec] = ConversionCache(spec[0], max_bytes=spec[1])
+    return cache
+
+
+def _convert_data(data: bytes, options: _JobOptions) -> Tuple[str, Optional[bool]]:
+    """Convert one input; returns the output and whether the cache served it."""
+    from .convert import convert_text
+
+    if options.cache_spec is None:
+        output_text = convert_text(
+            data.decode("utf-8"),
+            options.source_format,
+            options.target_format,
+            options.metadata,
+            options.transpose,
+            options.prefer_flats,
+        )
+        return output_text, None
+    cache = _worker_cache(options.cache_spec)
+    hits = cache.stats.hits
+    output_text = cache.convert(
+        data,
+        options.source_format,
+        options.target_format,
+        options.metadata,
+        options.transpose,
+        options.prefer_flats,
+    )
+    return output_text, cache.stats.hits > hits
+
+
+def _convert_job(job: BatchJob, options: _JobOptions) -> BatchResult:
+    with stage("read"):
+        data = job.source.read_bytes()
+    output_text, cached = _convert_data(data, options)
+    with stage("write"):
+        job.destination.parent.mkdir(parents=True, exist_ok=True)
+        job.destination.write_text(output_text, encoding="utf-8")
+    return BatchResult(job.source, job.destination, lines=data.count(b"\n") + 1, cached=cached)
+
+
+def _run_job(payload: Tuple[BatchJob, _JobOptions]) -> BatchResult:
+    job, options = payload
+    try:
+        if not options.profile:
+            return _convert_job(job, options)
+        with profiling() as profiler:
+            result = _convert_job(job, options)
+        result.profile = profiler.as_dict()
+        return result
+    except Exception as exc:
+        return BatchResult(job.source, job.destination, error=f"{type(exc).__name__}: {exc}")
+
+
+def run_batch(
+    jobs: List[BatchJob],
+    source_format: str,
+    target_format: str,
+    metadata: Optional[Dict[str, str]] = None,
+    workers: Optional[int] = None,
+    chunksize: int = 16,
+    on_result: Optional[Callable[[BatchResult], None]] = None,
+    cache: Optional[ConversionCache] = None,
+    profile: bool = False,
+    transpose: int = 0,
+    prefer_flats: Optional[bool] = None,
+) -> BatchSummary:
+    """Convert every job, in a process pool unless ``workers`` is 1.
+
+    Failures are captured per file in the returned summary rather than raised.
+    When ``cache`` is given each worker serves unchanged inputs from its directory.
+    With ``profile`` each result carries its per-stage statistics. ``transpose``
+    and ``prefer_flats`` are passed through to :func:`convert_text`.
+    """
+    options = _JobOptions(
+        source_format=source_format,
+        target_format=target_format,
+        metadata=metadata,
+        cache_spec=None if cache is None else (str(cache.directory), cache.max_bytes),
+        profile=profile,
+        transpose=transpose,
+        prefer_flats=prefer_flats,
+    )
+    payloads = ((job, options) for job in jobs)
+    summary = BatchSummary()
+    started = time.perf_counter()
+
+    if workers == 1 or len(jobs) <= 1:
+        results: Iterable[BatchResult] = map(_run_job, payloads)
+        for result in results:
+            summary.results.append(result)
+            if on_result is not None:
+                on_result(result)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(_run_job, payloads, chunksize=max(chunksize, 1)):
+                summary.results.append(result)
+                if on_result is not None:
+                    on_result(result)
+
+    summary.elapsed = time.perf_counter() - started
+    return summary
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an integer: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def add_batch_arguments(parser: argparse.ArgumentParser, default_pattern: str) -> None:
+    group = parser.add_argument_group("batch mode")
+    group.add_argument(
+        "-d",
+        "--output-dir",
+        help="Convert every source into this directory instead of a single output.",
+    )
+    group.add_argument(
+        "--files-from",
+        help="Read additional source paths from this file, one per line ('-' for stdin).",
+    )
+    group.add_argument(
+        "--pattern",
+        default=default_pattern,
+        help=f"Glob used when a source is a directory (default: {default_pattern}).",
+    )
+    group.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        default=None,
+        help="Number of worker processes. Defaults to the CPU count.",
+    )
+    group.add_argument(
+        "--chunksize",
+        type=int,
+        default=16,
+        help="Number of files handed to a worker at a time (default: 16).",
+    )
+    group.add_argument(
+        "--read-concurrency",
+        type=_positive_int,
+        default=None,
+        metavar="N",
+        help="Read up to N files at once on threads, overlapping reads, conversions and "
+        "writes through the asyncio pipeline. Useful on network filesystems.",
+    )
+
+
+def run_batch_cli(
+    args: argparse.Namespace,
+    source_format: str,
+    target_format: str,
+    suffix: str,
+    metadata: Optional[Dict[str, str]] = None,
+    cache: Optional[ConversionCache] = None,
+) -> int:
+    """Run batch mode from parsed CLI arguments, reporting to stderr."""
+    sources = list(args.source)
+    if args.files_from:
+        sources.extend(read_file_list(args.files_from))
+    try:
+        jobs = plan_jobs(collect_sources(sources, args.pattern), Path(args.output_dir), suffix)
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+
+    def report(result: BatchResult) -> None:
+        if not result.ok:
+            print(f"error: {result.source}: {result.error}", file=sys.stderr)
+
+    workers = args.jobs if args.jobs is not None else os.cpu_count()
+    options: Dict[str, Any] = dict(
+        metadata=metadata,
+        workers=workers,
+        on_result=report,
+        cache=cache,
+        profile=bool(args.profile),
+        transpose=args.transpose,
+        prefer_flats=args.prefer_flats,
+    )
+    if args.read_concurrency is not None:
+        import asyncio
+
+        from .pipeline import run_pipeline
+
+        summary = asyncio.run(
+            run_pipeline(
+                jobs,
+                source_format,
+                target_format,
+                read_concurrency=args.read_concurrency,
+                **options,
+            )
+        )
+    else:
+        summary = run_batch(
+            jobs, source_format, target_format, chunksize=args.chunksize, **options
+        )
+    print(summary.format(), file=sys.stderr)
+    if args.profile:
+        profiler = Profiler()
+        for result in summary.results:
+            if result.profile is not None:
+                profiler.merge(result.profile)
+        profiler.count("files", len(summary.results))
+        profiler.count("files_failed", summary.failed)
+        profiler.write_json(args.profile)
+    return 1 if summary.failed else 0
+
+
+__all__ = [
+    "BatchJob",
+    "BatchResult",
+    "BatchSummary",
+    "add_batch_arguments",
+    "collect_sources",
+    "plan_jobs",
+    "read_file_list",
+    "run_batch",
+    "run_batch_cli",
+]
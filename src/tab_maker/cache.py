@@ -0,0 +1,207 @@
+"""Content-addressed on-disk cache for conversion results."""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+
+from . import __version__
+from .profiling import count
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_ENTRY_SUFFIX = ".out"
+# tempfile and the converters are imported on use; the CLIs import this module
+# only to register --cache-dir.
+# Eviction trims the cache to this fraction of the cap so it does not run on every write.
+_LOW_WATER = 0.9
+# Bumped when rendered output changes within a release, e.g. new RTF escaping.
+_OUTPUT_REVISION = 1
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+
+def cache_key(
+    data: bytes,
+    source_format: str,
+    target_format: str,
+    metadata: Optional[Mapping[str, str]] = None,
+    transpose: int = 0,
+    prefer_flats: Optional[bool] = None,
+) -> str:
+    """Return the hex digest identifying one conversion of ``data``."""
+    digest = hashlib.sha256()
+    header = {
+        "version": __version__,
+        "revision": _OUTPUT_REVISION,
+        "converter": f"{source_format}->{target_format}",
+        "metadata": sorted((metadata or {}).items()),
+        "transpose": [transpose, prefer_flats],
+    }
+    digest.update(json.dumps(header, sort_keys=True).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """Directory of converted outputs keyed by input content, evicted LRU by mtime.
+
+    Entries are written to a temporary file and renamed into place, so several
+    worker processes may share one directory. Reads refresh an entry's mtime,
+    which is what eviction orders by.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._size: Optional[int] = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{_ENTRY_SUFFIX}"
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries: List[Tuple[float, int, Path]] = []
+        for path in self.directory.glob(f"*/*{_ENTRY_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        """Return the number of bytes currently stored, rescanning the directory."""
+        self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            text = path.read_bytes().decode("utf-8")
+        except FileNotFoundError:
+            self.stats.misses += 1
+            count("cache_misses")
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:  # evicted by another worker meanwhile
+            pass
+        self.stats.hits += 1
+        count("cache_hits")
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        import tempfile
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = text.encode("utf-8")
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(temp_name, path)
+        except BaseException:
+            try:
+                os.unlink(temp_name)
+            except FileNotFoundError:
+                pass
+            raise
+        self.stats.writes += 1
+
+        if self._size is None:
+            self.size()
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used entries until under the size cap."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * _LOW_WATER)
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self._size = total
+        self.stats.evictions += removed
+        return removed
+
+    def convert(
+        self,
+        data: bytes,
+        source_format: str,
+        target_format: str,
+        metadata: Optional[Mapping[str, str]] = None,
+        transpose: int = 0,
+        prefer_flats: Optional[bool] = None,
+    ) -> str:
+        """Return the cached conversion of ``data``, converting and storing on a miss."""
+        from .convert import convert_text
+
+        key = cache_key(data, source_format, target_format, metadata, transpose, prefer_flats)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        text = convert_text(
+            data.decode("utf-8"), source_format, target_format, metadata, transpose, prefer_flats
+        )
+        self.put(key, text)
+        return text
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("conversion cache")
+    group.add_argument(
+        "--cache-dir",
+        help="Reuse earlier conversions stored in this directory (created if missing).",
+    )
+    group.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="Maximum cache size in MiB before least recently used entries are evicted.",
+    )
+
+
+def cache_from_args(args: argparse.Namespace) -> Optional[ConversionCache]:
+    if not args.cache_dir:
+        return None
+    return ConversionCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024)
+
+
+__all__ = [
+    "CacheStats",
+    "ConversionCache",
+    "DEFAULT_MAX_BYTES",
+    "add_cache_arguments",
+    "cache_from_args",
+    "cache_key",
+]
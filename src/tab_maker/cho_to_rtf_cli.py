@@ -6,9 +6,15 @@ import sys
 from pathlib import Path
 from typing import Iterable, Optional
 
-from .chord_layout import song_to_two_line_segments
+from .batch import add_batch_arguments, read_file_list, run_batch_cli
+from .cache import ConversionCache, add_cache_arguments, cache_from_args
+from .chord_layout import iter_two_line_segments, song_to_two_line_segments
 from .chordpro_parser import parse_chordpro
-from .rtf import segments_to_rtf
+from .models import Song
+from .profiling import active_profiler, add_profile_argument, count_song, profiling, stage
+from .rtf import segments_to_rtf, write_segments_rtf
+from .transpose import add_transpose_arguments, transpose
+from .watch import add_watch_arguments, run_watch_cli
 
 
 def _read_input(path: Optional[str]) -> str:
@@ -23,14 +29,22 @@ def build_argument_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument(
         "source",
-        nargs="?",
-        help="Path to the input .cho file. Reads from stdin if omitted.",
+        nargs="*",
+        help=(
+            "Path to the input .cho file. Reads from stdin if omitted. "
+            "With --output-dir, any number of files, directories or glob patterns."
+        ),
     )
     parser.add_argument(
         "-o",
         "--output",
         help="Path to write the generated RTF. Defaults to stdout.",
     )
+    add_transpose_arguments(parser)
+    add_batch_arguments(parser, default_pattern="*.cho")
+    add_watch_arguments(parser)
+    add_cache_arguments(parser)
+    add_profile_argument(parser)
     return parser
 
 
@@ -38,19 +52,99 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
     parser = build_argument_parser()
     args = parser.parse_args(list(argv) if argv is not None else None)
 
+    cache = cache_from_args(args)
+    if args.all_keys:
+        from .all_keys import check_all_keys_arguments, run_all_keys_cli
+
+        check_all_keys_arguments(parser, args)
+        try:
+            return run_all_keys_cli(args, "chordpro", ".rtf", cache=cache)
+        except Exception as exc:  # pragma: no cover - CLI guard
+            parser.error(str(exc))
+    if args.watch:
+        if not args.output_dir or not (args.source or args.files_from):
+            parser.error("--watch requires sources and --output-dir")
+        sources = list(args.source)
+        if args.files_from:
+            sources.extend(read_file_list(args.files_from))
+        return run_watch_cli(args, sources)
+    if args.output_dir:
+        return run_batch_cli(args, "chordpro", "rtf", ".rtf", cache=cache)
+    if len(args.source) > 1 or args.files_from:
+        parser.error("multiple sources require --output-dir")
+
+    if not args.profile:
+        return _convert_single(parser, args, cache)
+    with profiling() as profiler:
+        status = _convert_single(parser, args, cache)
+    profiler.write_json(args.profile)
+    return status
+
+
+def _write_streamed(path: str, song: Song) -> None:
+    """Stream the RTF of ``song`` to ``path`` through a temporary file.
+
+    A failure while rendering leaves any existing ``path`` untouched.
+    """
+    import os
+    import tempfile
+
+    destination = Path(path)
+    fd, temp_name = tempfile.mkstemp(dir=destination.parent, prefix=".tmp-")
     try:
-        raw_text = _read_input(args.source)
-        song = parse_chordpro(raw_text)
-        segments = song_to_two_line_segments(song)
-        rtf_text = segments_to_rtf(segments)
+        with os.fdopen(fd, "w", encoding="utf-8") as stream:
+            write_segments_rtf(iter_two_line_segments(song), stream)
+        os.replace(temp_name, destination)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _convert_single(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    cache: Optional[ConversionCache],
+) -> int:
+    try:
+        with stage("read"):
+            raw_text = _read_input(args.source[0] if args.source else None)
+        if cache is not None:
+            rtf_text: Optional[str] = cache.convert(
+                raw_text.encode("utf-8"),
+                "chordpro",
+                "rtf",
+                transpose=args.transpose,
+                prefer_flats=args.prefer_flats,
+            )
+        else:
+            with stage("parse"):
+                song = parse_chordpro(raw_text)
+            count_song(song)
+            if args.transpose or args.prefer_flats is not None:
+                with stage("transpose"):
+                    song = transpose(song, args.transpose, args.prefer_flats)
+            rtf_text = None
+            if not args.output or active_profiler() is not None:
+                # Stdout gets the whole document or nothing. When profiling,
+                # this also times layout, rendering and writing separately.
+                with stage("layout"):
+                    segments = song_to_two_line_segments(song)
+                with stage("render"):
+                    rtf_text = segments_to_rtf(segments)
+
+        with stage("write"):
+            if not args.output:
+                sys.stdout.write(rtf_text)
+            elif rtf_text is not None:
+                Path(args.output).write_text(rtf_text, encoding="utf-8")
+            else:
+                _write_streamed(args.output, song)
     except Exception as exc:  # pragma: no cover - CLI guard
         parser.error(str(exc))
         return 2
-
-    if args.output:
-        Path(args.output).write_text(rtf_text, encoding="utf-8")
-    else:
-        sys.stdout.write(rtf_text)
     return 0
 
 
@@ -2,9 +2,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, List
+from typing import Iterable, Iterator, List, Mapping
 
-from .models import BlankLine, ChordLyricLine, ChordOnlyLine, LyricLine, Song
+from .models import BlankLine, ChordLyricLine, ChordOnlyLine, LyricLine, Section, Song, SongLine
 
 
 @dataclass(slots=True)
@@ -42,40 +42,59 @@ def chord_line_with_lyrics(line: ChordLyricLine) -> List[RenderSegment]:
     return segments
 
 
-def song_to_two_line_segments(song: Song) -> List[RenderSegment]:
-    """Return annotated segments placing chords above lyrics."""
-    segments: List[RenderSegment] = []
-
-    if "title" in song.metadata:
-        segments.append(RenderSegment(kind="metadata", text=f"Title: {song.metadata['title']}"))
-    if "artist" in song.metadata:
-        segments.append(RenderSegment(kind="metadata", text=f"Artist: {song.metadata['artist']}"))
-    for key, value in song.metadata.items():
+def iter_metadata_segments(metadata: Mapping[str, str]) -> Iterator[RenderSegment]:
+    """Yield the header segments for ``metadata``, followed by a blank if any."""
+    has_metadata = False
+    if "title" in metadata:
+        has_metadata = True
+        yield RenderSegment(kind="metadata", text=f"Title: {metadata['title']}")
+    if "artist" in metadata:
+        has_metadata = True
+        yield RenderSegment(kind="metadata", text=f"Artist: {metadata['artist']}")
+    for key, value in metadata.items():
         if key in {"title", "artist"}:
             continue
-        segments.append(RenderSegment(kind="metadata", text=f"{key.title()}: {value}"))
-
-    if segments:
-        segments.append(RenderSegment(kind="blank", text=""))
-
+        has_metadata = True
+        yield RenderSegment(kind="metadata", text=f"{key.title()}: {value}")
+
+    if has_metadata:
+        yield RenderSegment(kind="blank", text="")
+
+
+def line_segments(entry: SongLine) -> List[RenderSegment]:
+    """Return the segments for a single song line."""
+    if isinstance(entry, ChordLyricLine):
+        return chord_line_with_lyrics(entry)
+    if isinstance(entry, LyricLine):
+        return [RenderSegment(kind="lyric", text=entry.text.rstrip())]
+    if isinstance(entry, BlankLine):
+        return [RenderSegment(kind="blank", text="")]
+    if isinstance(entry, ChordOnlyLine):
+        return [RenderSegment(kind="chord", text=entry.raw_text.rstrip())]
+    return [RenderSegment(kind="other", text=str(entry))]
+
+
+def iter_section_segments(section: Section) -> Iterator[RenderSegment]:
+    """Yield the segments for one section, without the separator that follows it."""
+    if section.name:
+        yield RenderSegment(kind="section", text=section.name)
+    for entry in section.lines:
+        yield from line_segments(entry)
+
+
+def iter_two_line_segments(song: Song) -> Iterator[RenderSegment]:
+    """Yield annotated segments placing chords above lyrics, one at a time."""
+    yield from iter_metadata_segments(song.metadata)
+    last = len(song.sections) - 1
     for idx, section in enumerate(song.sections):
-        if section.name:
-            segments.append(RenderSegment(kind="section", text=section.name))
-        for entry in section.lines:
-            if isinstance(entry, BlankLine):
-                segments.append(RenderSegment(kind="blank", text=""))
-            elif isinstance(entry, ChordLyricLine):
-                segments.extend(chord_line_with_lyrics(entry))
-            elif isinstance(entry, LyricLine):
-                segments.append(RenderSegment(kind="lyric", text=entry.text.rstrip()))
-            elif isinstance(entry, ChordOnlyLine):
-                segments.append(RenderSegment(kind="chord", text=entry.raw_text.rstrip()))
-            else:
-                segments.append(RenderSegment(kind="other", text=str(entry)))
-        if idx != len(song.sections) - 1:
-            segments.append(RenderSegment(kind="blank", text=""))
+        yield from iter_section_segments(section)
+        if idx != last:
+            yield RenderSegment(kind="blank", text="")
 
-    return segments
+
+def song_to_two_line_segments(song: Song) -> List[RenderSegment]:
+    """Return annotated segments placing chords above lyrics."""
+    return list(iter_two_line_segments(song))
 
 
 def song_to_two_line_plain_text(song: Song) -> List[str]:
@@ -85,7 +104,11 @@ def song_to_two_line_plain_text(song: Song) -> List[str]:
 
 __all__ = [
     "RenderSegment",
+    "iter_metadata_segments",
+    "iter_section_segments",
+    "iter_two_line_segments",
     "song_to_two_line_segments",
     "song_to_two_line_plain_text",
     "chord_line_with_lyrics",
+    "line_segments",
 ]
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import re
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Union
 
 from .models import (
     BlankLine,
@@ -12,8 +12,10 @@ from .models import (
     Section,
     Song,
 )
+from .parser import _iter_lines
 
 _DIRECTIVE_RE = re.compile(r"^\{([^:]+):\s*(.*?)\s*\}$")
+_NEW_SONG_RE = re.compile(r"^\{\s*(?:new_song|ns)\s*(?::[^}]*)?\}$", re.IGNORECASE)
 _SECTION_DIRECTIVES = {"comment", "comment_italic", "comment_box"}
 _METADATA_DIRECTIVES = {
     "title",
@@ -29,75 +31,109 @@ _METADATA_DIRECTIVES = {
 
 
 def _parse_chordpro_text_line(line: str) -> ChordLyricLine | LyricLine:
+    if "[" not in line:
+        return LyricLine(text=line)
+
     placements: List[ChordPlacement] = []
-    lyric_chars: List[str] = []
-    idx = 0
+    lyric_parts: List[str] = []
     column = 0
-    length = len(line)
-
-    while idx < length:
-        char = line[idx]
-        if char == "[":
-            closing = line.find("]", idx + 1)
-            if closing == -1:  # treat unmatched '[' as literal
-                lyric_chars.append(char)
-                column += 1
-                idx += 1
-                continue
-            chord = line[idx + 1 : closing].strip()
-            if chord:
-                placements.append(ChordPlacement(chord=chord, column=column))
-            idx = closing + 1
-            continue
-        lyric_chars.append(char)
-        column += 1
-        idx += 1
-
-    lyrics = "".join(lyric_chars)
+    position = 0
+
+    while True:
+        opening = line.find("[", position)
+        if opening == -1:
+            break
+        closing = line.find("]", opening + 1)
+        if closing == -1:  # unmatched '[' and everything after it is literal
+            break
+        if opening > position:
+            lyric_parts.append(line[position:opening])
+            column += opening - position
+        chord = line[opening + 1 : closing].strip()
+        if chord:
+            placements.append(ChordPlacement(chord=chord, column=column))
+        position = closing + 1
+
+    lyric_parts.append(line[position:])
+    lyrics = "".join(lyric_parts)
     if placements:
         return ChordLyricLine(lyrics=lyrics, placements=placements)
     return LyricLine(text=lyrics)
 
 
-def parse_chordpro(text: str) -> Song:
-    sections: List[Section] = []
-    current_section = Section(name=None)
-    metadata: dict[str, str] = {}
+class _SongBuilder:
+    """Accumulates the sections and metadata of a single ChordPro song."""
 
-    def start_new_section(name: str) -> None:
-        nonlocal current_section
-        if current_section.lines or current_section.name is not None:
-            sections.append(current_section)
-        current_section = Section(name=name)
+    __slots__ = ("sections", "current_section", "metadata", "has_content")
 
-    for raw_line in text.splitlines():
+    def __init__(self) -> None:
+        self.sections: List[Section] = []
+        self.current_section = Section(name=None)
+        self.metadata: dict[str, str] = {}
+        self.has_content = False
+
+    def start_new_section(self, name: str) -> None:
+        if self.current_section.lines or self.current_section.name is not None:
+            self.sections.append(self.current_section)
+        self.current_section = Section(name=name)
+
+    def feed(self, raw_line: str) -> None:
         stripped = raw_line.strip()
+        if stripped:
+            self.has_content = True
         directive_match = _DIRECTIVE_RE.match(stripped)
         if directive_match:
             key = directive_match.group(1).strip().lower()
             value = directive_match.group(2)
             if key in _SECTION_DIRECTIVES:
-                start_new_section(value)
-                continue
+                self.start_new_section(value)
+                return
             if key in _METADATA_DIRECTIVES:
-                metadata[key] = value
-                continue
+                self.metadata[key] = value
+                return
             # Unknown directive treated as plain lyric text without braces
             stripped = value
         if not stripped and raw_line == "":
-            current_section.lines.append(BlankLine())
-            continue
+            self.current_section.lines.append(BlankLine())
+            return
         if not raw_line.strip():  # whitespace-only line
-            current_section.lines.append(BlankLine())
-            continue
+            self.current_section.lines.append(BlankLine())
+            return
+
+        self.current_section.lines.append(self.text_line(raw_line))
+
+    text_line = staticmethod(_parse_chordpro_text_line)
 
-        parsed_line = _parse_chordpro_text_line(raw_line)
-        current_section.lines.append(parsed_line)
+    def finish(self) -> Song:
+        if self.current_section.lines or self.current_section.name is not None:
+            self.sections.append(self.current_section)
+        return Song(sections=self.sections, metadata=self.metadata)
 
-    if current_section.lines or current_section.name is not None:
-        sections.append(current_section)
 
-    return Song(sections=sections, metadata=metadata)
+def parse_chordpro(text: str) -> Song:
+    builder = _SongBuilder()
+    for raw_line in text.splitlines():
+        builder.feed(raw_line)
+    return builder.finish()
+
+
+def iter_chordpro_songs(lines: Union[str, Iterable[str]]) -> Iterator[Song]:
+    """Lazily yield one song per ``{new_song}``/``{ns}`` block of a songbook.
+
+    ``lines`` may be a whole file, a list of lines or an open text stream; only
+    the song being built is held in memory and metadata never leaks between songs.
+    Blocks containing only blank lines are skipped.
+    """
+    builder = _SongBuilder()
+    for raw_line in _iter_lines(lines):
+        if _NEW_SONG_RE.match(raw_line.strip()):
+            if builder.has_content:
+                yield builder.finish()
+            builder = _SongBuilder()
+            continue
+        builder.feed(raw_line)
+    if builder.has_content:
+        yield builder.finish()
 
 
-__all__ = ["parse_chordpro"]
+__all__ = ["iter_chordpro_songs", "parse_chordpro"]
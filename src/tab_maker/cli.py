@@ -6,8 +6,12 @@ import sys
 from pathlib import Path
 from typing import Iterable, Optional
 
+from .batch import _positive_int, add_batch_arguments, run_batch_cli
+from .cache import ConversionCache, add_cache_arguments, cache_from_args
 from .chordpro import song_to_chordpro
 from .parser import parse_song
+from .profiling import add_profile_argument, count_song, profiling, stage
+from .transpose import add_transpose_arguments, transpose
 
 
 def _read_input(path: Optional[str]) -> str:
@@ -43,8 +47,11 @@ def build_argument_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument(
         "source",
-        nargs="?",
-        help="Path to the input chord sheet. Reads from stdin when omitted.",
+        nargs="*",
+        help=(
+            "Path to the input chord sheet. Reads from stdin when omitted. "
+            "With --output-dir, any number of files, directories or glob patterns."
+        ),
     )
     parser.add_argument(
         "-o",
@@ -60,6 +67,17 @@ def build_argument_parser() -> argparse.ArgumentParser:
         action="append",
         help="Additional metadata entries in key=value format (may repeat)",
     )
+    parser.add_argument(
+        "--parse-jobs",
+        type=_positive_int,
+        default=None,
+        metavar="N",
+        help="Parse a single large input on N processes, split at section and blank lines.",
+    )
+    add_transpose_arguments(parser)
+    add_batch_arguments(parser, default_pattern="*.txt")
+    add_cache_arguments(parser)
+    add_profile_argument(parser)
     return parser
 
 
@@ -67,19 +85,76 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
     parser = build_argument_parser()
     args = parser.parse_args(list(argv) if argv is not None else None)
 
+    overrides: dict[str, str] = {}
+    try:
+        _apply_metadata(args, overrides)
+    except ValueError as exc:
+        parser.error(str(exc))
+    cache = cache_from_args(args)
+
+    if args.all_keys:
+        from .all_keys import check_all_keys_arguments, run_all_keys_cli
+
+        check_all_keys_arguments(parser, args)
+        try:
+            return run_all_keys_cli(args, "ug", ".cho", metadata=overrides, cache=cache)
+        except Exception as exc:  # pragma: no cover - best effort CLI guard
+            parser.error(str(exc))
+    if args.output_dir:
+        return run_batch_cli(args, "ug", "chordpro", ".cho", metadata=overrides, cache=cache)
+    if len(args.source) > 1 or args.files_from:
+        parser.error("multiple sources require --output-dir")
+
+    if not args.profile:
+        return _convert_single(parser, args, overrides, cache)
+    with profiling() as profiler:
+        status = _convert_single(parser, args, overrides, cache)
+    profiler.write_json(args.profile)
+    return status
+
+
+def _convert_single(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    overrides: dict[str, str],
+    cache: Optional[ConversionCache],
+) -> int:
     try:
-        raw_input = _read_input(args.source)
-        song = parse_song(raw_input)
-        _apply_metadata(args, song.metadata)
-        output_text = song_to_chordpro(song)
+        with stage("read"):
+            raw_input = _read_input(args.source[0] if args.source else None)
+        if cache is not None:
+            output_text = cache.convert(
+                raw_input.encode("utf-8"),
+                "ug",
+                "chordpro",
+                overrides,
+                args.transpose,
+                args.prefer_flats,
+            )
+        else:
+            with stage("parse"):
+                if args.parse_jobs is not None:
+                    from .parallel_parser import parse_song_parallel
+
+                    song = parse_song_parallel(raw_input, workers=args.parse_jobs)
+                else:
+                    song = parse_song(raw_input)
+            count_song(song)
+            _apply_metadata(args, song.metadata)
+            if args.transpose or args.prefer_flats is not None:
+                with stage("transpose"):
+                    song = transpose(song, args.transpose, args.prefer_flats)
+            with stage("render"):
+                output_text = song_to_chordpro(song)
     except Exception as exc:  # pragma: no cover - best effort CLI guard
         parser.error(str(exc))
         return 2
 
-    if args.output:
-        Path(args.output).write_text(output_text, encoding="utf-8")
-    else:
-        sys.stdout.write(output_text)
+    with stage("write"):
+        if args.output:
+            Path(args.output).write_text(output_text, encoding="utf-8")
+        else:
+            sys.stdout.write(output_text)
     return 0
 
 
@@ -0,0 +1,117 @@
+"""Shared text-to-text conversion routines used by the CLIs and batch tooling."""
+from __future__ import annotations
+
+from pathlib import PurePath
+from typing import Callable, Dict, Mapping, Optional, Union
+
+from .chord_layout import song_to_two_line_plain_text, song_to_two_line_segments
+from .chordpro import song_to_chordpro
+from .chordpro_parser import parse_chordpro
+from .models import Song
+from .parser import parse_song
+from .profiling import count_song, stage
+from .rtf import segments_to_rtf
+from .text import song_to_plain_lines
+from .transpose import transpose as transpose_song
+
+SongLoader = Callable[[str], Song]
+SongRenderer = Callable[[Song], str]
+
+LOADERS: Dict[str, SongLoader] = {
+    "ug": parse_song,
+    "chordpro": parse_chordpro,
+}
+CHORDPRO_SUFFIXES = frozenset({".cho", ".chordpro", ".chopro", ".crd"})
+
+
+def guess_source_format(path: Union[str, PurePath]) -> str:
+    """Return ``"chordpro"`` for ChordPro file extensions and ``"ug"`` otherwise."""
+    return "chordpro" if PurePath(path).suffix.lower() in CHORDPRO_SUFFIXES else "ug"
+
+
+def _render_chordpro(song: Song) -> str:
+    with stage("render"):
+        return song_to_chordpro(song)
+
+
+def _render_two_line_rtf(song: Song) -> str:
+    with stage("layout"):
+        segments = song_to_two_line_segments(song)
+    with stage("render"):
+        return segments_to_rtf(segments)
+
+
+def _render_plain_text(song: Song) -> str:
+    with stage("layout"):
+        lines = song_to_plain_lines(song)
+    with stage("render"):
+        return "\n".join(lines) + "\n"
+
+
+def _render_two_line_text(song: Song) -> str:
+    with stage("layout"):
+        lines = song_to_two_line_plain_text(song)
+    with stage("render"):
+        return "\n".join(lines) + "\n"
+
+
+RENDERERS: Dict[str, SongRenderer] = {
+    "chordpro": _render_chordpro,
+    "rtf": _render_two_line_rtf,
+    "text": _render_plain_text,
+    "two-line": _render_two_line_text,
+}
+
+
+def load_song(text: str, source_format: str) -> Song:
+    """Parse ``text`` using the loader registered for ``source_format``."""
+    try:
+        loader = LOADERS[source_format]
+    except KeyError:
+        raise ValueError(f"Unknown source format: {source_format!r}") from None
+    with stage("parse"):
+        song = loader(text)
+    count_song(song)
+    return song
+
+
+def render_song(song: Song, target_format: str) -> str:
+    """Render ``song`` using the renderer registered for ``target_format``."""
+    try:
+        renderer = RENDERERS[target_format]
+    except KeyError:
+        raise ValueError(f"Unknown target format: {target_format!r}") from None
+    return renderer(song)
+
+
+def convert_text(
+    text: str,
+    source_format: str,
+    target_format: str,
+    metadata: Optional[Mapping[str, str]] = None,
+    transpose: int = 0,
+    prefer_flats: Optional[bool] = None,
+) -> str:
+    """Parse ``text`` and render it, applying ``metadata`` overrides in between.
+
+    A non-zero ``transpose`` moves every chord by that many semitones before
+    rendering; see :func:`tab_maker.transpose.transpose` for ``prefer_flats``.
+    """
+    song = load_song(text, source_format)
+    if metadata:
+        song.metadata.update(metadata)
+    if transpose or prefer_flats is not None:
+        with stage("transpose"):
+            song = transpose_song(song, transpose, prefer_flats)
+    return render_song(song, target_format)
+
+
+__all__ = [
+    "CHORDPRO_SUFFIXES",
+    "LOADERS",
+    "RENDERERS",
+    "convert_text",
+    "guess_source_format",
+    "load_song",
+    "render_song",
+]
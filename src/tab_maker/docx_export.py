@@ -1,36 +1,50 @@
-"""DOCX export for Tab-Maker songs."""
+"""DOCX export for Tab-Maker songs.
+
+The default ``"builtin"`` backend streams the document with
+:mod:`tab_maker.docx_xml` and needs no third-party packages. The
+``"python-docx"`` backend builds the document with python-docx instead.
+"""
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Union
+from typing import Any, Iterable, Mapping, Optional, Tuple, Union
 
 from .models import Song
 from .text import song_to_plain_lines
 
-try:  # pragma: no cover - optional dependency
-    from docx import Document
-    from docx.shared import Pt
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-except Exception:  # pragma: no cover
-    Document = None  # type: ignore
-    Pt = None  # type: ignore
-    WD_ALIGN_PARAGRAPH = None  # type: ignore
+# (Document, Pt, WD_ALIGN_PARAGRAPH), imported on first export because
+# python-docx pulls in lxml and is slow to load.
+_docx_api: Optional[Tuple[Any, Any, Any]] = None
 
 
-def _ensure_docx_available() -> None:
-    if Document is None:
-        raise RuntimeError(
-            "python-docx is required for DOCX export. Install with 'pip install python-docx'."
-        )
+def _load_docx() -> Tuple[Any, Any, Any]:
+    global _docx_api
+    if _docx_api is None:
+        try:  # pragma: no cover - optional dependency
+            from docx import Document
+            from docx.enum.text import WD_ALIGN_PARAGRAPH
+            from docx.shared import Pt
+        except Exception:  # pragma: no cover
+            raise RuntimeError(
+                "python-docx is required for the python-docx DOCX backend. "
+                "Install with 'pip install python-docx' or use the builtin backend."
+            ) from None
+        _docx_api = (Document, Pt, WD_ALIGN_PARAGRAPH)
+    return _docx_api
 
 
-def song_to_docx(song: Song, destination: Union[str, Path]) -> Path:
-    """Write the song to a DOCX file and return the output path."""
-    _ensure_docx_available()
-    assert Document is not None
+DOCX_BACKENDS = ("builtin", "python-docx")
+
+
+def _python_docx_lines(
+    lines: Iterable[str],
+    destination: Union[str, Path],
+    metadata: Optional[Mapping[str, str]],
+) -> Path:
+    Document, Pt, WD_ALIGN_PARAGRAPH = _load_docx()
 
     document = Document()
-    metadata = song.metadata
+    metadata = metadata or {}
 
     title = metadata.get("title")
     artist = metadata.get("artist")
@@ -61,7 +75,7 @@ def song_to_docx(song: Song, destination: Union[str, Path]) -> Path:
     if "artist" in metadata:
         document.core_properties.author = metadata["artist"]
 
-    for line in song_to_plain_lines(song):
+    for line in lines:
         paragraph = document.add_paragraph()
         run = paragraph.add_run(line)
         run.font.name = "Courier New"
@@ -73,4 +87,27 @@ def song_to_docx(song: Song, destination: Union[str, Path]) -> Path:
     return output_path
 
 
-__all__ = ["song_to_docx"]
+def lines_to_docx(
+    lines: Iterable[str],
+    destination: Union[str, Path],
+    metadata: Optional[Mapping[str, str]] = None,
+    backend: str = "builtin",
+) -> Path:
+    """Write plain ``lines`` to a DOCX file, using ``metadata`` for the header."""
+    if backend == "builtin":
+        from .docx_xml import lines_to_docx as builtin_lines_to_docx
+
+        return builtin_lines_to_docx(lines, destination, metadata)
+    if backend == "python-docx":
+        return _python_docx_lines(lines, destination, metadata)
+    raise ValueError(f"Unknown DOCX backend: {backend!r}")
+
+
+def song_to_docx(
+    song: Song, destination: Union[str, Path], backend: str = "builtin"
+) -> Path:
+    """Write the song to a DOCX file and return the output path."""
+    return lines_to_docx(song_to_plain_lines(song), destination, song.metadata, backend)
+
+
+__all__ = ["DOCX_BACKENDS", "lines_to_docx", "song_to_docx"]
@@ -0,0 +1,309 @@
+"""Built-in DOCX writer that streams WordprocessingML straight into a zip file.
+
+Paragraphs are written to ``word/document.xml`` as they arrive, so memory use
+does not grow with the document, and formatting comes from a handful of
+shared paragraph styles rather than per-run font settings. Each song is its
+own document section so it can carry its own page header.
+
+    with DocxWriter("book.docx", title="Songbook") as writer:
+        for song in songs:
+            writer.add_song(song)
+"""
+from __future__ import annotations
+
+import io
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, TextIO, Union
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from .chord_layout import RenderSegment
+from .models import Song
+from .text import song_to_plain_lines
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_OFFICE_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_FONT = "Courier New"
+
+# Characters XML 1.0 cannot represent are dropped; markup characters are escaped.
+_XML_ESCAPES: Dict[int, Optional[str]] = {
+    ord("&"): "&amp;",
+    ord("<"): "&lt;",
+    ord(">"): "&gt;",
+    ord('"'): "&quot;",
+    **{code: None for code in range(0x20) if code not in (0x09, 0x0A, 0x0D)},
+    0xFFFE: None,
+    0xFFFF: None,
+}
+
+# Letter paper with one-inch margins, in twentieths of a point.
+_PAGE_SETUP = (
+    '<w:pgSz w:w="12240" w:h="15840"/>'
+    '<w:pgMar w:top="1440" w:right="1440" w:bottom="1440" w:left="1440" '
+    'w:header="720" w:footer="720" w:gutter="0"/>'
+)
+
+_STYLES_XML = (
+    f'{_XML_DECL}<w:styles xmlns:w="{_W_NS}">'
+    "<w:docDefaults><w:rPrDefault><w:rPr>"
+    f'<w:rFonts w:ascii="{_FONT}" w:hAnsi="{_FONT}" w:cs="{_FONT}" w:eastAsia="{_FONT}"/>'
+    '<w:sz w:val="22"/><w:szCs w:val="22"/>'
+    "</w:rPr></w:rPrDefault><w:pPrDefault><w:pPr>"
+    '<w:spacing w:after="0" w:line="240" w:lineRule="auto"/>'
+    "</w:pPr></w:pPrDefault></w:docDefaults>"
+    '<w:style w:type="paragraph" w:default="1" w:styleId="Normal">'
+    '<w:name w:val="Normal"/></w:style>'
+    '<w:style w:type="paragraph" w:styleId="SongHeader"><w:name w:val="Song Header"/>'
+    '<w:basedOn w:val="Normal"/><w:pPr><w:jc w:val="center"/></w:pPr>'
+    '<w:rPr><w:b/><w:sz w:val="32"/><w:szCs w:val="32"/></w:rPr></w:style>'
+    '<w:style w:type="paragraph" w:styleId="Heading1"><w:name w:val="heading 1"/>'
+    '<w:basedOn w:val="Normal"/><w:next w:val="Normal"/>'
+    '<w:pPr><w:keepNext/><w:spacing w:before="240" w:after="120"/><w:outlineLvl w:val="0"/></w:pPr>'
+    '<w:rPr><w:b/><w:sz w:val="32"/><w:szCs w:val="32"/></w:rPr></w:style>'
+    '<w:style w:type="paragraph" w:styleId="ChordLine"><w:name w:val="Chord Line"/>'
+    '<w:basedOn w:val="Normal"/><w:pPr><w:keepNext/></w:pPr><w:rPr><w:b/></w:rPr></w:style>'
+    '<w:style w:type="paragraph" w:styleId="SectionName"><w:name w:val="Section Name"/>'
+    '<w:basedOn w:val="Normal"/><w:pPr><w:keepNext/></w:pPr>'
+    '<w:rPr><w:b/><w:i/></w:rPr></w:style>'
+    "</w:styles>"
+)
+
+_APP_XML = (
+    f"{_XML_DECL}<Properties "
+    'xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+    "<Application>Tab-Maker</Application></Properties>"
+)
+
+_PACKAGE_RELS = (
+    f'{_XML_DECL}<Relationships xmlns="{_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{_OFFICE_REL}/officeDocument" Target="word/document.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" '
+    'Target="docProps/core.xml"/>'
+    f'<Relationship Id="rId3" Type="{_OFFICE_REL}/extended-properties" Target="docProps/app.xml"/>'
+    "</Relationships>"
+)
+
+_SEGMENT_STYLES = {"chord": "ChordLine", "section": "SectionName"}
+
+
+def escape_xml(text: str) -> str:
+    return text.translate(_XML_ESCAPES)
+
+
+def _run_xml(text: str) -> str:
+    # Tabs must be <w:tab/> elements; Word ignores tab characters inside <w:t>.
+    runs = []
+    for index, piece in enumerate(text.split("\t")):
+        if index:
+            runs.append("<w:tab/>")
+        if piece:
+            runs.append(f'<w:t xml:space="preserve">{escape_xml(piece)}</w:t>')
+    return f"<w:r>{''.join(runs)}</w:r>" if runs else ""
+
+
+def _paragraph_xml(text: str, style: Optional[str] = None) -> str:
+    properties = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f"<w:p>{properties}{_run_xml(text)}</w:p>"
+
+
+def _content_types(header_count: int) -> str:
+    main = "application/vnd.openxmlformats-officedocument.wordprocessingml"
+    overrides = [
+        f'<Override PartName="/word/document.xml" ContentType="{main}.document.main+xml"/>',
+        f'<Override PartName="/word/styles.xml" ContentType="{main}.styles+xml"/>',
+        '<Override PartName="/docProps/core.xml" '
+        'ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>',
+        '<Override PartName="/docProps/app.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.extended-properties+xml"/>',
+    ]
+    overrides.extend(
+        f'<Override PartName="/word/header{number}.xml" ContentType="{main}.header+xml"/>'
+        for number in range(1, header_count + 1)
+    )
+    return (
+        f'{_XML_DECL}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        f"{''.join(overrides)}</Types>"
+    )
+
+
+def _core_properties(title: Optional[str], author: Optional[str]) -> str:
+    created = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    fields = []
+    if title:
+        fields.append(f"<dc:title>{escape_xml(title)}</dc:title>")
+    if author:
+        fields.append(f"<dc:creator>{escape_xml(author)}</dc:creator>")
+    return (
+        f"{_XML_DECL}<cp:coreProperties "
+        'xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+        f"{''.join(fields)}"
+        f'<dcterms:created xsi:type="dcterms:W3CDTF">{created}</dcterms:created>'
+        "</cp:coreProperties>"
+    )
+
+
+def song_header_text(metadata: Mapping[str, str]) -> Optional[str]:
+    """Return the page header for a song: ``title - artist``, or whichever is set."""
+    title = metadata.get("title")
+    artist = metadata.get("artist")
+    if title and artist:
+        return f"{title} - {artist}"
+    return title or artist
+
+
+class DocxWriter:
+    """Streams paragraphs into a new DOCX package at ``destination``.
+
+    Call :meth:`start_section` to begin a new page with its own header (the
+    writer starts in a section without one) and :meth:`close`, or use the
+    writer as a context manager, to finish the package.
+    """
+
+    def __init__(
+        self,
+        destination: Union[str, Path],
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+    ) -> None:
+        self.path = Path(destination)
+        self.title = title
+        self.author = author
+        self._zip = ZipFile(self.path, "w", compression=ZIP_DEFLATED)
+        self._stream: TextIO = io.TextIOWrapper(
+            self._zip.open("word/document.xml", "w"), encoding="utf-8"
+        )
+        self._headers: Dict[Optional[str], int] = {}
+        self._section_header: Optional[str] = None
+        self._section_empty = True
+        self._closed = False
+        self._stream.write(
+            f'{_XML_DECL}<w:document xmlns:w="{_W_NS}" xmlns:r="{_R_NS}"><w:body>'
+        )
+
+    def _header_number(self, text: Optional[str]) -> int:
+        number = self._headers.get(text)
+        if number is None:
+            number = self._headers[text] = len(self._headers) + 1
+        return number
+
+    def _section_properties(self) -> str:
+        number = self._header_number(self._section_header)
+        return (
+            f'<w:sectPr><w:headerReference w:type="default" r:id="rIdHeader{number}"/>'
+            f"{_PAGE_SETUP}</w:sectPr>"
+        )
+
+    def start_section(self, header: Optional[str] = None) -> None:
+        """Start a new page whose header reads ``header`` (blank when ``None``)."""
+        if not self._section_empty:
+            self._stream.write(f"<w:p><w:pPr>{self._section_properties()}</w:pPr></w:p>")
+        self._section_header = header
+        self._section_empty = True
+
+    def add_paragraph(self, text: str, style: Optional[str] = None) -> None:
+        self._section_empty = False
+        self._stream.write(_paragraph_xml(text, style))
+
+    def add_lines(self, lines: Iterable[str], style: Optional[str] = None) -> None:
+        """Add one paragraph per line, all in the same ``style``."""
+        self._section_empty = False
+        write = self._stream.write
+        for line in lines:
+            write(_paragraph_xml(line, style))
+
+    def add_segments(self, segments: Iterable[RenderSegment]) -> None:
+        """Add two-line layout segments, styling chord lines and section names."""
+        self._section_empty = False
+        write = self._stream.write
+        for segment in segments:
+            write(_paragraph_xml(segment.text, _SEGMENT_STYLES.get(segment.kind)))
+
+    def add_page_break(self) -> None:
+        self._section_empty = False
+        self._stream.write('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+
+    def add_song(self, song: Song, lines: Optional[Iterable[str]] = None) -> None:
+        """Add ``song`` as its own section, as plain lines unless ``lines`` is given."""
+        self.start_section(song_header_text(song.metadata))
+        self.add_lines(song_to_plain_lines(song) if lines is None else lines)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._stream.write(f"{self._section_properties()}</w:body></w:document>")
+        self._stream.close()
+
+        relationships: List[str] = [
+            f'<Relationship Id="rIdStyles" Type="{_OFFICE_REL}/styles" Target="styles.xml"/>'
+        ]
+        for text, number in self._headers.items():
+            body = _paragraph_xml(text, "SongHeader") if text else "<w:p/>"
+            self._zip.writestr(
+                f"word/header{number}.xml",
+                f'{_XML_DECL}<w:hdr xmlns:w="{_W_NS}" xmlns:r="{_R_NS}">{body}</w:hdr>',
+            )
+            relationships.append(
+                f'<Relationship Id="rIdHeader{number}" Type="{_OFFICE_REL}/header" '
+                f'Target="header{number}.xml"/>'
+            )
+        self._zip.writestr(
+            "word/_rels/document.xml.rels",
+            f'{_XML_DECL}<Relationships xmlns="{_REL_NS}">{"".join(relationships)}</Relationships>',
+        )
+        self._zip.writestr("word/styles.xml", _STYLES_XML)
+        self._zip.writestr("[Content_Types].xml", _content_types(len(self._headers)))
+        self._zip.writestr("_rels/.rels", _PACKAGE_RELS)
+        self._zip.writestr("docProps/core.xml", _core_properties(self.title, self.author))
+        self._zip.writestr("docProps/app.xml", _APP_XML)
+        self._zip.close()
+
+    def __enter__(self) -> "DocxWriter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def lines_to_docx(
+    lines: Iterable[str],
+    destination: Union[str, Path],
+    metadata: Optional[Mapping[str, str]] = None,
+) -> Path:
+    """Write plain ``lines`` as a single-song DOCX file and return its path."""
+    metadata = metadata or {}
+    with DocxWriter(destination, metadata.get("title"), metadata.get("artist")) as writer:
+        writer.start_section(song_header_text(metadata))
+        writer.add_lines(lines)
+    return writer.path
+
+
+def songs_to_docx(
+    songs: Iterable[Song],
+    destination: Union[str, Path],
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+) -> Path:
+    """Write each song on its own pages of one DOCX file, one song in memory at a time."""
+    with DocxWriter(destination, title, author) as writer:
+        for song in songs:
+            writer.add_song(song)
+    return writer.path
+
+
+__all__ = [
+    "DocxWriter",
+    "escape_xml",
+    "lines_to_docx",
+    "song_header_text",
+    "songs_to_docx",
+]
@@ -0,0 +1,171 @@
+"""Render one song to several output formats from a single parse.
+
+The intermediate forms the renderers share (plain lines with merged chords and
+two-line layout segments) are built once per song, then every requested
+format is written concurrently from them.
+"""
+from __future__ import annotations
+
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
+
+from .chord_layout import RenderSegment, song_to_two_line_segments
+from .chordpro import song_to_chordpro
+from .convert import load_song
+from .models import Song
+from .profiling import stage
+from .rtf import write_segments_rtf
+from .text import song_to_plain_lines
+
+
+@dataclass(slots=True)
+class SharedForms:
+    """A song plus the intermediate forms its renderers read."""
+
+    song: Song
+    plain_lines: Optional[List[str]] = None
+    segments: Optional[List[RenderSegment]] = None
+
+
+def _write_chordpro(forms: SharedForms, path: Path) -> None:
+    path.write_text(song_to_chordpro(forms.song), encoding="utf-8")
+
+
+def _write_text(forms: SharedForms, path: Path) -> None:
+    path.write_text("\n".join(forms.plain_lines or []) + "\n", encoding="utf-8")
+
+
+def _write_two_line(forms: SharedForms, path: Path) -> None:
+    text = "\n".join(segment.text for segment in forms.segments or []) + "\n"
+    path.write_text(text, encoding="utf-8")
+
+
+def _write_rtf(forms: SharedForms, path: Path) -> None:
+    with open(path, "w", encoding="utf-8") as stream:
+        write_segments_rtf(forms.segments or [], stream)
+
+
+def _write_docx(forms: SharedForms, path: Path) -> None:
+    from .docx_export import lines_to_docx
+
+    lines_to_docx(forms.plain_lines or [], path, forms.song.metadata)
+
+
+@dataclass(slots=True)
+class ExportFormat:
+    suffix: str
+    writer: Callable[[SharedForms, Path], None]
+    needs_plain_lines: bool = False
+    needs_segments: bool = False
+
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    "chordpro": ExportFormat(".cho", _write_chordpro),
+    "text": ExportFormat(".txt", _write_text, needs_plain_lines=True),
+    "two-line": ExportFormat(".two-line.txt", _write_two_line, needs_segments=True),
+    "rtf": ExportFormat(".rtf", _write_rtf, needs_segments=True),
+    "docx": ExportFormat(".docx", _write_docx, needs_plain_lines=True),
+}
+
+
+@dataclass(slots=True)
+class ExportResult:
+    format: str
+    path: Path
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _format(name: str) -> ExportFormat:
+    try:
+        return EXPORT_FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Unknown export format: {name!r}") from None
+
+
+def build_shared_forms(song: Song, formats: Sequence[str]) -> SharedForms:
+    """Compute each intermediate form needed by ``formats`` exactly once."""
+    specs = [_format(name) for name in formats]
+    forms = SharedForms(song)
+    if any(spec.needs_plain_lines for spec in specs):
+        with stage("layout"):
+            forms.plain_lines = song_to_plain_lines(song)
+    if any(spec.needs_segments for spec in specs):
+        with stage("layout"):
+            forms.segments = song_to_two_line_segments(song)
+    return forms
+
+
+def _run_writer(name: str, forms: SharedForms, path: Path) -> ExportResult:
+    try:
+        with stage(f"write_{name}"):
+            EXPORT_FORMATS[name].writer(forms, path)
+    except Exception as exc:
+        return ExportResult(name, path, error=f"{type(exc).__name__}: {exc}")
+    return ExportResult(name, path)
+
+
+def export_song(
+    song: Song,
+    output_dir: Path,
+    stem: str,
+    formats: Sequence[str],
+    workers: Optional[int] = None,
+) -> List[ExportResult]:
+    """Write ``song`` as ``<stem><suffix>`` in ``output_dir`` for every format.
+
+    Writers run on a thread pool (one thread per format unless ``workers`` is
+    given); a failing format is reported in its result without stopping the
+    others. Results come back in the order of ``formats``.
+    """
+    formats = list(dict.fromkeys(formats))
+    forms = build_shared_forms(song, formats)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = {name: output_dir / f"{stem}{EXPORT_FORMATS[name].suffix}" for name in formats}
+    if workers == 1 or len(formats) <= 1:
+        return [_run_writer(name, forms, paths[name]) for name in formats]
+
+    with ThreadPoolExecutor(max_workers=workers or len(formats)) as executor:
+        # Each writer runs in a copy of this context so an active profiler sees its stage.
+        futures: List[Future[ExportResult]] = [
+            executor.submit(
+                contextvars.copy_context().run, _run_writer, name, forms, paths[name]
+            )
+            for name in formats
+        ]
+        return [future.result() for future in futures]
+
+
+def export_text(
+    text: str,
+    source_format: str,
+    output_dir: Path,
+    stem: str,
+    formats: Sequence[str],
+    metadata: Optional[Mapping[str, str]] = None,
+    workers: Optional[int] = None,
+) -> List[ExportResult]:
+    """Parse ``text`` once and export it to every format in ``formats``."""
+    for name in formats:
+        _format(name)
+    song = load_song(text, source_format)
+    if metadata:
+        song.metadata.update(metadata)
+    return export_song(song, output_dir, stem, formats, workers=workers)
+
+
+__all__ = [
+    "EXPORT_FORMATS",
+    "ExportFormat",
+    "ExportResult",
+    "SharedForms",
+    "build_shared_forms",
+    "export_song",
+    "export_text",
+]
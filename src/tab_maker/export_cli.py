@@ -0,0 +1,107 @@
+"""CLI that parses each song once and writes it in several formats."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from .convert import guess_source_format
+from .export import EXPORT_FORMATS, export_text
+from .profiling import add_profile_argument, profiling, stage
+
+DEFAULT_FORMATS = ("chordpro", "text", "rtf", "docx")
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Parse chord sheets once and write every requested output format.",
+    )
+    parser.add_argument("source", nargs="+", help="Paths to the input chord sheets.")
+    parser.add_argument(
+        "-d",
+        "--output-dir",
+        required=True,
+        help="Directory that receives <name><suffix> for each format.",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        dest="formats",
+        action="append",
+        choices=sorted(EXPORT_FORMATS),
+        help=f"Output format (may repeat). Defaults to {', '.join(DEFAULT_FORMATS)}.",
+    )
+    parser.add_argument(
+        "--from",
+        dest="source_format",
+        choices=("ug", "chordpro"),
+        default=None,
+        help="Input format. Defaults to chordpro for .cho files and ug otherwise.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Writer threads per song. Defaults to one per format.",
+    )
+    add_profile_argument(parser)
+    return parser
+
+
+def _export_all(args: argparse.Namespace) -> int:
+    formats: List[str] = args.formats or list(DEFAULT_FORMATS)
+    output_dir = Path(args.output_dir)
+    failed = 0
+    started = time.perf_counter()
+    for source in args.source:
+        path = Path(source)
+        try:
+            with stage("read"):
+                text = path.read_text(encoding="utf-8")
+            results = export_text(
+                text,
+                args.source_format or guess_source_format(path),
+                output_dir,
+                path.stem,
+                formats,
+                workers=args.jobs,
+            )
+        except Exception as exc:
+            print(f"error: {path}: {type(exc).__name__}: {exc}", file=sys.stderr)
+            failed += 1
+            continue
+        for result in results:
+            if not result.ok:
+                print(f"error: {path} -> {result.format}: {result.error}", file=sys.stderr)
+                failed += 1
+    elapsed = time.perf_counter() - started
+    print(
+        f"Exported {len(args.source)} songs to {len(formats)} formats in {elapsed:.2f}s "
+        f"({failed} failed)",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = build_argument_parser()
+    args = parser.parse_args(list(argv) if argv is not None else None)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    stems = [Path(source).stem for source in args.source]
+    if len(set(stems)) != len(stems):
+        parser.error("sources must have distinct file names; their outputs share one directory")
+
+    if not args.profile:
+        return _export_all(args)
+    with profiling() as profiler:
+        status = _export_all(args)
+    profiler.write_json(args.profile)
+    return status
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
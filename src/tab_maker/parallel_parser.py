@@ -0,0 +1,180 @@
+"""Parse one very large Ultimate Guitar sheet on several cores.
+
+The text is cut into chunks at lines where the serial parser carries no
+state forward: just after a blank line, or just before a section header.
+Both flush a pending chord line. Each chunk is parsed in a process pool, and
+the section lists are joined in order. A chunk that starts mid-section yields
+a leading nameless section, which continues the previous chunk's last section.
+The result is identical to :func:`~tab_maker.parser.parse_song`.
+
+Pickling the parsed dataclasses back costs more than parsing them, so workers
+send each section as flat columns of strings and ints instead. The parent
+rebuilds the objects in bulk with the cyclic garbage collector paused, which
+takes a fraction of a serial parse while workers carry on with later chunks.
+
+    song = parse_song_parallel(Path("anthology.txt").read_text(), workers=8)
+"""
+from __future__ import annotations
+
+import gc
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat, starmap
+from typing import List, Optional, Tuple
+
+from .models import (
+    BlankLine,
+    ChordLyricLine,
+    ChordOnlyLine,
+    ChordPlacement,
+    LyricLine,
+    Section,
+    Song,
+)
+from .parser import _SECTION_HEADER, iter_sections, parse_song
+
+DEFAULT_CHUNK_SIZE = 4 << 20  # characters
+MIN_CHUNK_SIZE = 64 << 10
+
+
+def _is_header(line: str) -> bool:
+    # A line holding another splitlines() break is several lines to the parser.
+    return len(line.splitlines()) <= 1 and _SECTION_HEADER.match(line.strip()) is not None
+
+
+def _next_boundary(text: str, position: int) -> Optional[int]:
+    """Offset of the first safe line start at or after the line holding ``position``."""
+    start = text.rfind("\n", 0, position) + 1
+    while True:
+        end = text.find("\n", start)
+        if end == -1 or end + 1 >= len(text):
+            return None
+        following = end + 1
+        if not text[start:end].strip():
+            return following
+        next_end = text.find("\n", following)
+        if _is_header(text[following:len(text) if next_end == -1 else next_end]):
+            return following
+        start = following
+
+
+def split_points(text: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[int]:
+    """Offsets that cut ``text`` into chunks of roughly ``chunk_size`` characters.
+
+    The first offset is 0 and the last is ``len(text)``.
+    """
+    points = [0]
+    position = chunk_size
+    while position < len(text):
+        boundary = _next_boundary(text, position)
+        if boundary is None:
+            break
+        points.append(boundary)
+        position = boundary + chunk_size
+    points.append(len(text))
+    return points
+
+
+# name, line kinds, lyric texts, chord-lyric texts, their chords, their columns,
+# chords per chord-lyric line, chord-only texts, their chords, chords per line.
+_EncodedSection = Tuple[
+    Optional[str], bytes, List[str], List[str], List[str], List[int], List[int],
+    List[str], List[str], List[int],
+]
+_BLANK, _LYRIC, _CHORD_LYRIC, _CHORD_ONLY = range(4)
+
+
+def _encode_section(section: Section) -> _EncodedSection:
+    kinds = bytearray()
+    lyric_texts: List[str] = []
+    pair_texts: List[str] = []
+    pair_chords: List[str] = []
+    pair_columns: List[int] = []
+    pair_counts: List[int] = []
+    chord_texts: List[str] = []
+    chords: List[str] = []
+    chord_counts: List[int] = []
+    for line in section.lines:
+        kind = type(line)
+        if kind is BlankLine:
+            kinds.append(_BLANK)
+        elif kind is LyricLine:
+            kinds.append(_LYRIC)
+            lyric_texts.append(line.text)
+        elif kind is ChordLyricLine:
+            kinds.append(_CHORD_LYRIC)
+            pair_texts.append(line.lyrics)
+            pair_counts.append(len(line.placements))
+            for placement in line.placements:
+                pair_chords.append(placement.chord)
+                pair_columns.append(placement.column)
+        else:
+            kinds.append(_CHORD_ONLY)
+            chord_texts.append(line.raw_text)
+            chord_counts.append(len(line.chords))
+            chords.extend(line.chords)
+    return (
+        section.name, bytes(kinds), lyric_texts, pair_texts, pair_chords, pair_columns,
+        pair_counts, chord_texts, chords, chord_counts,
+    )
+
+
+def _decode_section(encoded: _EncodedSection) -> Section:
+    (name, kinds, lyric_texts, pair_texts, pair_chords, pair_columns, pair_counts,
+     chord_texts, chords, chord_counts) = encoded
+    placements = iter(list(map(ChordPlacement, pair_chords, pair_columns)))
+    chord_names = iter(chords)
+    # One iterator per line kind, drawn from in the order of ``kinds``.
+    sources = (
+        starmap(BlankLine, repeat((), kinds.count(_BLANK))),
+        map(LyricLine, lyric_texts),
+        map(ChordLyricLine, pair_texts, [list(islice(placements, n)) for n in pair_counts]),
+        map(ChordOnlyLine, [list(islice(chord_names, n)) for n in chord_counts], chord_texts),
+    )
+    return Section(name=name, lines=list(map(next, map(sources.__getitem__, kinds))))
+
+
+def _parse_chunk(chunk: str) -> List[_EncodedSection]:
+    # Runs in a worker process.
+    return [_encode_section(section) for section in iter_sections(chunk)]
+
+
+def parse_song_parallel(
+    text: str,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> Song:
+    """:func:`~tab_maker.parser.parse_song` spread over ``workers`` processes.
+
+    By default each worker gets about four chunks so uneven chunks even out.
+    Text too short to give every worker a chunk of at least
+    :data:`MIN_CHUNK_SIZE` characters is parsed serially.
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = min(DEFAULT_CHUNK_SIZE, max(MIN_CHUNK_SIZE, len(text) // (workers * 4)))
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    points = split_points(text, chunk_size) if workers > 1 else [0, len(text)]
+    if len(points) <= 2:
+        return parse_song(text)
+
+    chunks = (text[start:end] for start, end in zip(points, points[1:]))
+    sections: List[Section] = []
+    collecting = gc.isenabled()
+    with ProcessPoolExecutor(max_workers=min(workers, len(points) - 1)) as pool:
+        for encoded in pool.map(_parse_chunk, chunks):
+            # Millions of new objects would trigger repeated full collections.
+            gc.disable()
+            try:
+                chunk_sections = list(map(_decode_section, encoded))
+            finally:
+                if collecting:
+                    gc.enable()
+            if sections and chunk_sections and chunk_sections[0].name is None:
+                sections[-1].lines.extend(chunk_sections.pop(0).lines)
+            sections.extend(chunk_sections)
+    return Song(sections=sections)
+
+
+__all__ = ["DEFAULT_CHUNK_SIZE", "MIN_CHUNK_SIZE", "parse_song_parallel", "split_points"]
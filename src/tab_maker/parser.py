@@ -3,7 +3,8 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import Iterable, List, Optional
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Union
 
 from .models import (
     BlankLine,
@@ -15,9 +16,26 @@ from .models import (
     Song,
     SongLine,
 )
+from .profiling import count
 
 _SECTION_HEADER = re.compile(r"^\[(?P<name>[^\]]+)\]\s*$")
 _NOISE_TOKENS = {"|", "||", "|:", ":|", "||:", "::"}
+_TOKEN_RE = re.compile(r"\S+")
+# ASCII equivalent of _is_chord_token_reference: a root, then any run of digits,
+# accidentals, slash basses, parenthesised extensions and quality keywords. The
+# run is possessive, like the reference's single greedy pass, so a near miss such
+# as "C111...1x" fails in linear time instead of retrying every split.
+_CHORD_TOKEN_TEMPLATE = (
+    r"(?i:N\.C\.)"
+    r"|[A-G][#b]?(?:[0-9]|[-+#b]|/[A-G][#b]?|\([^){extra}]*\)|mMaj|sus|maj|min|dim|aug|add|m)*+"
+)
+_CHORD_TOKEN_RE = re.compile(_CHORD_TOKEN_TEMPLATE.format(extra=""))
+# Whole-line form used to reject ASCII lyric lines in a single regex call.
+_LINE_TOKEN_PATTERN = (
+    r"(?:\|\||\|:|:\||\|\|:|::|\||" + _CHORD_TOKEN_TEMPLATE.format(extra=r"\s") + r")(?=\s|$)"
+)
+_CHORD_LINE_RE = re.compile(rf"\s*{_LINE_TOKEN_PATTERN}(?:\s+{_LINE_TOKEN_PATTERN})*\s*")
+_CHORD_TOKEN_CACHE_SIZE = 4096
 
 
 @dataclass(slots=True)
@@ -26,7 +44,8 @@ class _PendingChordLine:
     raw_text: str
 
 
-def _is_chord_token(token: str) -> bool:
+def _is_chord_token_reference(token: str) -> bool:
+    """Character-level recognizer; the compiled path defers to it for non-ASCII."""
     token = token.strip()
     if not token:
         return False
@@ -43,7 +62,7 @@ def _is_chord_token(token: str) -> bool:
     if idx < length and token[idx] in "#b":
         idx += 1
 
-    keywords = ("mMaj", "sus", "maj", "min", "dim", "aug", "add", "maj", "m")
+    keywords = ("mMaj", "sus", "maj", "min", "dim", "aug", "add", "m")
 
     while idx < length:
         ch = token[idx]
@@ -84,9 +103,28 @@ def _is_chord_token(token: str) -> bool:
     return True
 
 
+@lru_cache(maxsize=_CHORD_TOKEN_CACHE_SIZE)
+def _is_chord_token(token: str) -> bool:
+    if not token.isascii():
+        return _is_chord_token_reference(token)
+    token = token.strip()
+    if token in _NOISE_TOKENS:
+        return True
+    return _CHORD_TOKEN_RE.fullmatch(token) is not None
+
+
 def _extract_chords(line: str) -> Optional[List[ChordPlacement]]:
     placements: List[ChordPlacement] = []
-    for match in re.finditer(r"\S+", line):
+    if line.isascii():
+        if _CHORD_LINE_RE.fullmatch(line) is None:
+            return None
+        for match in _TOKEN_RE.finditer(line):
+            token = match.group()
+            if token not in _NOISE_TOKENS:
+                placements.append(ChordPlacement(chord=token, column=match.start()))
+        return placements if placements else None
+
+    for match in _TOKEN_RE.finditer(line):
         token = match.group()
         if token in _NOISE_TOKENS:
             continue
@@ -111,25 +149,35 @@ def _flush_pending(
     pending.placements.clear()
 
 
-def parse_song(text: str) -> Song:
-    sections: List[Section] = []
+def _iter_lines(lines: Union[str, Iterable[str]]) -> Iterator[str]:
+    if isinstance(lines, str):
+        yield from lines.splitlines()
+        return
+    for chunk in lines:
+        # Items may carry their own terminators (file objects) or not (lists).
+        yield from chunk.splitlines() or ("",)
+
+
+def iter_sections(lines: Union[str, Iterable[str]]) -> Iterator[Section]:
+    """Yield sections one at a time as each header or the end of input closes them.
+
+    ``lines`` may be a whole sheet, a list of lines or an open text stream, so
+    only the section being built is held in memory.
+    """
     current_section = Section(name=None)
     pending: Optional[_PendingChordLine] = None
+    lyric_lines = 0
 
-    def start_new_section(section_name: str) -> None:
-        nonlocal current_section, pending
-        if pending is not None:
-            _flush_pending(pending, current_section.lines)
-            pending = None
-        if current_section.lines or current_section.name is not None:
-            sections.append(current_section)
-        current_section = Section(name=section_name)
-
-    for raw_line in text.splitlines():
+    for raw_line in _iter_lines(lines):
         line = raw_line.rstrip("\r")
         header_match = _SECTION_HEADER.match(line.strip())
         if header_match:
-            start_new_section(header_match.group("name"))
+            if pending is not None:
+                _flush_pending(pending, current_section.lines)
+                pending = None
+            if current_section.lines or current_section.name is not None:
+                yield current_section
+            current_section = Section(name=header_match.group("name"))
             continue
 
         if not line.strip():
@@ -146,6 +194,7 @@ def parse_song(text: str) -> Song:
             pending = _PendingChordLine(placements=chord_positions, raw_text=line)
             continue
 
+        lyric_lines += 1
         if pending is not None:
             current_section.lines.append(
                 ChordLyricLine(lyrics=line, placements=pending.placements)
@@ -158,9 +207,13 @@ def parse_song(text: str) -> Song:
         _flush_pending(pending, current_section.lines)
 
     if current_section.lines or current_section.name is not None:
-        sections.append(current_section)
+        yield current_section
 
-    return Song(sections=sections)
+    count("lyric_lines", lyric_lines)
+
+
+def parse_song(text: str) -> Song:
+    return Song(sections=list(iter_sections(text)))
 
 
-__all__ = ["parse_song"]
+__all__ = ["iter_sections", "parse_song"]
@@ -0,0 +1,234 @@
+"""Asyncio ingestion pipeline: threaded reads feeding a process pool, then async writes.
+
+:func:`~tab_maker.batch.run_batch` hands whole jobs to worker processes, which then sit idle
+while a slow filesystem serves each read. Here the three stages overlap
+instead. Reads run on a thread pool, up to ``read_concurrency`` at once.
+Conversions (parse plus render) run on a process pool with two jobs in flight
+per worker. Writes go back to threads. Bounded queues between the stages keep
+a fast reader from buffering the whole library in memory.
+
+    summary = asyncio.run(run_pipeline(jobs, "chordpro", "rtf", on_progress=print))
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+from .batch import BatchJob, BatchResult, BatchSummary, _convert_data, _JobOptions
+from .cache import ConversionCache
+from .profiling import profiling
+
+DEFAULT_READ_CONCURRENCY = 32
+DEFAULT_WRITE_CONCURRENCY = 8
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_PROGRESS_INTERVAL = 1.0
+
+
+@dataclass(slots=True)
+class PipelineProgress:
+    """Counts of jobs through each stage, passed to ``on_progress`` callbacks."""
+
+    total: int
+    read: int = 0
+    converted: int = 0
+    written: int = 0
+    failed: int = 0
+    bytes_read: int = 0
+    lines: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def done(self) -> int:
+        return self.written + self.failed
+
+    @property
+    def files_per_second(self) -> float:
+        return self.done / max(self.elapsed, 1e-9)
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / max(self.elapsed, 1e-9)
+
+    def format(self) -> str:
+        return (
+            f"{self.done}/{self.total} files ({self.failed} failed; {self.read} read, "
+            f"{self.converted} converted) {self.files_per_second:.1f} files/s, "
+            f"{self.lines_per_second:.0f} lines/s, "
+            f"{self.bytes_read / max(self.elapsed, 1e-9) / 1e6:.1f} MB/s read"
+        )
+
+
+def _convert_payload(
+    payload: Tuple[bytes, _JobOptions],
+) -> Tuple[str, Optional[bool], Optional[Dict[str, object]]]:
+    # Runs in a worker process.
+    data, options = payload
+    if not options.profile:
+        return (*_convert_data(data, options), None)
+    with profiling() as profiler:
+        output_text, cached = _convert_data(data, options)
+    return output_text, cached, profiler.as_dict()
+
+
+def _write_output(destination: Path, text: str) -> None:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    destination.write_text(text, encoding="utf-8")
+
+
+def _error(exc: BaseException) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+
+async def run_pipeline(
+    jobs: Sequence[BatchJob],
+    source_format: str,
+    target_format: str,
+    metadata: Optional[Dict[str, str]] = None,
+    workers: Optional[int] = None,
+    read_concurrency: int = DEFAULT_READ_CONCURRENCY,
+    write_concurrency: int = DEFAULT_WRITE_CONCURRENCY,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    on_result: Optional[Callable[[BatchResult], None]] = None,
+    on_progress: Optional[Callable[[PipelineProgress], None]] = None,
+    progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+    cache: Optional[ConversionCache] = None,
+    profile: bool = False,
+    transpose: int = 0,
+    prefer_flats: Optional[bool] = None,
+) -> BatchSummary:
+    """Convert every job through the read, convert and write stages concurrently.
+
+    Takes the same conversion options as :func:`~tab_maker.batch.run_batch`.
+    With ``workers`` of 1, conversions run on a single thread instead of a
+    process pool. Failures are captured per file, and results are listed in
+    completion order. ``on_progress`` gets a snapshot every
+    ``progress_interval`` seconds and once at the end.
+    """
+    if min(read_concurrency, write_concurrency, queue_size) < 1:
+        raise ValueError("concurrency limits and queue size must be at least 1")
+    loop = asyncio.get_running_loop()
+    options = _JobOptions(
+        source_format=source_format,
+        target_format=target_format,
+        metadata=metadata,
+        cache_spec=None if cache is None else (str(cache.directory), cache.max_bytes),
+        profile=profile,
+        transpose=transpose,
+        prefer_flats=prefer_flats,
+    )
+    workers = workers or os.cpu_count() or 1
+    summary = BatchSummary()
+    progress = PipelineProgress(total=len(jobs))
+    started = time.perf_counter()
+    pending = iter(jobs)
+    converting: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    writing: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def finish(result: BatchResult) -> None:
+        summary.results.append(result)
+        if result.ok:
+            progress.written += 1
+        else:
+            progress.failed += 1
+        if on_result is not None:
+            on_result(result)
+
+    def snapshot() -> None:
+        if on_progress is not None:
+            on_progress(replace(progress, elapsed=time.perf_counter() - started))
+
+    async def read_stage() -> None:
+        # Every reader pulls from the same iterator, so at most
+        # read_concurrency reads are outstanding.
+        for job in pending:
+            try:
+                data = await loop.run_in_executor(io_pool, job.source.read_bytes)
+            except OSError as exc:
+                finish(BatchResult(job.source, job.destination, error=_error(exc)))
+                continue
+            progress.read += 1
+            progress.bytes_read += len(data)
+            await converting.put((job, data))
+
+    async def convert_stage() -> None:
+        while (item := await converting.get()) is not None:
+            job, data = item
+            try:
+                output_text, cached, stats = await loop.run_in_executor(
+                    cpu_pool, _convert_payload, (data, options)
+                )
+            except Exception as exc:
+                finish(BatchResult(job.source, job.destination, error=_error(exc)))
+                continue
+            progress.converted += 1
+            lines = data.count(b"\n") + 1
+            result = BatchResult(job.source, job.destination, lines=lines, cached=cached,
+                                 profile=stats)
+            await writing.put((result, output_text))
+
+    async def write_stage() -> None:
+        while (item := await writing.get()) is not None:
+            result, output_text = item
+            try:
+                await loop.run_in_executor(io_pool, _write_output, result.destination,
+                                           output_text)
+            except OSError as exc:
+                result.error = _error(exc)
+                result.lines = 0
+            else:
+                progress.lines += result.lines
+            finish(result)
+
+    async def report() -> None:
+        while True:
+            await asyncio.sleep(progress_interval)
+            snapshot()
+
+    async def run_stage(
+        count: int,
+        stage: Callable[[], Awaitable[None]],
+        queue: Optional[asyncio.Queue] = None,
+        consumers: int = 0,
+    ) -> None:
+        # When every task of a stage is done, send each consumer a sentinel.
+        await asyncio.gather(*(stage() for _ in range(count)))
+        for _ in range(consumers):
+            await queue.put(None)
+
+    converters = workers * 2
+    io_pool = ThreadPoolExecutor(max_workers=read_concurrency + write_concurrency)
+    cpu_pool: Executor = (
+        ThreadPoolExecutor(max_workers=1) if workers == 1
+        else ProcessPoolExecutor(max_workers=workers)
+    )
+    tasks = [
+        asyncio.ensure_future(run_stage(read_concurrency, read_stage, converting, converters)),
+        asyncio.ensure_future(run_stage(converters, convert_stage, writing, write_concurrency)),
+        asyncio.ensure_future(run_stage(write_concurrency, write_stage)),
+    ]
+    if on_progress is not None:
+        tasks.append(asyncio.ensure_future(report()))
+    try:
+        await asyncio.gather(*tasks[:3])
+    finally:
+        for task in tasks:
+            task.cancel()
+        io_pool.shutdown(wait=False, cancel_futures=True)
+        cpu_pool.shutdown(wait=False, cancel_futures=True)
+    summary.elapsed = time.perf_counter() - started
+    snapshot()
+    return summary
+
+
+__all__ = [
+    "DEFAULT_QUEUE_SIZE",
+    "DEFAULT_READ_CONCURRENCY",
+    "DEFAULT_WRITE_CONCURRENCY",
+    "PipelineProgress",
+    "run_pipeline",
+]
@@ -0,0 +1,172 @@
+"""Opt-in per-stage instrumentation for conversions.
+
+Library code wraps its stages in :func:`stage` and reports counters through
+:func:`count`. Both are no-ops unless a :class:`Profiler` has been activated
+with :func:`profiling`, so the cost with no collector attached is one context
+variable lookup per stage.
+
+    with profiling() as profiler:
+        convert_text(text, "chordpro", "rtf")
+    print(profiler.as_dict())
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, ContextManager, Dict, Iterator, Mapping, Optional
+
+from .models import ChordLyricLine, ChordOnlyLine, Song
+
+StageCallback = Callable[[str, float, int], None]
+
+_NULL_STAGE: ContextManager[None] = nullcontext()
+_active: ContextVar[Optional["Profiler"]] = ContextVar("tab_maker_profiler", default=None)
+
+
+@dataclass(slots=True)
+class StageStats:
+    calls: int = 0
+    seconds: float = 0.0
+    # Net change in CPython's allocated memory blocks across the stage.
+    allocated_blocks: int = 0
+
+
+class Profiler:
+    """Collects wall time and allocation counts per stage plus named counters.
+
+    ``callback`` is invoked as ``callback(stage, seconds, allocated_blocks)``
+    each time a stage finishes.
+    """
+
+    def __init__(self, callback: Optional[StageCallback] = None) -> None:
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.callback = callback
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        blocks = sys.getallocatedblocks()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            allocated = sys.getallocatedblocks() - blocks
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.allocated_blocks += allocated
+            if self.callback is not None:
+                self.callback(name, seconds, allocated)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, data: Mapping[str, Any]) -> None:
+        """Add the stages and counters of another profiler's :meth:`as_dict`."""
+        for name, values in data.get("stages", {}).items():
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.calls += values["calls"]
+            stats.seconds += values["seconds"]
+            stats.allocated_blocks += values["allocated_blocks"]
+        for name, amount in data.get("counters", {}).items():
+            self.count(name, amount)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stages": {
+                name: {
+                    "calls": stats.calls,
+                    "seconds": stats.seconds,
+                    "allocated_blocks": stats.allocated_blocks,
+                }
+                for name, stats in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def write_json(self, destination: str) -> None:
+        """Write :meth:`as_dict` as JSON to ``destination`` (``-`` for stderr)."""
+        text = json.dumps(self.as_dict(), indent=2) + "\n"
+        if destination == "-":
+            sys.stderr.write(text)
+        else:
+            with open(destination, "w", encoding="utf-8") as handle:
+                handle.write(text)
+
+
+@contextmanager
+def profiling(profiler: Optional[Profiler] = None) -> Iterator[Profiler]:
+    """Activate ``profiler`` (or a new one) for the current context."""
+    profiler = profiler if profiler is not None else Profiler()
+    token = _active.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _active.reset(token)
+
+
+def active_profiler() -> Optional[Profiler]:
+    return _active.get()
+
+
+def stage(name: str) -> ContextManager[None]:
+    profiler = _active.get()
+    if profiler is None:
+        return _NULL_STAGE
+    return profiler.stage(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    profiler = _active.get()
+    if profiler is not None:
+        profiler.count(name, amount)
+
+
+def count_song(song: Song) -> None:
+    """Record line, section and chord placement counters for a parsed song."""
+    profiler = _active.get()
+    if profiler is None:
+        return
+    lines = 0
+    placements = 0
+    for section in song.sections:
+        lines += len(section.lines)
+        for entry in section.lines:
+            if isinstance(entry, ChordLyricLine):
+                placements += len(entry.placements)
+            elif isinstance(entry, ChordOnlyLine):
+                placements += len(entry.chords)
+    profiler.count("songs")
+    profiler.count("sections", len(song.sections))
+    profiler.count("lines", lines)
+    profiler.count("chord_placements", placements)
+
+
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Write per-stage timings and counters as JSON to PATH ('-' for stderr).",
+    )
+
+
+__all__ = [
+    "Profiler",
+    "StageStats",
+    "active_profiler",
+    "add_profile_argument",
+    "count",
+    "count_song",
+    "profiling",
+    "stage",
+]
@@ -0,0 +1,91 @@
+"""CLI to build and query the chord-progression index of a song library."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Iterable, Optional
+
+from .progressions import DEFAULT_PATTERNS, ProgressionIndex, build_progression_index
+
+DEFAULT_INDEX = "tab_maker_progressions.idx"
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Find songs by key-independent chord progressions such as I-V-vi-IV.",
+    )
+    parser.add_argument(
+        "--index",
+        default=DEFAULT_INDEX,
+        help=f"Progression index file (default: {DEFAULT_INDEX}).",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Rebuild the index from a library.")
+    build.add_argument("source", nargs="+", help="Song files, directories or glob patterns.")
+    build.add_argument(
+        "--pattern",
+        action="append",
+        default=None,
+        help="Glob used when a source is a directory; repeatable "
+        f"(default: {' and '.join(DEFAULT_PATTERNS)}).",
+    )
+
+    query = commands.add_parser("query", help="Search for a progression.")
+    query.add_argument("progression", help='Roman numerals, e.g. "I-V-vi-IV" or "ii V I".')
+    query.add_argument("--section", help="Only sections whose name contains this, e.g. chorus.")
+    query.add_argument("-n", "--limit", type=int, default=20, help="Maximum hits (default: 20).")
+    query.add_argument(
+        "--similar",
+        type=float,
+        metavar="FRACTION",
+        default=1.0,
+        help="Also return sections sharing this fraction of the query's n-grams "
+        "(default: 1.0, exact matches only).",
+    )
+    return parser
+
+
+def _build(args: argparse.Namespace) -> int:
+    stats = build_progression_index(args.source, args.index, args.pattern or DEFAULT_PATTERNS)
+    for path, error in stats.failed:
+        print(f"error: {path}: {error}", file=sys.stderr)
+    print(stats.format(), file=sys.stderr)
+    return 1 if stats.failed else 0
+
+
+def _query(args: argparse.Namespace) -> int:
+    with ProgressionIndex(args.index) as index:
+        started = time.perf_counter()
+        hits = index.search(
+            args.progression, section=args.section, limit=args.limit,
+            min_similarity=args.similar,
+        )
+        elapsed = time.perf_counter() - started
+        for hit in hits:
+            title = f"  ({hit.title})" if hit.title else ""
+            print(f"{hit.score:5.2f}  {hit.path}{title}")
+            section = hit.section_name or f"section {hit.section + 1}"
+            print(f"       {section} in {hit.key}: {hit.progression}")
+    print(f"{len(hits)} hits in {elapsed * 1000:.1f}ms", file=sys.stderr)
+    return 0 if hits else 1
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = build_argument_parser()
+    args = parser.parse_args(list(argv) if argv is not None else None)
+    if args.command == "query" and not 0.0 < args.similar <= 1.0:
+        parser.error("--similar must be in (0, 1]")
+
+    try:
+        if args.command == "build":
+            return _build(args)
+        return _query(args)
+    except Exception as exc:  # pragma: no cover - best effort CLI guard
+        parser.error(str(exc))
+        return 2
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
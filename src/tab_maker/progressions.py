@@ -0,0 +1,541 @@
+"""Key-normalized chord-progression index for finding songs by their harmony.
+
+Every chord is reduced to a scale degree and a triad quality relative to the
+song's key (the ``key`` metadata, or a key inferred from the chords), so that
+``G D Em C`` in G and ``C G Am F`` in C both read ``I V vi IV``. Minor keys
+are read from their relative major, which makes ``Am F C G`` in A minor
+``vi IV I V`` as well.
+
+Each section's chords form one degree sequence, with repeated chords
+collapsed. The index file stores those sequences and, for every n-gram of up
+to :data:`MAX_GRAM` degrees, a sorted postings list of the sections that
+contain it. The file is memory-mapped and searched in place:
+
+* header ``<4sHHIIIIIII``: magic, version, max gram, then the file, section,
+  gram, posting and string counts and the sequence and string byte sizes;
+* files, 3 ``u32`` each: path, title and key string ids;
+* sections, 5 ``u32`` each: file, section number, name string id, sequence
+  offset and sequence length;
+* sorted gram keys, gram posting offsets and the postings themselves;
+* string offsets, then the sequence bytes and UTF-8 string bytes.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .batch import collect_sources
+from .convert import guess_source_format
+from .models import ChordLyricLine, ChordOnlyLine, Song
+from .spans import SPAN_PARSERS
+from .transpose import (
+    _CHORD_RE,
+    _FLAT_MAJOR_KEYS,
+    _FLAT_NAMES,
+    _MINOR_KEY_RE,
+    _PITCH_CLASS,
+    _SHARP_NAMES,
+)
+
+FORMAT_MAGIC = b"TMPI"
+FORMAT_VERSION = 1
+MAX_GRAM = 4
+DEFAULT_PATTERNS = ("*.cho", "*.txt")
+
+QUALITY_MAJOR = 0
+QUALITY_MINOR = 1
+QUALITY_DIMINISHED = 2
+
+_HEADER = struct.Struct("<4sHHIIIIIII")
+_GRAM_BASE = 37  # degree codes are 0-35; 0 is kept free to separate gram lengths
+_NUMERALS = ("I", "bII", "II", "bIII", "III", "IV", "#IV", "V", "bVI", "VI", "bVII", "VII")
+_NUMERAL_INTERVALS = {"I": 0, "II": 2, "III": 4, "IV": 5, "V": 7, "VI": 9, "VII": 11}
+_DEGREE_RE = re.compile(
+    r"(?P<accidental>[b#♭♯]?)(?P<numeral>[IViv]+)(?P<quality>°|o|dim|m)?"
+)
+_SEPARATOR_RE = re.compile(r"[\s,\-–—|>]+")
+_DIMINISHED_RE = re.compile(r"dim|°|ø|m7b5|m7♭5")
+# Quality of the triad on each degree of the major scale.
+_DIATONIC = {
+    0: QUALITY_MAJOR,
+    2: QUALITY_MINOR,
+    4: QUALITY_MINOR,
+    5: QUALITY_MAJOR,
+    7: QUALITY_MAJOR,
+    9: QUALITY_MINOR,
+    11: QUALITY_DIMINISHED,
+}
+
+
+def _native_u32(values: Iterable[int]) -> bytes:
+    data = array("I", values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+
+def _u32_view(buffer: memoryview) -> Sequence[int]:
+    if sys.byteorder == "little":
+        return buffer.cast("I")
+    data = array("I", buffer.tobytes())
+    data.byteswap()
+    return data
+
+
+@lru_cache(maxsize=8192)
+def chord_degree(chord: str) -> Optional[Tuple[int, int]]:
+    """Return ``(pitch class, quality)`` of ``chord``'s root, or ``None`` for non-chords."""
+    match = _CHORD_RE.fullmatch(chord)
+    if match is None:
+        return None
+    suffix = match.group("suffix")
+    if _DIMINISHED_RE.match(suffix):
+        quality = QUALITY_DIMINISHED
+    elif _MINOR_KEY_RE.match(suffix):
+        quality = QUALITY_MINOR
+    else:
+        quality = QUALITY_MAJOR
+    return _PITCH_CLASS[match.group("root")], quality
+
+
+def key_tonic(key: str) -> Optional[int]:
+    """Return the pitch class of the major tonic ``key`` is read from (``"Am"`` gives C)."""
+    match = _CHORD_RE.fullmatch(key.strip())
+    if match is None:
+        return None
+    minor = _MINOR_KEY_RE.match(match.group("suffix")) is not None
+    return (_PITCH_CLASS[match.group("root")] + (3 if minor else 0)) % 12
+
+
+def infer_tonic(chords: Sequence[Tuple[int, int]]) -> Optional[int]:
+    """Return the major tonic whose diatonic triads best cover ``chords``.
+
+    Ties go to the key whose tonic (or relative minor) opens or closes the song.
+    """
+    if not chords:
+        return None
+    counts = Counter(chords)
+    anchors = {chords[0], chords[-1]}
+
+    def fit(tonic: int) -> Tuple[int, int]:
+        score = sum(
+            count
+            for (root, quality), count in counts.items()
+            if _DIATONIC.get((root - tonic) % 12) == quality
+        )
+        relative_minor = ((tonic + 9) % 12, QUALITY_MINOR)
+        return score, (tonic, QUALITY_MAJOR) in anchors or relative_minor in anchors
+
+    return max(range(12), key=fit)
+
+
+def key_name(tonic: int) -> str:
+    """Spell a major tonic pitch class the way its key signature does."""
+    return (_FLAT_NAMES if tonic in _FLAT_MAJOR_KEYS else _SHARP_NAMES)[tonic]
+
+
+def degree_code(root: int, quality: int, tonic: int) -> int:
+    """Return the 0-35 code of a chord relative to ``tonic``."""
+    return ((root - tonic) % 12) * 3 + quality
+
+
+def format_degree(code: int) -> str:
+    """Render a degree code as a Roman numeral: upper case major, lower minor, ``°`` dim."""
+    interval, quality = divmod(code, 3)
+    numeral = _NUMERALS[interval]
+    if quality == QUALITY_MAJOR:
+        return numeral
+    accidental = numeral[0] if numeral[0] in "b#" else ""
+    lowered = accidental + numeral[len(accidental):].lower()
+    return lowered + "°" if quality == QUALITY_DIMINISHED else lowered
+
+
+def format_progression(codes: Iterable[int]) -> str:
+    return "-".join(format_degree(code) for code in codes)
+
+
+def parse_progression(query: str) -> List[int]:
+    """Parse Roman numerals such as ``"I-V-vi-IV"`` or ``"ii V I"`` into degree codes.
+
+    Case gives the quality; ``°``, ``o`` or ``dim`` marks a diminished chord,
+    and ``b``/``#`` prefixes lower or raise the degree.
+    """
+    codes: List[int] = []
+    for token in _SEPARATOR_RE.split(query.strip()):
+        if not token:
+            continue
+        match = _DEGREE_RE.fullmatch(token)
+        numeral = match.group("numeral") if match else ""
+        interval = _NUMERAL_INTERVALS.get(numeral.upper())
+        if interval is None or not (numeral.isupper() or numeral.islower()):
+            raise ValueError(f"Not a scale degree: {token!r}")
+        interval += {"": 0, "b": -1, "♭": -1, "#": 1, "♯": 1}[match.group("accidental")]
+        marker = match.group("quality")
+        if marker in ("°", "o", "dim"):
+            quality = QUALITY_DIMINISHED
+        elif numeral.islower() or marker == "m":
+            quality = QUALITY_MINOR
+        else:
+            quality = QUALITY_MAJOR
+        codes.append((interval % 12) * 3 + quality)
+    if not codes:
+        raise ValueError("Empty progression")
+    return codes
+
+
+def gram_key(codes: Sequence[int]) -> int:
+    key = 0
+    for code in codes:
+        key = key * _GRAM_BASE + code + 1
+    return key
+
+
+def _section_roots(song: Song) -> List[List[Tuple[int, int]]]:
+    sections: List[List[Tuple[int, int]]] = []
+    for section in song.sections:
+        roots: List[Tuple[int, int]] = []
+        for entry in section.lines:
+            if isinstance(entry, ChordLyricLine):
+                chords: Iterable[str] = (placement.chord for placement in entry.placements)
+            elif isinstance(entry, ChordOnlyLine):
+                chords = entry.chords
+            else:
+                continue
+            for chord in chords:
+                degree = chord_degree(chord)
+                if degree is not None:
+                    roots.append(degree)
+        sections.append(roots)
+    return sections
+
+
+def song_progressions(song: Song) -> Tuple[Optional[int], bool, List[bytes]]:
+    """Return the song's tonic, whether it was inferred, and each section's degree codes.
+
+    Consecutive repeats of a degree are collapsed. Songs without chords have
+    no tonic and empty sequences.
+    """
+    sections = _section_roots(song)
+    key = song.metadata.get("key")
+    tonic = key_tonic(key) if key else None
+    inferred = tonic is None
+    if tonic is None:
+        tonic = infer_tonic([degree for roots in sections for degree in roots])
+    sequences: List[bytes] = []
+    for roots in sections:
+        codes = bytearray()
+        if tonic is not None:
+            for root, quality in roots:
+                code = degree_code(root, quality, tonic)
+                if not codes or codes[-1] != code:
+                    codes.append(code)
+        sequences.append(bytes(codes))
+    return tonic, inferred, sequences
+
+
+@dataclass(slots=True)
+class ProgressionBuildStats:
+    songs: int = 0
+    sections: int = 0
+    grams: int = 0
+    postings: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def format(self) -> str:
+        return (
+            f"Indexed {self.songs} songs, {self.sections} sections, {self.grams} n-grams "
+            f"({self.postings} postings) in {self.seconds:.2f}s; {len(self.failed)} failed"
+        )
+
+
+class _Strings:
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.offsets = [0]
+        self.data = bytearray()
+
+    def add(self, text: str) -> int:
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.offsets) - 1
+            self.data += text.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return string_id
+
+
+def build_progression_index(
+    sources: Iterable[str],
+    destination: Union[str, Path],
+    patterns: Sequence[str] = DEFAULT_PATTERNS,
+) -> ProgressionBuildStats:
+    """Parse every song under ``sources`` and write a progression index to ``destination``."""
+    started = time.perf_counter()
+    stats = ProgressionBuildStats()
+    sources = list(sources)
+    paths: Dict[str, Path] = {}
+    for pattern in patterns:
+        for path, _relative in collect_sources(sources, pattern):
+            paths.setdefault(str(path), path)
+
+    strings = _Strings()
+    files: List[int] = []
+    sections: List[int] = []
+    sequences = bytearray()
+    postings: Dict[int, List[int]] = {}
+    for key, path in paths.items():
+        try:
+            # Only chords are read, so lyric text is never copied out of the file.
+            song = SPAN_PARSERS[guess_source_format(path)](path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError, ValueError) as exc:
+            stats.failed.append((key, f"{type(exc).__name__}: {exc}"))
+            continue
+        tonic, inferred, codes_by_section = song_progressions(song)
+        label = "" if tonic is None else key_name(tonic) + (" (inferred)" if inferred else "")
+        file_index = len(files) // 3
+        files += [strings.add(key), strings.add(song.metadata.get("title", "")),
+                  strings.add(label)]
+        stats.songs += 1
+        for number, codes in enumerate(codes_by_section):
+            if not codes:
+                continue
+            section_index = len(sections) // 5
+            name = song.sections[number].name or ""
+            sections += [file_index, number, strings.add(name), len(sequences), len(codes)]
+            sequences += codes
+            grams = {
+                gram_key(codes[start:start + size])
+                for size in range(1, MAX_GRAM + 1)
+                for start in range(len(codes) - size + 1)
+            }
+            for gram in grams:
+                postings.setdefault(gram, []).append(section_index)
+
+    gram_keys = sorted(postings)
+    offsets = [0]
+    for gram in gram_keys:
+        offsets.append(offsets[-1] + len(postings[gram]))
+    stats.sections = len(sections) // 5
+    stats.grams = len(gram_keys)
+    stats.postings = offsets[-1]
+
+    sequences += bytes(-len(sequences) % 4)
+    header = _HEADER.pack(
+        FORMAT_MAGIC, FORMAT_VERSION, MAX_GRAM, len(files) // 3, stats.sections,
+        stats.grams, stats.postings, len(strings.offsets) - 1, len(sequences),
+        len(strings.data),
+    )
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=destination.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(header)
+            handle.write(_native_u32(files))
+            handle.write(_native_u32(sections))
+            handle.write(_native_u32(gram_keys))
+            handle.write(_native_u32(offsets))
+            for gram in gram_keys:
+                handle.write(_native_u32(postings[gram]))
+            handle.write(_native_u32(strings.offsets))
+            handle.write(sequences)
+            handle.write(strings.data)
+        os.replace(temp_name, destination)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+@dataclass(slots=True)
+class ProgressionHit:
+    path: str
+    title: str
+    key: str
+    section: int
+    section_name: str
+    progression: str
+    score: float
+    occurrences: int
+
+    @property
+    def exact(self) -> bool:
+        return self.occurrences > 0
+
+
+class ProgressionIndex:
+    """Read-only, memory-mapped view of an index written by :func:`build_progression_index`."""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if len(view) < _HEADER.size:
+            raise ValueError(f"{self.path} is not a progression index")
+        (magic, version, self.max_gram, file_count, section_count, gram_count,
+         posting_count, string_count, sequence_size, string_size) = _HEADER.unpack_from(view)
+        if magic != FORMAT_MAGIC:
+            raise ValueError(f"{self.path} is not a progression index")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported progression index version {version} in {self.path}")
+
+        offset = _HEADER.size
+
+        def take(count: int) -> Sequence[int]:
+            nonlocal offset
+            block = _u32_view(view[offset:offset + count * 4])
+            offset += count * 4
+            return block
+
+        self._files = take(file_count * 3)
+        self._sections = take(section_count * 5)
+        self._gram_keys = take(gram_count)
+        self._gram_offsets = take(gram_count + 1)
+        self._postings = take(posting_count)
+        self._string_offsets = take(string_count + 1)
+        self._sequences = view[offset:offset + sequence_size]
+        offset += sequence_size
+        self._strings = view[offset:offset + string_size]
+        self.section_count = section_count
+        self.song_count = file_count
+
+    def close(self) -> None:
+        for name in ("_files", "_sections", "_gram_keys", "_gram_offsets", "_postings",
+                     "_string_offsets", "_sequences", "_strings"):
+            block = getattr(self, name)
+            if isinstance(block, memoryview):
+                block.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "ProgressionIndex":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _string(self, string_id: int) -> str:
+        start, end = self._string_offsets[string_id], self._string_offsets[string_id + 1]
+        return bytes(self._strings[start:end]).decode("utf-8")
+
+    def _sequence(self, section: int) -> bytes:
+        start = self._sections[section * 5 + 3]
+        return bytes(self._sequences[start:start + self._sections[section * 5 + 4]])
+
+    def postings(self, codes: Sequence[int]) -> Sequence[int]:
+        """Return the sorted ids of sections containing the gram ``codes``."""
+        key = gram_key(codes)
+        position = bisect_left(self._gram_keys, key)
+        if position == len(self._gram_keys) or self._gram_keys[position] != key:
+            return ()
+        return self._postings[self._gram_offsets[position]:self._gram_offsets[position + 1]]
+
+    def search(
+        self,
+        progression: Union[str, Sequence[int]],
+        section: Optional[str] = None,
+        limit: int = 20,
+        min_similarity: float = 1.0,
+    ) -> List[ProgressionHit]:
+        """Return the sections best matching ``progression``, best first.
+
+        Sections containing the whole progression score above 1, more so the
+        more of the section it covers. With ``min_similarity`` below 1,
+        sections sharing at least that fraction of the query's n-grams are
+        returned too, scored by the fraction. ``section`` keeps only sections
+        whose name contains it, ignoring case. Repeated degrees are collapsed
+        as in the index, so ``I-I-V`` finds the same sections as ``I-V``.
+        """
+        if isinstance(progression, str):
+            progression = parse_progression(progression)
+        # Stored sequences collapse repeated chords, so the query must too.
+        codes = [code for position, code in enumerate(progression)
+                 if position == 0 or progression[position - 1] != code]
+        size = min(len(codes), self.max_gram)
+        grams = list(dict.fromkeys(
+            tuple(codes[start:start + size]) for start in range(len(codes) - size + 1)
+        ))
+        if min_similarity >= 1.0:
+            # Exact search: intersect postings, rarest first.
+            lists = sorted((self.postings(gram) for gram in grams), key=len)
+            candidates = set(lists[0])
+            for postings in lists[1:]:
+                if not candidates:
+                    break
+                candidates.intersection_update(postings)
+            shared = {candidate: len(grams) for candidate in candidates}
+        else:
+            counts: Counter = Counter()
+            for gram in grams:
+                counts.update(self.postings(gram))
+            needed = min_similarity * len(grams)
+            shared = {candidate: hits for candidate, hits in counts.items() if hits >= needed}
+
+        wanted = section.casefold() if section else None
+        needle = bytes(codes)
+        scored: List[Tuple[float, int, int]] = []
+        for candidate, hits in shared.items():
+            if wanted is not None:
+                name = self._string(self._sections[candidate * 5 + 2])
+                if wanted not in name.casefold():
+                    continue
+            occurrences = self._sequence(candidate).count(needle) if hits == len(grams) else 0
+            if occurrences:
+                length = self._sections[candidate * 5 + 4]
+                score = 1.0 + min(1.0, occurrences * len(codes) / length)
+            elif min_similarity >= 1.0:
+                continue
+            else:
+                score = hits / len(grams)
+            scored.append((score, candidate, occurrences))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [self._hit(candidate, score, occurrences)
+                for score, candidate, occurrences in scored[:limit]]
+
+    def _hit(self, section: int, score: float, occurrences: int) -> ProgressionHit:
+        file_index, number, name_id = self._sections[section * 5:section * 5 + 3]
+        path_id, title_id, key_id = self._files[file_index * 3:file_index * 3 + 3]
+        return ProgressionHit(
+            path=self._string(path_id),
+            title=self._string(title_id),
+            key=self._string(key_id),
+            section=number,
+            section_name=self._string(name_id),
+            progression=format_progression(self._sequence(section)),
+            score=score,
+            occurrences=occurrences,
+        )
+
+
+__all__ = [
+    "FORMAT_VERSION",
+    "MAX_GRAM",
+    "ProgressionBuildStats",
+    "ProgressionHit",
+    "ProgressionIndex",
+    "build_progression_index",
+    "chord_degree",
+    "format_degree",
+    "format_progression",
+    "infer_tonic",
+    "key_name",
+    "key_tonic",
+    "parse_progression",
+    "song_progressions",
+]
@@ -1,7 +1,9 @@
 """RTF export for Tab-Maker songs."""
 from __future__ import annotations
 
-from typing import Iterable, List, Sequence
+from functools import lru_cache
+from itertools import chain
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO
 
 from .chord_layout import RenderSegment
 from .models import Song
@@ -9,123 +11,196 @@ from .text import song_to_plain_lines
 
 _RTF_HEADER = r"{\rtf1\ansi\deff0{\fonttbl{\f0 Courier New;}}\viewkind4\uc1\pard\f0\fs22 "
 _RTF_FOOTER = "}"
+_ESCAPE_CACHE_SIZE = 4096
+
+
+class _RtfEscapes(dict):
+    """``str.translate`` table mapping code points to RTF; fills in non-ASCII on first use.
+
+    Characters outside ASCII become ``\\uN?`` with ``N`` a signed 16-bit value
+    and ``?`` the fallback for readers ignoring ``\\uc1``. Characters beyond
+    the BMP become a UTF-16 surrogate pair.
+    """
+
+    def __missing__(self, code: int) -> str:
+        if code > 0xFFFF:
+            offset = code - 0x10000
+            high, low = 0xD800 | offset >> 10, 0xDC00 | offset & 0x3FF
+            value = _unicode_escape(high) + _unicode_escape(low)
+        else:
+            value = _unicode_escape(code)
+        self[code] = value
+        return value
+
+
+def _unicode_escape(code: int) -> str:
+    return f"\\u{code - 0x10000 if code > 0x7FFF else code}?"
+
+
+_RTF_ESCAPES = _RtfEscapes({code: chr(code) for code in range(0x20, 0x7F)})
+_RTF_ESCAPES.update({code: f"\\'{code:02x}" for code in (*range(0x20), 0x7F)})
+_RTF_ESCAPES.update({ord("\\"): "\\\\", ord("{"): r"\{", ord("}"): r"\}", ord("\t"): r"\tab "})
+
+
+@lru_cache(maxsize=_ESCAPE_CACHE_SIZE)
+def _translate_rtf(text: str) -> str:
+    return text.translate(_RTF_ESCAPES)
 
 
 def _escape_rtf(text: str) -> str:
-    return text.replace("\\", "\\\\").replace("{", r"\{").replace("}", r"\}")
+    # Most lines are plain printable ASCII and are returned as they are. A
+    # cache in front of these would miss too often to pay for itself.
+    if text.isascii() and "\\" not in text and "{" not in text and "}" not in text:
+        if text.isprintable():
+            return text
+    return _translate_rtf(text)
 
 
-def lines_to_rtf(lines: Iterable[str]) -> str:
-    rtf_parts: List[str] = [_RTF_HEADER]
+# Bytes that plain text may not contain: controls, DEL and RTF specials.
+_UNSAFE_BYTES = bytes(range(0x20)) + b"\x7f\\{}"
+
+
+def _escaper_for(texts: List[str]) -> Callable[[str], str]:
+    """Return :func:`_escape_rtf`, or ``str`` when none of ``texts`` needs escaping.
+
+    One scan over the whole document is cheaper than checking line by line.
+    """
+    joined = " ".join(texts)
+    if joined.isascii():
+        data = joined.encode("ascii")
+        if len(data.translate(None, _UNSAFE_BYTES)) == len(data):
+            return str
+    return _escape_rtf
+
+
+def _iter_line_parts(
+    lines: Iterable[str],
+    escape: Callable[[str], str] = _escape_rtf,
+) -> Iterator[str]:
     empty = True
     for line in lines:
         empty = False
         if line:
-            rtf_parts.append(f"{_escape_rtf(line)}\\par")
+            yield f"{escape(line)}\\par"
         else:
-            rtf_parts.append("\\par")
+            yield "\\par"
     if empty:
-        rtf_parts.append("\\par")
-    rtf_parts.append(_RTF_FOOTER)
-    return "\n".join(rtf_parts)
+        yield "\\par"
 
 
-def segments_to_rtf(segments: Sequence[RenderSegment]) -> str:
-    """Render annotated two-line segments to RTF with chord formatting."""
-    parts: List[str] = [_RTF_HEADER]
+def _iter_segment_parts(
+    segments: Iterable[RenderSegment],
+    escape: Callable[[str], str] = _escape_rtf,
+) -> Iterator[str]:
+    """Yield the RTF body parts for ``segments`` with one segment of look-ahead.
+
+    Only the leading run of metadata segments is buffered, so the title block
+    can be emitted before the body. ``escape`` is applied to every text.
+    """
+    iterator = iter(segments)
+    leading: List[RenderSegment] = []
+    first_body: Optional[RenderSegment] = None
     title_text: str | None = None
     artist_text: str | None = None
-    skip_indices: set[int] = set()
 
-    idx = 0
-    while idx < len(segments) and segments[idx].kind == "metadata":
-        raw_text = segments[idx].text
+    for segment in iterator:
+        if segment.kind != "metadata":
+            first_body = segment
+            break
+        raw_text = segment.text
         lowered = raw_text.lower()
         if lowered.startswith("title:"):
             value = raw_text.split(":", 1)[1].strip()
             if value:
                 title_text = value
-                skip_indices.add(idx)
+                continue
         elif lowered.startswith("artist:"):
             value = raw_text.split(":", 1)[1].strip()
             if value:
                 artist_text = value
-                skip_indices.add(idx)
-        idx += 1
+                continue
+        leading.append(segment)
 
     if title_text or artist_text:
         header_style = r"\pard\plain\qc\b\f0\fs32 "
         if title_text:
-            parts.append(f"{header_style}{_escape_rtf(title_text)}\\par")
+            yield f"{header_style}{escape(title_text)}\\par"
         if artist_text:
-            parts.append(f"{header_style}{_escape_rtf(artist_text)}\\par")
-        parts.append("\\pard\\f0\\fs22 ")
+            yield f"{header_style}{escape(artist_text)}\\par"
+        yield "\\pard\\f0\\fs22 "
+
+    body = chain(leading, () if first_body is None else (first_body,), iterator)
+    chord: Optional[RenderSegment] = None
+
+    for segment in body:
+        if chord is not None:
+            chord_text = f"\\b {escape(chord.text)}\\b0"
+            chord = None
+            if segment.kind == "lyric":
+                yield f"{chord_text}\\line {escape(segment.text)}"
+                yield "\\par"
+                continue
+            yield f"{chord_text}\\par"
 
-    idx = 0
-    started = False
+        kind = segment.kind
+        if kind == "chord":
+            chord = segment
+        elif kind == "blank":
+            yield "\\par"
+        else:
+            yield f"{escape(segment.text)}\\par"
 
-    while idx < len(segments):
-        if idx in skip_indices:
-            idx += 1
-            continue
+    if chord is not None:
+        yield f"\\b {escape(chord.text)}\\b0\\par"
 
-        segment = segments[idx]
-        kind = segment.kind
 
-        if kind == "blank":
-            parts.append("\\par")
-            started = False
-            idx += 1
-            continue
+def _iter_document(parts: Iterable[str]) -> Iterator[str]:
+    yield _RTF_HEADER
+    yield from parts
+    yield _RTF_FOOTER
 
-        if kind in {"metadata", "section", "other"}:
-            if started:
-                parts.append("\\par")
-            parts.append(f"{_escape_rtf(segment.text)}\\par")
-            started = False
-            idx += 1
-            continue
 
-        if kind == "chord":
-            chord_text = f"\\b {_escape_rtf(segment.text)}\\b0"
-            if idx + 1 < len(segments) and segments[idx + 1].kind == "lyric":
-                lyric_text = _escape_rtf(segments[idx + 1].text)
-                if started:
-                    parts.append("\\par")
-                parts.append(f"{chord_text}\\line {lyric_text}")
-                parts.append("\\par")
-                started = False
-                idx += 2
-                continue
-            else:
-                if started:
-                    parts.append("\\par")
-                parts.append(f"{chord_text}\\par")
-                started = False
-                idx += 1
-                continue
+def _write_document(parts: Iterable[str], stream: TextIO) -> None:
+    write = stream.write
+    write(_RTF_HEADER)
+    for part in parts:
+        write("\n")
+        write(part)
+    write("\n")
+    write(_RTF_FOOTER)
+
+
+def write_lines_rtf(lines: Iterable[str], stream: TextIO) -> None:
+    """Write plain lines as an RTF document to ``stream`` as they arrive."""
+    _write_document(_iter_line_parts(lines), stream)
+
+
+def write_segments_rtf(segments: Iterable[RenderSegment], stream: TextIO) -> None:
+    """Write annotated two-line segments as RTF to ``stream`` as they arrive."""
+    _write_document(_iter_segment_parts(segments), stream)
 
-        if kind == "lyric":
-            if started:
-                parts.append("\\par")
-            parts.append(f"{_escape_rtf(segment.text)}\\par")
-            started = False
-            idx += 1
-            continue
 
-        # Fallback
-        if started:
-            parts.append("\\par")
-        parts.append(f"{_escape_rtf(segment.text)}\\par")
-        started = False
-        idx += 1
+def lines_to_rtf(lines: Iterable[str]) -> str:
+    lines = list(lines)
+    return "\n".join(_iter_document(_iter_line_parts(lines, _escaper_for(lines))))
+
+
+def segments_to_rtf(segments: Iterable[RenderSegment]) -> str:
+    """Render annotated two-line segments to RTF with chord formatting."""
+    segments = list(segments)
+    escape = _escaper_for([segment.text for segment in segments])
+    return "\n".join(_iter_document(_iter_segment_parts(segments, escape)))
 
-    parts.append(_RTF_FOOTER)
-    return "\n".join(parts)
 
 def song_to_rtf(song: Song) -> str:
     return lines_to_rtf(song_to_plain_lines(song))
 
 
-__all__ = ["song_to_rtf", "lines_to_rtf", "segments_to_rtf"]
+__all__ = [
+    "lines_to_rtf",
+    "segments_to_rtf",
+    "song_to_rtf",
+    "write_lines_rtf",
+    "write_segments_rtf",
+]
 
@@ -0,0 +1,97 @@
+"""CLI to build and query the persistent full-text index of a song library."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Iterable, Optional
+
+from .search_index import DEFAULT_PATTERNS, SearchIndex
+
+DEFAULT_DATABASE = "tab_maker_index.db"
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Index a song library's lyrics, titles and metadata, then search it.",
+    )
+    parser.add_argument(
+        "--db",
+        default=DEFAULT_DATABASE,
+        help=f"SQLite index file (default: {DEFAULT_DATABASE}).",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index = commands.add_parser("index", help="Add new and changed songs to the index.")
+    index.add_argument("source", nargs="+", help="Song files, directories or glob patterns.")
+    index.add_argument(
+        "--pattern",
+        action="append",
+        default=None,
+        help="Glob used when a source is a directory; repeatable "
+        f"(default: {' and '.join(DEFAULT_PATTERNS)}).",
+    )
+    index.add_argument(
+        "--keep-missing",
+        action="store_true",
+        help="Keep indexed songs that are no longer found under the sources "
+        "(songs indexed from other sources are always kept).",
+    )
+
+    query = commands.add_parser("query", help="Search the index.")
+    query.add_argument("words", nargs="+", help="Words that every hit must contain.")
+    query.add_argument("-n", "--limit", type=int, default=20, help="Maximum hits (default: 20).")
+    query.add_argument(
+        "--positions",
+        type=int,
+        default=3,
+        help="Matching lines shown per hit (default: 3).",
+    )
+    return parser
+
+
+def _index(index: SearchIndex, args: argparse.Namespace) -> int:
+    stats = index.update(
+        args.source, args.pattern or DEFAULT_PATTERNS, prune=not args.keep_missing
+    )
+    for path, error in stats.failed:
+        print(f"error: {path}: {error}", file=sys.stderr)
+    print(stats.format(), file=sys.stderr)
+    return 1 if stats.failed else 0
+
+
+def _query(index: SearchIndex, args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    hits = index.search(" ".join(args.words), limit=args.limit, positions=args.positions)
+    elapsed = time.perf_counter() - started
+    for hit in hits:
+        label = " - ".join(part for part in (hit.title, hit.artist) if part)
+        print(f"{hit.score:7.2f}  {hit.path}" + (f"  ({label})" if label else ""))
+        for position in hit.positions:
+            if position.field == "lyric":
+                where = f"{position.section_name or 'section ' + str(position.section + 1)}"
+                print(f"         {where}, line {position.line + 1}: {position.text}")
+            elif position.field == "section":
+                print(f"         section {position.section + 1}: [{position.section_name}]")
+            else:
+                print(f"         {position.field}")
+    print(f"{len(hits)} hits in {elapsed * 1000:.1f}ms", file=sys.stderr)
+    return 0 if hits else 1
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = build_argument_parser()
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    try:
+        with SearchIndex(args.db) as index:
+            if args.command == "index":
+                return _index(index, args)
+            return _query(index, args)
+    except Exception as exc:  # pragma: no cover - best effort CLI guard
+        parser.error(str(exc))
+        return 2
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
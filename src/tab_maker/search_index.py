@@ -0,0 +1,439 @@
+"""Persistent full-text index over a song library, stored in SQLite.
+
+Lyric words, section names and metadata values are stored as postings keyed
+by term, with the section and line each occurrence came from. Updates are
+incremental: files whose mtime and size are unchanged are skipped without
+being read, and files whose content hash is unchanged are not re-indexed.
+
+    with SearchIndex("library.db") as index:
+        index.update(["songs/"])
+        for hit in index.search("amazing grace"):
+            print(hit.path, hit.score)
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .batch import _GLOB_CHARS, _glob_root, collect_sources
+from .convert import LOADERS, guess_source_format
+from .models import ChordLyricLine, LyricLine, Song
+
+SCHEMA_VERSION = 1
+DEFAULT_PATTERNS = ("*.cho", "*.txt")
+
+FIELD_LYRIC = 0
+FIELD_SECTION = 1
+FIELD_TITLE = 2
+FIELD_ARTIST = 3
+FIELD_METADATA = 4
+FIELD_NAMES = {
+    FIELD_LYRIC: "lyric",
+    FIELD_SECTION: "section",
+    FIELD_TITLE: "title",
+    FIELD_ARTIST: "artist",
+    FIELD_METADATA: "metadata",
+}
+# Relative weight of one occurrence of a query term in each field.
+FIELD_WEIGHTS = {
+    FIELD_LYRIC: 1.0,
+    FIELD_SECTION: 1.5,
+    FIELD_TITLE: 5.0,
+    FIELD_ARTIST: 3.0,
+    FIELD_METADATA: 2.0,
+}
+METADATA_SECTION = -1  # section number recorded for metadata postings
+
+_WORD_RE = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+
+_SCHEMA = """
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    title TEXT,
+    artist TEXT
+);
+CREATE TABLE terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE
+);
+CREATE TABLE postings (
+    term_id INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    field INTEGER NOT NULL,
+    section INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (term_id, file_id, field, section, line)
+) WITHOUT ROWID;
+CREATE INDEX postings_by_file ON postings (file_id);
+CREATE TABLE lines (
+    file_id INTEGER NOT NULL,
+    section INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (file_id, section, line)
+) WITHOUT ROWID;
+CREATE TABLE sections (
+    file_id INTEGER NOT NULL,
+    section INTEGER NOT NULL,
+    name TEXT,
+    PRIMARY KEY (file_id, section)
+) WITHOUT ROWID;
+"""
+
+
+_TABLES = frozenset(re.findall(r"CREATE TABLE (\w+)", _SCHEMA))
+
+
+def tokenize(text: str) -> List[str]:
+    """Split ``text`` into case-folded words (apostrophes kept inside words)."""
+    return [match.group().casefold() for match in _WORD_RE.finditer(text)]
+
+
+@dataclass(slots=True)
+class IndexStats:
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def format(self) -> str:
+        return (
+            f"Indexed in {self.seconds:.2f}s: {self.added} added, {self.updated} updated, "
+            f"{self.unchanged} unchanged, {self.removed} removed, {len(self.failed)} failed"
+        )
+
+
+@dataclass(slots=True)
+class LinePosition:
+    field: str
+    section: int
+    line: int
+    section_name: Optional[str] = None
+    text: Optional[str] = None
+
+
+@dataclass(slots=True)
+class SearchHit:
+    path: str
+    title: Optional[str]
+    artist: Optional[str]
+    score: float
+    positions: List[LinePosition] = field(default_factory=list)
+
+
+# (term, field, section, line) -> occurrences
+_Postings = Dict[Tuple[str, int, int, int], int]
+
+
+def _add_terms(postings: _Postings, text: str, field_id: int, section: int, line: int) -> None:
+    for term in tokenize(text):
+        key = (term, field_id, section, line)
+        postings[key] = postings.get(key, 0) + 1
+
+
+def _song_postings(
+    song: Song,
+) -> Tuple[_Postings, List[Tuple[int, int, str]], List[Tuple[int, Optional[str]]]]:
+    """Return the postings, indexed lines and section names of ``song``."""
+    postings: _Postings = {}
+    lines: List[Tuple[int, int, str]] = []
+    sections: List[Tuple[int, Optional[str]]] = []
+    for position, (key, value) in enumerate(song.metadata.items()):
+        field_id = {"title": FIELD_TITLE, "artist": FIELD_ARTIST}.get(key, FIELD_METADATA)
+        _add_terms(postings, value, field_id, METADATA_SECTION, position)
+    for section_number, section in enumerate(song.sections):
+        sections.append((section_number, section.name))
+        if section.name:
+            _add_terms(postings, section.name, FIELD_SECTION, section_number, -1)
+        for line_number, entry in enumerate(section.lines):
+            if isinstance(entry, ChordLyricLine):
+                text = entry.lyrics
+            elif isinstance(entry, LyricLine):
+                text = entry.text
+            else:
+                continue
+            if text.strip():
+                lines.append((section_number, line_number, text.rstrip()))
+                _add_terms(postings, text, FIELD_LYRIC, section_number, line_number)
+    return postings, lines, sections
+
+
+def _source_roots(sources: Iterable[str]) -> List[Path]:
+    roots: List[Path] = []
+    for source in sources:
+        path = Path(source)
+        if not path.exists() and _GLOB_CHARS.intersection(source):
+            path = _glob_root(source)
+        roots.append(path.resolve())
+    return roots
+
+
+def _under_any(path: Path, roots: Sequence[Path]) -> bool:
+    resolved = path.resolve()
+    return any(resolved == root or resolved.is_relative_to(root) for root in roots)
+
+
+class SearchIndex:
+    """A song library's inverted index in the SQLite database at ``path``."""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.connection = sqlite3.connect(str(self.path))
+        self._term_ids: Optional[Dict[str, int]] = None
+        try:
+            self._ensure_schema()
+        except BaseException:
+            self.connection.close()
+            raise
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+
+    def _ensure_schema(self) -> None:
+        """Create the tables, or rebuild an index from another schema version.
+
+        Raises ``ValueError`` for a database holding tables this module did not
+        create, which is left untouched.
+        """
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        tables = {
+            name
+            for (name,) in self.connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+        if tables and ("files" not in tables or not tables <= _TABLES):
+            raise ValueError(f"{self.path} is not a tab-maker search index")
+        if version == SCHEMA_VERSION and tables:
+            return
+        # An index from another version is rebuilt from scratch rather than migrated.
+        with self.connection:
+            for name in tables:
+                self.connection.execute(f'DROP TABLE IF EXISTS "{name}"')
+            self.connection.executescript(_SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    # -- indexing -----------------------------------------------------------
+
+    def _term_id(self, term: str) -> int:
+        if self._term_ids is None:
+            self._term_ids = dict(self.connection.execute("SELECT term, id FROM terms"))
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            cursor = self.connection.execute("INSERT INTO terms (term) VALUES (?)", (term,))
+            term_id = self._term_ids[term] = cursor.lastrowid
+        return term_id
+
+    def _clear_file(self, file_id: int) -> None:
+        for table in ("postings", "lines", "sections"):
+            self.connection.execute(f"DELETE FROM {table} WHERE file_id = ?", (file_id,))
+
+    def _index_song(self, file_id: int, song: Song) -> None:
+        postings, lines, sections = _song_postings(song)
+        self.connection.executemany(
+            "INSERT INTO postings VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (self._term_id(term), file_id, field_id, section, line, count)
+                for (term, field_id, section, line), count in postings.items()
+            ],
+        )
+        self.connection.executemany(
+            "INSERT INTO lines VALUES (?, ?, ?, ?)",
+            [(file_id, section, line, text) for section, line, text in lines],
+        )
+        self.connection.executemany(
+            "INSERT INTO sections VALUES (?, ?, ?)",
+            [(file_id, section, name) for section, name in sections],
+        )
+
+    def _update_file(self, path: Path, known: Dict[str, Tuple[int, int, int, str]]) -> str:
+        key = str(path)
+        stat = path.stat()
+        existing = known.get(key)
+        if existing is not None and existing[1:3] == (stat.st_mtime_ns, stat.st_size):
+            return "unchanged"
+        data = path.read_bytes()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        if existing is not None and existing[3] == digest:
+            self.connection.execute(
+                "UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?",
+                (stat.st_mtime_ns, stat.st_size, existing[0]),
+            )
+            return "unchanged"
+
+        song = LOADERS[guess_source_format(path)](data.decode("utf-8"))
+        row = (stat.st_mtime_ns, stat.st_size, digest, song.metadata.get("title"),
+               song.metadata.get("artist"))
+        if existing is None:
+            cursor = self.connection.execute(
+                "INSERT INTO files (path, mtime_ns, size, digest, title, artist) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, *row),
+            )
+            file_id = cursor.lastrowid
+        else:
+            file_id = existing[0]
+            self._clear_file(file_id)
+            self.connection.execute(
+                "UPDATE files SET mtime_ns = ?, size = ?, digest = ?, title = ?, artist = ? "
+                "WHERE id = ?",
+                (*row, file_id),
+            )
+        self._index_song(file_id, song)
+        return "added" if existing is None else "updated"
+
+    def update(
+        self,
+        sources: Iterable[str],
+        patterns: Sequence[str] = DEFAULT_PATTERNS,
+        prune: bool = True,
+    ) -> IndexStats:
+        """Bring the index up to date with ``sources`` (files, directories or globs).
+
+        With ``prune``, files indexed earlier under one of ``sources`` (inside a
+        source directory or a glob's fixed leading directories, or a source
+        file itself) that no longer exist are removed. Files indexed from other
+        sources are kept.
+        """
+        started = time.perf_counter()
+        stats = IndexStats()
+        sources = list(sources)
+        paths: Dict[str, Path] = {}
+        for pattern in patterns:
+            for path, _relative in collect_sources(sources, pattern):
+                paths.setdefault(str(path), path)
+        known = {
+            row[1]: (row[0], row[2], row[3], row[4])
+            for row in self.connection.execute("SELECT id, path, mtime_ns, size, digest FROM files")
+        }
+        with self.connection:
+            for key, path in paths.items():
+                try:
+                    outcome = self._update_file(path, known)
+                except (OSError, UnicodeDecodeError, ValueError) as exc:
+                    stats.failed.append((key, f"{type(exc).__name__}: {exc}"))
+                    continue
+                setattr(stats, outcome, getattr(stats, outcome) + 1)
+            if prune:
+                roots = _source_roots(sources)
+                for key in set(known) - set(paths):
+                    path = Path(key)
+                    if path.exists() or not _under_any(path, roots):
+                        continue
+                    file_id = known[key][0]
+                    self._clear_file(file_id)
+                    self.connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                    stats.removed += 1
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    # -- querying -----------------------------------------------------------
+
+    def search(self, query: str, limit: int = 20, positions: int = 5) -> List[SearchHit]:
+        """Return files containing every word of ``query``, best first.
+
+        Each occurrence scores its field weight times the term's inverse
+        document frequency. Up to ``positions`` matching lines are attached
+        to each hit.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        placeholders = ", ".join("?" for _ in terms)
+        term_rows = self.connection.execute(
+            f"SELECT id FROM terms WHERE term IN ({placeholders})", terms
+        ).fetchall()
+        if len(term_rows) != len(terms):
+            return []
+        term_ids = [term_id for (term_id,) in term_rows]
+        (file_count,) = self.connection.execute("SELECT COUNT(*) FROM files").fetchone()
+
+        id_list = ", ".join("?" for _ in term_ids)
+        idf = {
+            term_id: math.log(1 + file_count / documents)
+            for term_id, documents in self.connection.execute(
+                f"SELECT term_id, COUNT(DISTINCT file_id) FROM postings "
+                f"WHERE term_id IN ({id_list}) GROUP BY term_id",
+                term_ids,
+            )
+        }
+        scores: Dict[int, float] = {}
+        matched: Dict[int, set] = {}
+        for term_id, file_id, field_id, count in self.connection.execute(
+            f"SELECT term_id, file_id, field, SUM(count) FROM postings "
+            f"WHERE term_id IN ({id_list}) GROUP BY term_id, file_id, field",
+            term_ids,
+        ):
+            scores[file_id] = scores.get(file_id, 0.0) + (
+                FIELD_WEIGHTS[field_id] * idf[term_id] * (1 + math.log(count))
+            )
+            matched.setdefault(file_id, set()).add(term_id)
+
+        ranked = sorted(
+            (file_id for file_id, found in matched.items() if len(found) == len(term_ids)),
+            key=lambda file_id: -scores[file_id],
+        )[:limit]
+        return [self._hit(file_id, scores[file_id], term_ids, positions) for file_id in ranked]
+
+    def _hit(self, file_id: int, score: float, term_ids: List[int], limit: int) -> SearchHit:
+        path, title, artist = self.connection.execute(
+            "SELECT path, title, artist FROM files WHERE id = ?", (file_id,)
+        ).fetchone()
+        id_list = ", ".join("?" for _ in term_ids)
+        rows = self.connection.execute(
+            f"SELECT p.field, p.section, p.line, s.name, l.text "
+            f"FROM postings p "
+            f"LEFT JOIN sections s ON s.file_id = p.file_id AND s.section = p.section "
+            f"LEFT JOIN lines l ON l.file_id = p.file_id AND l.section = p.section "
+            f"AND l.line = p.line "
+            f"WHERE p.file_id = ? AND p.term_id IN ({id_list}) "
+            f"GROUP BY p.field, p.section, p.line "
+            f"ORDER BY COUNT(DISTINCT p.term_id) DESC, p.section, p.line LIMIT ?",
+            (file_id, *term_ids, limit),
+        )
+        return SearchHit(
+            path=path,
+            title=title,
+            artist=artist,
+            score=score,
+            positions=[
+                LinePosition(FIELD_NAMES[field_id], section, line, name, text)
+                for field_id, section, line, name, text in rows
+            ],
+        )
+
+    def iter_files(self) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """Yield ``(path, title, artist)`` for every indexed file."""
+        yield from self.connection.execute("SELECT path, title, artist FROM files ORDER BY path")
+
+
+__all__ = [
+    "DEFAULT_PATTERNS",
+    "IndexStats",
+    "LinePosition",
+    "SCHEMA_VERSION",
+    "SearchHit",
+    "SearchIndex",
+    "tokenize",
+]
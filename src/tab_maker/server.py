@@ -0,0 +1,336 @@
+"""Long-running local HTTP conversion server built on asyncio.
+
+Routes (``POST`` with the source text as the request body)::
+
+    /chordpro   Ultimate Guitar sheet -> ChordPro
+    /rtf        ChordPro -> two-line RTF
+    /text       ChordPro -> plain text
+    /two-line   ChordPro -> two-line plain text
+
+``?from=ug`` or ``?from=chordpro`` overrides the source format, and ``title``,
+``artist``, ``album``, ``key`` and repeated ``meta=key=value`` query parameters
+set metadata as the CLI flags do. ``transpose=N`` moves the chords by ``N``
+semitones, spelled per ``spelling=flats`` or ``spelling=sharps`` if given.
+``GET /health`` reports queue occupancy.
+
+Conversions run in a warm process pool. At most ``workers + max_queue``
+requests are admitted at once; further requests get ``503`` with
+``Retry-After`` instead of queueing without bound. Every response carries an
+``X-Latency-Ms`` header and a ``Server-Timing`` entry.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from http import HTTPStatus
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .convert import LOADERS, convert_text
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BODY = 8 * 1024 * 1024
+_MAX_HEADER_LINES = 100
+
+# path -> (default source format, target format, content type)
+ROUTES: Dict[str, Tuple[str, str, str]] = {
+    "/chordpro": ("ug", "chordpro", "text/plain; charset=utf-8"),
+    "/rtf": ("chordpro", "rtf", "application/rtf"),
+    "/text": ("chordpro", "text", "text/plain; charset=utf-8"),
+    "/two-line": ("chordpro", "two-line", "text/plain; charset=utf-8"),
+}
+_METADATA_PARAMS = ("title", "artist", "album", "key")
+_SPELLINGS = {"flats": True, "sharps": False}
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _warm_worker() -> None:
+    # Compile regexes and fill parser caches before the first real request.
+    convert_text("[Verse]\nC  G\nHello\n", "ug", "chordpro")
+    convert_text("{title: Warm}\n[C]Hello\n", "chordpro", "rtf")
+
+
+def _metadata_from_query(query: Dict[str, List[str]]) -> Dict[str, str]:
+    metadata: Dict[str, str] = {}
+    for name in _METADATA_PARAMS:
+        if name in query:
+            metadata[name] = query[name][-1]
+    for item in query.get("meta", []):
+        if "=" not in item:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, f"meta must use key=value format: {item!r}")
+        key, value = item.split("=", 1)
+        if not key.strip():
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, "Metadata key may not be empty")
+        metadata[key.strip()] = value.strip()
+    return metadata
+
+
+def _transpose_from_query(query: Dict[str, List[str]]) -> Tuple[int, Optional[bool]]:
+    try:
+        semitones = int(query.get("transpose", ["0"])[-1])
+    except ValueError:
+        raise _HTTPError(HTTPStatus.BAD_REQUEST, "transpose must be an integer") from None
+    spelling = query.get("spelling", [None])[-1]
+    if spelling is not None and spelling not in _SPELLINGS:
+        raise _HTTPError(HTTPStatus.BAD_REQUEST, "spelling must be 'flats' or 'sharps'")
+    return semitones, None if spelling is None else _SPELLINGS[spelling]
+
+
+async def _read_line(reader: asyncio.StreamReader, status: HTTPStatus, message: str) -> bytes:
+    # readline() reports a line longer than the reader's limit as ValueError.
+    try:
+        return await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError):
+        raise _HTTPError(status, message) from None
+
+
+class ConversionServer:
+    """Serves conversions from ``executor`` with bounded admission."""
+
+    def __init__(
+        self,
+        executor: Executor,
+        workers: int,
+        max_queue: int = 64,
+        max_body: int = DEFAULT_MAX_BODY,
+    ) -> None:
+        self.executor = executor
+        self.capacity = workers + max_queue
+        self.max_body = max_body
+        self.in_flight = 0
+        self.served = 0
+        self.rejected = 0
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await _read_line(reader, HTTPStatus.BAD_REQUEST, "Request line too long")
+        if not request_line:
+            return None
+        try:
+            method, target, _version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line") from None
+
+        headers: Dict[str, str] = {}
+        for _ in range(_MAX_HEADER_LINES):
+            line = await _read_line(
+                reader, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Header line too long"
+            )
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise _HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers")
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length") from None
+        if length < 0:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > self.max_body:
+            raise _HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[str, str]:
+        url = urlsplit(target)
+        if url.path == "/health":
+            status = {
+                "in_flight": self.in_flight,
+                "capacity": self.capacity,
+                "served": self.served,
+                "rejected": self.rejected,
+            }
+            return json.dumps(status), "application/json"
+
+        route = ROUTES.get(url.path)
+        if route is None:
+            raise _HTTPError(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {url.path}")
+        if method != "POST":
+            raise _HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST with the song as the body")
+
+        default_source, target_format, content_type = route
+        query = parse_qs(url.query)
+        source_format = query.get("from", [default_source])[-1]
+        if source_format not in LOADERS:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown source format: {source_format!r}")
+        metadata = _metadata_from_query(query)
+        semitones, prefer_flats = _transpose_from_query(query)
+        try:
+            text = body.decode("utf-8")
+        except UnicodeDecodeError:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, "Request body must be UTF-8") from None
+
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise _HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Server busy, retry shortly")
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            output = await loop.run_in_executor(
+                self.executor,
+                convert_text,
+                text,
+                source_format,
+                target_format,
+                metadata,
+                semitones,
+                prefer_flats,
+            )
+        finally:
+            self.in_flight -= 1
+        self.served += 1
+        return output, content_type
+
+    async def _write_response(
+        self,
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        body: bytes,
+        content_type: str,
+        started: float,
+        keep_alive: bool,
+    ) -> None:
+        latency_ms = (time.perf_counter() - started) * 1000
+        headers = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"X-Latency-Ms: {latency_ms:.3f}",
+            f"Server-Timing: convert;dur={latency_ms:.3f}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status is HTTPStatus.SERVICE_UNAVAILABLE:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except _HTTPError as exc:
+                    started = time.perf_counter()
+                    await self._write_response(
+                        writer, exc.status, str(exc).encode("utf-8"),
+                        "text/plain; charset=utf-8", started, keep_alive=False,
+                    )
+                    break
+                if request is None:
+                    break
+
+                started = time.perf_counter()
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    output, content_type = await self._dispatch(method, target, body)
+                    status = HTTPStatus.OK
+                    payload = output.encode("utf-8")
+                except _HTTPError as exc:
+                    status, content_type = exc.status, "text/plain; charset=utf-8"
+                    payload = str(exc).encode("utf-8")
+                except Exception as exc:
+                    status = HTTPStatus.UNPROCESSABLE_ENTITY
+                    content_type = "text/plain; charset=utf-8"
+                    payload = f"{type(exc).__name__}: {exc}".encode("utf-8")
+                await self._write_response(
+                    writer, status, payload, content_type, started, keep_alive
+                )
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    workers: Optional[int] = None,
+    max_queue: int = 64,
+    max_body: int = DEFAULT_MAX_BODY,
+) -> None:
+    """Run the conversion server until cancelled."""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker) as executor:
+        # Spawn every worker now so no request pays process start-up.
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(executor, _warm_worker) for _ in range(workers))
+        )
+        app = ConversionServer(executor, workers, max_queue=max_queue, max_body=max_body)
+        server = await asyncio.start_server(app.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Serve Tab-Maker conversions over HTTP from a warm worker pool.",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Interface to bind (default: 127.0.0.1).",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port to listen on (default: {DEFAULT_PORT}).",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes. Defaults to the CPU count.",
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=64,
+        help="Requests allowed to wait for a worker before answering 503 (default: 64).",
+    )
+    parser.add_argument(
+        "--max-body",
+        type=int,
+        default=DEFAULT_MAX_BODY,
+        help="Largest accepted request body in bytes.",
+    )
+    return parser
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = build_argument_parser()
+    args = parser.parse_args(list(argv) if argv is not None else None)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_queue, args.max_body))
+    except KeyboardInterrupt:  # pragma: no cover - interactive shutdown
+        pass
+    return 0
+
+
+__all__ = ["ConversionServer", "ROUTES", "serve"]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,422 @@
+"""Versioned binary pack of parsed songs that loads single songs by offset.
+
+A pack holds many :class:`~tab_maker.models.Song` objects in one file so that
+tools can skip re-parsing a library at start-up. The file is memory-mapped and
+only the requested song's record and strings are decoded. All integers are
+little-endian.
+
+* header ``<4sHHIIQQ``: magic ``TMSP``, format version, flags (unused), song
+  count, string count, string table offset and index offset;
+* song records, each a ``<IIII`` count header (metadata pairs, sections,
+  lines, chords) followed by packed columns: metadata key/value string ids,
+  per section its name string id and line end, per line its kind (``u8``,
+  padded to 4 bytes), text string id and chord end, then per chord its
+  string id and ``i32`` column;
+* string table: ``count + 1`` ``u32`` end offsets, then UTF-8 bytes. Chords,
+  lyric lines, section names and metadata share it, so a repeated chorus
+  line is stored once;
+* index, one ``<IqQQQ`` entry per song: name string id, source mtime (ns),
+  source size, record offset and record length.
+
+Line kinds and chord columns follow :mod:`tab_maker.compact`.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .batch import collect_sources
+from .compact import LINE_BLANK, LINE_CHORD_LYRIC, LINE_CHORDS, LINE_LYRIC
+from .convert import LOADERS, guess_source_format
+from .models import (
+    BlankLine,
+    ChordLyricLine,
+    ChordOnlyLine,
+    ChordPlacement,
+    LyricLine,
+    Section,
+    Song,
+    SongLine,
+)
+
+FORMAT_MAGIC = b"TMSP"
+FORMAT_VERSION = 1
+DEFAULT_PATTERNS = ("*.cho", "*.txt")
+
+_HEADER = struct.Struct("<4sHHIIQQ")
+_RECORD_HEADER = struct.Struct("<IIII")
+_INDEX_ENTRY = struct.Struct("<IqQQQ")
+_NO_NAME = 0xFFFFFFFF  # section name id of a section without a name
+_NO_COLUMN = -1  # column stored for chords of a ChordOnlyLine
+_SWAP = sys.byteorder != "little"
+
+
+def _pack(typecode: str, values: Iterable[int]) -> bytes:
+    data = array(typecode, values)
+    if _SWAP:
+        data.byteswap()
+    return data.tobytes()
+
+
+def _unpack(typecode: str, buffer: memoryview) -> Sequence[int]:
+    if not _SWAP:
+        return buffer.cast(typecode)
+    data = array(typecode, buffer.tobytes())
+    data.byteswap()
+    return data
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.ends: List[int] = []
+        self.chunks: List[bytes] = []
+        self.size = 0
+
+    def add(self, text: str) -> int:
+        string_id = self.ids.get(text)
+        if string_id is None:
+            data = text.encode("utf-8")
+            string_id = self.ids[text] = len(self.ends)
+            self.chunks.append(data)
+            self.size += len(data)
+            self.ends.append(self.size)
+        return string_id
+
+
+def _encode_song(song: Song, strings: _StringTable) -> bytes:
+    add = strings.add
+    metadata: List[int] = []
+    for key, value in song.metadata.items():
+        metadata += (add(key), add(value))
+    sections: List[int] = []
+    kinds = bytearray()
+    texts: List[int] = []
+    chord_ends: List[int] = []
+    chords: List[int] = []
+    columns: List[int] = []
+
+    for section in song.sections:
+        for entry in section.lines:
+            if isinstance(entry, BlankLine):
+                kind, text = LINE_BLANK, ""
+            elif isinstance(entry, ChordLyricLine):
+                kind, text = LINE_CHORD_LYRIC, entry.lyrics
+                for placement in entry.placements:
+                    chords.append(add(placement.chord))
+                    columns.append(placement.column)
+            elif isinstance(entry, LyricLine):
+                kind, text = LINE_LYRIC, entry.text
+            elif isinstance(entry, ChordOnlyLine):
+                kind, text = LINE_CHORDS, entry.raw_text
+                for chord in entry.chords:
+                    chords.append(add(chord))
+                    columns.append(_NO_COLUMN)
+            else:
+                raise TypeError(f"Unhandled song line type: {type(entry)!r}")
+            kinds.append(kind)
+            texts.append(add(text))
+            chord_ends.append(len(chords))
+        name = _NO_NAME if section.name is None else add(section.name)
+        sections += (name, len(kinds))
+
+    kinds += bytes(-len(kinds) % 4)
+    return b"".join((
+        _RECORD_HEADER.pack(len(metadata) // 2, len(sections) // 2, len(texts), len(chords)),
+        _pack("I", metadata),
+        _pack("I", sections),
+        bytes(kinds),
+        _pack("I", texts),
+        _pack("I", chord_ends),
+        _pack("I", chords),
+        _pack("i", columns),
+    ))
+
+
+def _write_pack(
+    handle: BinaryIO, songs: Iterable[Tuple[str, Song, int, int]]
+) -> int:
+    strings = _StringTable()
+    index: List[bytes] = []
+    handle.write(bytes(_HEADER.size))
+    offset = _HEADER.size
+    for name, song, mtime_ns, size in songs:
+        record = _encode_song(song, strings)
+        index.append(_INDEX_ENTRY.pack(strings.add(name), mtime_ns, size, offset, len(record)))
+        handle.write(record)
+        offset += len(record)
+
+    string_offset = offset
+    handle.write(_pack("I", [0, *strings.ends]))
+    for chunk in strings.chunks:
+        handle.write(chunk)
+    index_offset = string_offset + 4 * (len(strings.ends) + 1) + strings.size
+    for entry in index:
+        handle.write(entry)
+    handle.seek(0)
+    handle.write(_HEADER.pack(
+        FORMAT_MAGIC, FORMAT_VERSION, 0, len(index), len(strings.ends),
+        string_offset, index_offset,
+    ))
+    return len(index)
+
+
+def write_song_pack(
+    songs: Iterable[Union[Tuple[str, Song], Tuple[str, Song, int, int]]],
+    destination: Union[str, Path],
+) -> int:
+    """Write ``(name, song)`` pairs to a pack at ``destination``; returns the song count.
+
+    Entries may carry the source's ``mtime_ns`` and ``size`` as two more items,
+    which :meth:`SongPack.is_current` compares against the file later.
+    """
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    entries = ((entry + (0, 0))[:4] for entry in songs)
+    fd, temp_name = tempfile.mkstemp(dir=destination.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            count = _write_pack(handle, entries)
+        os.replace(temp_name, destination)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    return count
+
+
+def _iter_library(
+    sources: Iterable[str], patterns: Sequence[str], failed: List[Tuple[str, str]]
+) -> Iterator[Tuple[str, Song, int, int]]:
+    sources = list(sources)
+    paths: Dict[str, Path] = {}
+    for pattern in patterns:
+        for path, _relative in collect_sources(sources, pattern):
+            paths.setdefault(str(path), path)
+    for key, path in paths.items():
+        try:
+            stat = path.stat()
+            song = LOADERS[guess_source_format(path)](path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError, ValueError) as exc:
+            failed.append((key, f"{type(exc).__name__}: {exc}"))
+            continue
+        yield key, song, stat.st_mtime_ns, stat.st_size
+
+
+def build_song_pack(
+    sources: Iterable[str],
+    destination: Union[str, Path],
+    patterns: Sequence[str] = DEFAULT_PATTERNS,
+) -> Tuple[int, List[Tuple[str, str]]]:
+    """Parse every song under ``sources`` into a pack named by source path.
+
+    Returns the number of songs written and the ``(path, error)`` pairs of
+    files that could not be parsed.
+    """
+    failed: List[Tuple[str, str]] = []
+    count = write_song_pack(_iter_library(sources, patterns, failed), destination)
+    return count, failed
+
+
+class SongPack:
+    """Memory-mapped reader for a pack written by :func:`write_song_pack`.
+
+    Raises ``ValueError`` for files that are not packs, were written by another
+    format version, or are truncated.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            try:
+                self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                raise ValueError(f"{self.path} is not a song pack") from None
+        try:
+            self._open()
+        except BaseException:
+            self._mmap.close()
+            raise
+        self._names: Optional[Dict[str, int]] = None
+        self._cache: List[Optional[str]] = [None] * self._string_count
+
+    def _open(self) -> None:
+        size = len(self._mmap)
+        if size < _HEADER.size or self._mmap[:4] != FORMAT_MAGIC:
+            raise ValueError(f"{self.path} is not a song pack")
+        (_magic, version, _flags, song_count, string_count, string_offset,
+         index_offset) = _HEADER.unpack_from(self._mmap)
+        if version != FORMAT_VERSION:
+            raise ValueError(
+                f"{self.path} uses song pack format {version}; this version reads "
+                f"format {FORMAT_VERSION}. Rebuild the pack."
+            )
+        strings_start = string_offset + 4 * (string_count + 1)
+        if (
+            strings_start > index_offset
+            or index_offset + song_count * _INDEX_ENTRY.size != size
+        ):
+            raise ValueError(f"{self.path} is truncated or corrupt")
+        view = memoryview(self._mmap)
+        self._string_ends = _unpack("I", view[string_offset:strings_start])
+        self._strings = view[strings_start:index_offset]
+        self._index_offset = index_offset
+        self._records_end = string_offset
+        self.song_count = song_count
+        self._string_count = string_count
+
+    def close(self) -> None:
+        for block in (self._string_ends, self._strings):
+            if isinstance(block, memoryview):
+                block.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "SongPack":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.song_count
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._name_index()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names())
+
+    def _string(self, string_id: int) -> str:
+        ends = self._string_ends
+        return str(self._strings[ends[string_id]:ends[string_id + 1]], "utf-8")
+
+    def _entry(self, position: int) -> Tuple[int, int, int, int, int]:
+        if not 0 <= position < self.song_count:
+            raise IndexError(position)
+        return _INDEX_ENTRY.unpack_from(
+            self._mmap, self._index_offset + position * _INDEX_ENTRY.size
+        )
+
+    def names(self) -> List[str]:
+        """Return the names of the packed songs in pack order."""
+        return [self._string(self._entry(position)[0]) for position in range(self.song_count)]
+
+    def _name_index(self) -> Dict[str, int]:
+        if self._names is None:
+            self._names = {name: position for position, name in enumerate(self.names())}
+        return self._names
+
+    def is_current(self, name: str, path: Optional[Union[str, Path]] = None) -> bool:
+        """Return whether the source file still has the mtime and size it was packed with."""
+        position = self._name_index().get(name)
+        if position is None:
+            return False
+        _name, mtime_ns, size, _offset, _length = self._entry(position)
+        try:
+            stat = os.stat(path if path is not None else name)
+        except OSError:
+            return False
+        return stat.st_mtime_ns == mtime_ns and stat.st_size == size
+
+    def load(self, name: str) -> Song:
+        """Decode the song packed under ``name``; raises ``KeyError`` if absent."""
+        return self.load_at(self._name_index()[name])
+
+    def load_at(self, position: int) -> Song:
+        """Decode the song at ``position`` in pack order."""
+        _name, _mtime, _size, offset, length = self._entry(position)
+        if offset + length > self._records_end:
+            raise ValueError(f"{self.path} is truncated or corrupt")
+        with memoryview(self._mmap)[offset:offset + length] as record:
+            return self._decode(record)
+
+    def _decode(self, record: memoryview) -> Song:
+        metadata_count, section_count, line_count, chord_count = _RECORD_HEADER.unpack_from(
+            record
+        )
+        position = _RECORD_HEADER.size
+
+        def column(typecode: str, count: int) -> List[int]:
+            nonlocal position
+            with record[position:position + count * 4] as block:
+                values = _unpack(typecode, block)
+                position += count * 4
+                return values.tolist()
+
+        metadata_ids = column("I", metadata_count * 2)
+        section_ids = column("I", section_count * 2)
+        kinds = bytes(record[position:position + line_count])
+        position += line_count + (-line_count % 4)
+        text_ids = column("I", line_count)
+        chord_ends = column("I", line_count)
+        chords = self._strings_for(column("I", chord_count))
+        placements = list(map(ChordPlacement, chords, column("i", chord_count)))
+        texts = self._strings_for(text_ids)
+
+        metadata = dict(zip(self._strings_for(metadata_ids[0::2]),
+                            self._strings_for(metadata_ids[1::2])))
+        sections: List[Section] = []
+        line = 0
+        chord_start = 0
+        for name_id, line_end in zip(section_ids[0::2], section_ids[1::2]):
+            lines: List[SongLine] = []
+            append = lines.append
+            for kind, text, chord_end in zip(
+                kinds[line:line_end], texts[line:line_end], chord_ends[line:line_end]
+            ):
+                if kind == LINE_CHORD_LYRIC:
+                    append(ChordLyricLine(text, placements[chord_start:chord_end]))
+                elif kind == LINE_LYRIC:
+                    append(LyricLine(text))
+                elif kind == LINE_BLANK:
+                    append(BlankLine())
+                elif kind == LINE_CHORDS:
+                    append(ChordOnlyLine(chords[chord_start:chord_end], text))
+                else:
+                    raise ValueError(f"Unknown song pack line kind: {kind}")
+                chord_start = chord_end
+            line = line_end
+            name = None if name_id == _NO_NAME else self._strings_for([name_id])[0]
+            sections.append(Section(name, lines))
+        return Song(sections=sections, metadata=metadata)
+
+    def _strings_for(self, string_ids: List[int]) -> List[str]:
+        # Decoded strings are kept, so chords and repeated lines decode once per pack.
+        cache = self._cache
+        found = [cache[string_id] for string_id in string_ids]
+        if None in found:
+            for i, string_id in enumerate(string_ids):
+                if found[i] is None:
+                    found[i] = cache[string_id] = self._string(string_id)
+        return found
+
+    def iter_songs(self) -> Iterator[Tuple[str, Song]]:
+        """Yield ``(name, song)`` for every packed song, decoding one at a time."""
+        for position in range(self.song_count):
+            yield self._string(self._entry(position)[0]), self.load_at(position)
+
+
+__all__ = [
+    "FORMAT_VERSION",
+    "SongPack",
+    "build_song_pack",
+    "write_song_pack",
+]
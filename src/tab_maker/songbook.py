@@ -0,0 +1,200 @@
+"""Assemble many songs into one RTF or DOCX songbook.
+
+Building a book takes two passes over the sources. The first pass parses
+every song but keeps only its number, title and artist, which is enough to
+write the table of contents and the alphabetical index. The second pass
+parses each song again and streams its two-line layout to the output before
+moving on, so memory stays bounded by the largest song rather than by the
+book.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from .chord_layout import RenderSegment, iter_two_line_segments
+from .convert import guess_source_format, load_song
+from .docx_xml import DocxWriter
+from .models import Song
+from .profiling import stage
+from .rtf import _RTF_FOOTER, _RTF_HEADER, _escape_rtf, _iter_segment_parts
+
+_RTF_TITLE_STYLE = r"\pard\plain\qc\b\f0\fs40 "
+_RTF_HEADING_STYLE = r"\pard\plain\b\f0\fs28 "
+_RTF_BODY_STYLE = r"\pard\plain\f0\fs22 "
+
+
+@dataclass(slots=True)
+class SongbookEntry:
+    number: int
+    title: str
+    artist: Optional[str]
+    source: Path
+    source_format: str
+
+    def label(self) -> str:
+        return f"{self.title} - {self.artist}" if self.artist else self.title
+
+
+def _read_song(path: Path, source_format: str) -> Song:
+    with stage("read"):
+        text = path.read_text(encoding="utf-8")
+    return load_song(text, source_format)
+
+
+def plan_songbook(
+    sources: Iterable[Union[str, Path]], source_format: Optional[str] = None
+) -> List[SongbookEntry]:
+    """First pass: number the songs and record their titles and artists.
+
+    Songs without a ``title`` are listed under their file name.
+    """
+    entries: List[SongbookEntry] = []
+    for number, source in enumerate(sources, start=1):
+        path = Path(source)
+        fmt = source_format or guess_source_format(path)
+        metadata = _read_song(path, fmt).metadata
+        title = metadata.get("title") or path.stem
+        entries.append(SongbookEntry(number, title, metadata.get("artist"), path, fmt))
+    return entries
+
+
+def index_order(entries: Sequence[SongbookEntry]) -> List[SongbookEntry]:
+    """Return ``entries`` sorted alphabetically by title, then artist."""
+    return sorted(
+        entries, key=lambda entry: (entry.title.casefold(), (entry.artist or "").casefold())
+    )
+
+
+def _iter_book_songs(
+    entries: Sequence[SongbookEntry],
+) -> Iterator[Tuple[SongbookEntry, Song]]:
+    # Second pass: one parsed song alive at a time.
+    for entry in entries:
+        song = _read_song(entry.source, entry.source_format)
+        song.metadata["title"] = f"{entry.number}. {entry.title}"
+        yield entry, song
+
+
+def _iter_rtf_book(entries: Sequence[SongbookEntry], title: Optional[str]) -> Iterator[str]:
+    if title:
+        yield f"{_RTF_TITLE_STYLE}{_escape_rtf(title)}\\par"
+        yield "\\par"
+    yield f"{_RTF_HEADING_STYLE}Contents\\par"
+    yield _RTF_BODY_STYLE
+    for entry in entries:
+        yield f"{entry.number}. {_escape_rtf(entry.label())}\\par"
+
+    for _entry, song in _iter_book_songs(entries):
+        yield "\\page"
+        yield _RTF_BODY_STYLE
+        with stage("render"):
+            parts = list(_iter_segment_parts(iter_two_line_segments(song)))
+        yield from parts
+
+    yield "\\page"
+    yield f"{_RTF_HEADING_STYLE}Index\\par"
+    yield _RTF_BODY_STYLE
+    for entry in index_order(entries):
+        yield f"{_escape_rtf(entry.label())} ... {entry.number}\\par"
+
+
+def write_songbook_rtf(
+    entries: Sequence[SongbookEntry], stream: TextIO, title: Optional[str] = None
+) -> None:
+    """Write the songbook as one RTF document, with a page per song."""
+    write = stream.write
+    write(_RTF_HEADER)
+    for part in _iter_rtf_book(entries, title):
+        write("\n")
+        write(part)
+    write("\n")
+    write(_RTF_FOOTER)
+
+
+def _docx_body(segments: Iterable[RenderSegment]) -> Iterator[RenderSegment]:
+    # Title and artist are already in the section heading and page header.
+    for segment in segments:
+        if segment.kind == "metadata" and segment.text.startswith(("Title:", "Artist:")):
+            continue
+        yield segment
+
+
+def write_songbook_docx(
+    entries: Sequence[SongbookEntry], destination: Union[str, Path], title: Optional[str] = None
+) -> Path:
+    """Write the songbook as one DOCX document, with a section per song."""
+    with DocxWriter(destination, title=title) as writer:
+        if title:
+            writer.add_paragraph(title, "SongHeader")
+            writer.add_paragraph("")
+        writer.add_paragraph("Contents", "Heading1")
+        writer.add_lines(f"{entry.number}. {entry.label()}" for entry in entries)
+
+        for entry, song in _iter_book_songs(entries):
+            writer.start_section(entry.label())
+            writer.add_paragraph(song.metadata["title"], "Heading1")
+            with stage("render"):
+                writer.add_segments(_docx_body(iter_two_line_segments(song)))
+
+        writer.start_section(None)
+        writer.add_paragraph("Index", "Heading1")
+        writer.add_lines(f"{entry.label()} ... {entry.number}" for entry in index_order(entries))
+    return writer.path
+
+
+def _write_rtf_file(
+    entries: Sequence[SongbookEntry], destination: Path, title: Optional[str]
+) -> Path:
+    with open(destination, "w", encoding="utf-8") as stream:
+        write_songbook_rtf(entries, stream, title)
+    return destination
+
+
+SongbookWriter = Callable[[Sequence[SongbookEntry], Path, Optional[str]], Path]
+
+SONGBOOK_WRITERS: Dict[str, SongbookWriter] = {
+    ".rtf": _write_rtf_file,
+    ".docx": write_songbook_docx,
+}
+
+
+def build_songbook(
+    sources: Iterable[Union[str, Path]],
+    destination: Union[str, Path],
+    title: Optional[str] = None,
+    source_format: Optional[str] = None,
+) -> List[SongbookEntry]:
+    """Build a songbook at ``destination``; its suffix (``.rtf``/``.docx``) picks the format.
+
+    Returns the planned entries in book order.
+    """
+    destination = Path(destination)
+    writer = SONGBOOK_WRITERS.get(destination.suffix.lower())
+    if writer is None:
+        raise ValueError(f"Songbooks must be written to .rtf or .docx, not {destination.name!r}")
+    entries = plan_songbook(sources, source_format)
+    writer(entries, destination, title)
+    return entries
+
+
+__all__ = [
+    "SongbookEntry",
+    "build_songbook",
+    "index_order",
+    "plan_songbook",
+    "write_songbook_docx",
+    "write_songbook_rtf",
+]
@@ -0,0 +1,85 @@
+"""CLI that assembles many songs into one RTF or DOCX songbook."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Iterable, List, Optional
+
+from .batch import collect_sources, read_file_list
+from .profiling import add_profile_argument, profiling
+from .songbook import build_songbook
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Build a songbook with a table of contents and an alphabetical index "
+            "from songs in the order given."
+        ),
+    )
+    parser.add_argument(
+        "source",
+        nargs="*",
+        help="Song files, directories or glob patterns, in book order.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        help="Path of the songbook; a .rtf or .docx suffix selects the format.",
+    )
+    parser.add_argument("--title", default=None, help="Title printed on the first page.")
+    parser.add_argument(
+        "--files-from",
+        help="Read additional song paths from this file, one per line ('-' for stdin).",
+    )
+    parser.add_argument(
+        "--pattern",
+        default="*.cho",
+        help="Glob used when a source is a directory (default: *.cho).",
+    )
+    parser.add_argument(
+        "--from",
+        dest="source_format",
+        choices=("ug", "chordpro"),
+        default=None,
+        help="Input format. Defaults to chordpro for .cho files and ug otherwise.",
+    )
+    add_profile_argument(parser)
+    return parser
+
+
+def _build(args: argparse.Namespace, sources: List[str]) -> int:
+    started = time.perf_counter()
+    entries = build_songbook(sources, args.output, args.title, args.source_format)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {len(entries)} songs to {args.output} in {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = build_argument_parser()
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    names = list(args.source)
+    if args.files_from:
+        names.extend(read_file_list(args.files_from))
+    sources = [str(path) for path, _relative in collect_sources(names, args.pattern)]
+    if not sources:
+        parser.error("no songs to include")
+
+    try:
+        if not args.profile:
+            return _build(args, sources)
+        with profiling() as profiler:
+            status = _build(args, sources)
+        profiler.write_json(args.profile)
+        return status
+    except Exception as exc:  # pragma: no cover - best effort CLI guard
+        parser.error(str(exc))
+        return 2
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
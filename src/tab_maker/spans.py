@@ -0,0 +1,336 @@
+"""Span parse mode: song lines that reference the source buffer instead of copying it.
+
+:func:`parse_song_spans` and :func:`parse_chordpro_spans` build the same songs
+as :func:`~tab_maker.parser.parse_song` and
+:func:`~tab_maker.chordpro_parser.parse_chordpro`. The difference is that each
+:class:`~tab_maker.models.LyricLine`, :class:`~tab_maker.models.ChordLyricLine`
+and :class:`~tab_maker.models.ChordOnlyLine` is a span subclass. It keeps the
+shared buffer and the line's ``(start, end)`` offsets, and builds its text on
+first access. Chords, columns, section names and metadata are still parsed
+eagerly, so chord statistics and indexing never touch the lyric text.
+
+The buffer is a ``str`` (offsets count characters) or a bytes-like object
+such as a memory-mapped file (offsets count bytes of UTF-8). Span lines
+compare equal to plain lines with the same content.
+"""
+from __future__ import annotations
+
+import mmap
+import re
+import sys
+from array import array
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+from .chordpro_parser import _SongBuilder
+from .convert import guess_source_format
+from .models import (
+    BlankLine,
+    ChordLyricLine,
+    ChordOnlyLine,
+    ChordPlacement,
+    LyricLine,
+    Section,
+    Song,
+    SongLine,
+)
+from .parser import _SECTION_HEADER, _extract_chords
+from .profiling import count
+
+Buffer = Union[str, bytes, bytearray, memoryview, mmap.mmap]
+
+# The line boundaries of str.splitlines, in UTF-8.
+_LINE_BREAK_BYTES_RE = re.compile(rb"\r\n|[\n\r\v\f\x1c\x1d\x1e]|\xc2\x85|\xe2\x80[\xa8\xa9]")
+# ChordPro chord markup, removed from a span's raw line to give its lyrics.
+_MARKUP_RE = re.compile(r"\[[^\]]*\]")
+
+
+class SpanTable:
+    """The buffer and line offsets shared by every span of one parsed song.
+
+    Spans store only their line number in the table; CPython caches small
+    ints, so a span costs one object instead of an object and a string.
+    """
+
+    __slots__ = ("buffer", "offsets")
+
+    def __init__(self, buffer: Buffer) -> None:
+        self.buffer = buffer
+        self.offsets = array("I" if len(buffer) < 1 << 32 else "Q")
+
+    def add(self, start: int, end: int) -> int:
+        index = len(self.offsets) >> 1
+        self.offsets.append(start)
+        self.offsets.append(end)
+        return index
+
+    def text(self, index: int) -> str:
+        text = self.buffer[self.offsets[2 * index]:self.offsets[2 * index + 1]]
+        return text if isinstance(text, str) else str(text, "utf-8")
+
+
+def iter_line_spans(buffer: Buffer) -> Iterator[Tuple[str, int, int]]:
+    """Yield ``(line, start, end)`` for the lines ``str.splitlines`` would give.
+
+    ``line`` is a temporary copy for the parser; ``start`` and ``end`` index
+    ``buffer``.
+    """
+    if isinstance(buffer, str):
+        # Splitting twice in C beats finding every break with a regex.
+        start = 0
+        for line, chunk in zip(buffer.splitlines(), buffer.splitlines(True)):
+            yield line, start, start + len(line)
+            start += len(chunk)
+        return
+    start = 0
+    for match in _LINE_BREAK_BYTES_RE.finditer(buffer):
+        end = match.start()
+        yield str(buffer[start:end], "utf-8"), start, end
+        start = match.end()
+    if start < len(buffer):
+        yield str(buffer[start:], "utf-8"), start, len(buffer)
+
+
+def _intern_chords(placements: List[ChordPlacement]) -> List[ChordPlacement]:
+    # A library repeats a few hundred chord names; keep one string per name.
+    for placement in placements:
+        placement.chord = sys.intern(placement.chord)
+    return placements
+
+
+def _chordpro_placements(line: str) -> List[ChordPlacement]:
+    """Chords of a ChordPro line as ``_parse_chordpro_text_line`` places them, minus lyrics."""
+    placements: List[ChordPlacement] = []
+    column = 0
+    position = 0
+    while True:
+        opening = line.find("[", position)
+        if opening == -1:
+            break
+        closing = line.find("]", opening + 1)
+        if closing == -1:
+            break
+        column += opening - position
+        chord = line[opening + 1 : closing].strip()
+        if chord:
+            placements.append(ChordPlacement(sys.intern(chord), column))
+        position = closing + 1
+    return placements
+
+
+def _lazy_text(slot) -> property:
+    # Read the base class's slot, filling it from the buffer on first access.
+    def get(self):
+        try:
+            return slot.__get__(self, type(self))
+        except AttributeError:
+            value = self._materialize()
+            slot.__set__(self, value)
+            return value
+
+    return property(get, slot.__set__)
+
+
+class _Span:
+    __slots__ = ()
+    _markup = False
+
+    @property
+    def buffer(self) -> Buffer:
+        return self._table.buffer
+
+    @property
+    def start(self) -> int:
+        return self._table.offsets[2 * self._index]
+
+    @property
+    def end(self) -> int:
+        return self._table.offsets[2 * self._index + 1]
+
+    def _materialize(self) -> str:
+        text = self._table.text(self._index)
+        return _MARKUP_RE.sub("", text) if self._markup else text
+
+
+class LyricSpan(_Span, LyricLine):
+    """A :class:`LyricLine` whose ``text`` is read from its buffer when first used."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: SpanTable, index: int) -> None:
+        self._table = table
+        self._index = index
+
+    text = _lazy_text(LyricLine.__dict__["text"])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LyricLine):
+            return self.text == other.text
+        return NotImplemented
+
+
+class ChordLyricSpan(_Span, ChordLyricLine):
+    """A :class:`ChordLyricLine` whose ``lyrics`` are read from its buffer when first used."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: SpanTable, index: int, placements: List[ChordPlacement]) -> None:
+        self._table = table
+        self._index = index
+        self.placements = placements
+
+    lyrics = _lazy_text(ChordLyricLine.__dict__["lyrics"])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ChordLyricLine):
+            return self.placements == other.placements and self.lyrics == other.lyrics
+        return NotImplemented
+
+
+class ChordOnlySpan(_Span, ChordOnlyLine):
+    """A :class:`ChordOnlyLine` whose ``raw_text`` is read from its buffer when first used."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: SpanTable, index: int, chords: List[str]) -> None:
+        self._table = table
+        self._index = index
+        self.chords = chords
+
+    raw_text = _lazy_text(ChordOnlyLine.__dict__["raw_text"])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ChordOnlyLine):
+            return self.chords == other.chords and self.raw_text == other.raw_text
+        return NotImplemented
+
+
+class _MarkupLyricSpan(LyricSpan):
+    __slots__ = ()
+    _markup = True
+
+
+class _MarkupChordLyricSpan(ChordLyricSpan):
+    __slots__ = ()
+    _markup = True
+
+
+def iter_section_spans(buffer: Buffer) -> Iterator[Section]:
+    """Span-mode :func:`~tab_maker.parser.iter_sections` over a whole buffer."""
+    table = SpanTable(buffer)
+    current_section = Section(name=None)
+    pending: Optional[Tuple[List[ChordPlacement], int]] = None
+    lyric_lines = 0
+
+    def flush(lines: List[SongLine]) -> None:
+        placements, index = pending
+        lines.append(ChordOnlySpan(table, index, [p.chord for p in placements]))
+
+    for line, start, end in iter_line_spans(buffer):
+        header_match = _SECTION_HEADER.match(line.strip())
+        if header_match:
+            if pending is not None:
+                flush(current_section.lines)
+                pending = None
+            if current_section.lines or current_section.name is not None:
+                yield current_section
+            current_section = Section(name=header_match.group("name"))
+            continue
+
+        if not line.strip():
+            if pending is not None:
+                flush(current_section.lines)
+                pending = None
+            current_section.lines.append(BlankLine())
+            continue
+
+        chord_positions = _extract_chords(line)
+        if chord_positions is not None:
+            if pending is not None:
+                flush(current_section.lines)
+            pending = (_intern_chords(chord_positions), table.add(start, end))
+            continue
+
+        lyric_lines += 1
+        index = table.add(start, end)
+        if pending is not None:
+            current_section.lines.append(ChordLyricSpan(table, index, pending[0]))
+            pending = None
+        else:
+            current_section.lines.append(LyricSpan(table, index))
+
+    if pending is not None:
+        flush(current_section.lines)
+
+    if current_section.lines or current_section.name is not None:
+        yield current_section
+
+    count("lyric_lines", lyric_lines)
+
+
+def parse_song_spans(buffer: Buffer) -> Song:
+    """Span-mode :func:`~tab_maker.parser.parse_song`."""
+    return Song(sections=list(iter_section_spans(buffer)))
+
+
+class _SpanSongBuilder(_SongBuilder):
+    __slots__ = ("table", "start", "end")
+
+    def __init__(self, buffer: Buffer) -> None:
+        super().__init__()
+        self.table = SpanTable(buffer)
+        self.start = self.end = 0
+
+    def text_line(self, raw_line: str) -> SongLine:
+        table = self.table
+        index = table.add(self.start, self.end)
+        if "[" not in raw_line:
+            return LyricSpan(table, index)
+        placements = _chordpro_placements(raw_line)
+        if placements:
+            return _MarkupChordLyricSpan(table, index, placements)
+        return _MarkupLyricSpan(table, index)
+
+
+def parse_chordpro_spans(buffer: Buffer) -> Song:
+    """Span-mode :func:`~tab_maker.chordpro_parser.parse_chordpro`."""
+    builder = _SpanSongBuilder(buffer)
+    for line, start, end in iter_line_spans(buffer):
+        builder.start = start
+        builder.end = end
+        builder.feed(line)
+    return builder.finish()
+
+
+SPAN_PARSERS = {
+    "ug": parse_song_spans,
+    "chordpro": parse_chordpro_spans,
+}
+
+
+def parse_file_spans(path: Union[str, Path], source_format: Optional[str] = None) -> Song:
+    """Memory-map ``path`` and parse it in span mode.
+
+    The map stays open as long as any line of the returned song refers to it.
+    """
+    path = Path(path)
+    parser = SPAN_PARSERS[source_format or guess_source_format(path)]
+    with open(path, "rb") as handle:
+        if path.stat().st_size == 0:
+            return parser("")
+        buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    return parser(buffer)
+
+
+__all__ = [
+    "ChordLyricSpan",
+    "ChordOnlySpan",
+    "LyricSpan",
+    "SPAN_PARSERS",
+    "SpanTable",
+    "iter_line_spans",
+    "iter_section_spans",
+    "parse_chordpro_spans",
+    "parse_file_spans",
+    "parse_song_spans",
+]
@@ -0,0 +1,269 @@
+"""Transpose songs, chords and key metadata by a number of semitones."""
+from __future__ import annotations
+
+import argparse
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .compact import ChordTable, CompactSong
+from .models import (
+    BlankLine,
+    ChordLyricLine,
+    ChordOnlyLine,
+    ChordPlacement,
+    LyricLine,
+    Section,
+    Song,
+)
+
+_SHARP_NAMES = ("C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B")
+_FLAT_NAMES = ("C", "Db", "D", "Eb", "E", "F", "Gb", "G", "Ab", "A", "Bb", "B")
+_NATURALS = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+_ACCIDENTALS = {"": 0, "#": 1, "♯": 1, "b": -1, "♭": -1}
+
+# Pitch class of every spelled root, e.g. "Db" -> 1, "B#" -> 0.
+_PITCH_CLASS: Dict[str, int] = {
+    natural + accidental: (value + shift) % 12
+    for natural, value in _NATURALS.items()
+    for accidental, shift in _ACCIDENTALS.items()
+}
+# _ROOT_NAMES[prefer_flats][pitch_class] gives the spelling of a transposed root.
+_ROOT_NAMES: Dict[bool, Tuple[str, ...]] = {False: _SHARP_NAMES, True: _FLAT_NAMES}
+# Pitch classes of keys conventionally written with flats.
+_FLAT_MAJOR_KEYS = frozenset({1, 3, 5, 8, 10})
+_FLAT_MINOR_KEYS = frozenset({0, 2, 3, 5, 7, 10})
+
+_ROOT = r"[A-G][#b♯♭]?"
+_CHORD_RE = re.compile(rf"(?P<root>{_ROOT})(?P<suffix>.*?)(?:/(?P<bass>{_ROOT}))?")
+# Lowercase "m" only: "M7" spells a major seventh.
+_MINOR_KEY_RE = re.compile(r"m(?!aj)|\s*(?i:min)")
+_TOKEN_RE = re.compile(r"\S+")
+
+
+def _root_prefers_flats(root: str, prefer_flats: Optional[bool]) -> bool:
+    if prefer_flats is not None:
+        return prefer_flats
+    return len(root) > 1 and _ACCIDENTALS[root[1:]] < 0
+
+
+@lru_cache(maxsize=8192)
+def transpose_chord(chord: str, semitones: int, prefer_flats: Optional[bool] = None) -> str:
+    """Return ``chord`` moved by ``semitones``; non-chord text is returned unchanged.
+
+    With ``prefer_flats`` of ``None`` each root keeps the accidental style it
+    was written in (natural roots move to sharps).
+    """
+    match = _CHORD_RE.fullmatch(chord)
+    if match is None:
+        return chord
+    shift = semitones % 12
+    root = match.group("root")
+    names = _ROOT_NAMES[_root_prefers_flats(root, prefer_flats)]
+    result = names[(_PITCH_CLASS[root] + shift) % 12] + match.group("suffix")
+    bass = match.group("bass")
+    if bass is not None:
+        bass_names = _ROOT_NAMES[_root_prefers_flats(bass, prefer_flats)]
+        result += "/" + bass_names[(_PITCH_CLASS[bass] + shift) % 12]
+    return result
+
+
+def key_prefers_flats(key: str) -> Optional[bool]:
+    """Return whether ``key`` (e.g. ``"Bb"``, ``"Dm"``) is written with flats."""
+    match = _CHORD_RE.fullmatch(key.strip())
+    if match is None:
+        return None
+    pitch_class = _PITCH_CLASS[match.group("root")]
+    if _MINOR_KEY_RE.match(match.group("suffix")):
+        return pitch_class in _FLAT_MINOR_KEYS
+    return pitch_class in _FLAT_MAJOR_KEYS
+
+
+def transpose_key(key: str, semitones: int, prefer_flats: Optional[bool] = None) -> str:
+    """Transpose key metadata, spelling it by key signature unless told otherwise."""
+    stripped = key.strip()
+    if prefer_flats is None and semitones % 12 == 0:
+        return stripped
+    if prefer_flats is None:
+        sharp_spelling = transpose_chord(stripped, semitones, False)
+        prefer_flats = key_prefers_flats(sharp_spelling)
+    return transpose_chord(stripped, semitones, prefer_flats)
+
+
+def _transpose_raw_text(raw_text: str, chords: Dict[str, str]) -> str:
+    """Rewrite a chord-only line, keeping each chord at its column where it fits."""
+    parts: List[str] = []
+    length = 0
+    for match in _TOKEN_RE.finditer(raw_text):
+        token = match.group()
+        start = match.start() if not parts else max(match.start(), length + 1)
+        parts.append(" " * (start - length))
+        replacement = chords.get(token, token)
+        parts.append(replacement)
+        length = start + len(replacement)
+    return "".join(parts)
+
+
+def _resolve_prefer_flats(
+    metadata: Dict[str, str],
+    first_chord: Optional[str],
+    semitones: int,
+    prefer_flats: Optional[bool],
+) -> Optional[bool]:
+    # Without an explicit choice, spell by the transposed key, taking the first
+    # chord as the key when the song has no ``key`` metadata.
+    if prefer_flats is not None:
+        return prefer_flats
+    key = metadata.get("key")
+    if key is None and first_chord is not None:
+        key = chord_key(first_chord)
+    if key is None:
+        return None
+    return key_prefers_flats(transpose_key(key, semitones))
+
+
+def chord_key(chord: str) -> Optional[str]:
+    """Return the key a chord implies: its root, plus ``m`` for minor chords."""
+    match = _CHORD_RE.fullmatch(chord)
+    if match is None:
+        return None
+    minor = _MINOR_KEY_RE.match(match.group("suffix")) is not None
+    return match.group("root") + ("m" if minor else "")
+
+
+def _first_chord(song: Song) -> Optional[str]:
+    for section in song.sections:
+        for entry in section.lines:
+            if isinstance(entry, ChordLyricLine) and entry.placements:
+                return entry.placements[0].chord
+            if isinstance(entry, ChordOnlyLine) and entry.chords:
+                return entry.chords[0]
+    return None
+
+
+def _transpose_metadata(
+    metadata: Dict[str, str], semitones: int, prefer_flats: Optional[bool]
+) -> Dict[str, str]:
+    transposed = dict(metadata)
+    if "key" in transposed:
+        transposed["key"] = transpose_key(transposed["key"], semitones, prefer_flats)
+    return transposed
+
+
+def transpose(song: Song, semitones: int, prefer_flats: Optional[bool] = None) -> Song:
+    """Return a copy of ``song`` with every chord and the ``key`` metadata transposed.
+
+    When ``prefer_flats`` is ``None`` the spelling follows the transposed key,
+    or the transposed first chord if the song has no ``key`` metadata. Lyric,
+    blank and section data are shared with the original song rather than copied.
+    """
+    if semitones % 12 == 0 and prefer_flats is None:
+        return Song(sections=list(song.sections), metadata=dict(song.metadata))
+
+    spelling = _resolve_prefer_flats(song.metadata, _first_chord(song), semitones, prefer_flats)
+    sections: List[Section] = []
+    for section in song.sections:
+        lines = []
+        for entry in section.lines:
+            if isinstance(entry, ChordLyricLine):
+                entry = ChordLyricLine(
+                    lyrics=entry.lyrics,
+                    placements=[
+                        ChordPlacement(
+                            chord=transpose_chord(placement.chord, semitones, spelling),
+                            column=placement.column,
+                        )
+                        for placement in entry.placements
+                    ],
+                )
+            elif isinstance(entry, ChordOnlyLine):
+                chords = {
+                    chord: transpose_chord(chord, semitones, spelling) for chord in entry.chords
+                }
+                entry = ChordOnlyLine(
+                    chords=[chords[chord] for chord in entry.chords],
+                    raw_text=_transpose_raw_text(entry.raw_text, chords),
+                )
+            elif not isinstance(entry, (BlankLine, LyricLine)):
+                raise TypeError(f"Unhandled song line type: {type(entry)!r}")
+            lines.append(entry)
+        sections.append(Section(name=section.name, lines=lines))
+
+    metadata = _transpose_metadata(song.metadata, semitones, prefer_flats)
+    return Song(sections=sections, metadata=metadata)
+
+
+def transpose_table(
+    table: ChordTable, semitones: int, prefer_flats: Optional[bool] = None
+) -> ChordTable:
+    """Return a table whose ids map to transposed spellings of ``table``'s chords."""
+    return table.map(lambda chord: transpose_chord(chord, semitones, prefer_flats))
+
+
+def transpose_compact(
+    song: CompactSong,
+    semitones: int,
+    prefer_flats: Optional[bool] = None,
+    table: Optional[ChordTable] = None,
+) -> CompactSong:
+    """Transpose a compact song by swapping its chord table; columns are shared.
+
+    Pass a ``table`` already produced by :func:`transpose_table` to transpose a
+    whole collection with a single pass over its distinct chords.
+    """
+    if table is None:
+        first_chord = next(
+            (song.table[section.chord_ids[0]] for section in song.sections if section.chord_ids),
+            None,
+        )
+        spelling = _resolve_prefer_flats(song.metadata, first_chord, semitones, prefer_flats)
+        table = transpose_table(song.table, semitones, spelling)
+    return CompactSong(
+        sections=song.sections,
+        table=table,
+        metadata=_transpose_metadata(song.metadata, semitones, prefer_flats),
+    )
+
+
+def add_transpose_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("transposition")
+    group.add_argument(
+        "--transpose",
+        type=int,
+        default=0,
+        metavar="SEMITONES",
+        help="Move every chord and the key up (positive) or down (negative) by SEMITONES.",
+    )
+    group.add_argument(
+        "--all-keys",
+        metavar="DIR",
+        help="Write the song in all 12 keys into DIR, named <name>.<key><ext>.",
+    )
+    spelling = group.add_mutually_exclusive_group()
+    spelling.add_argument(
+        "--prefer-flats",
+        dest="prefer_flats",
+        action="store_const",
+        const=True,
+        default=None,
+        help="Spell transposed chords with flats.",
+    )
+    spelling.add_argument(
+        "--prefer-sharps",
+        dest="prefer_flats",
+        action="store_const",
+        const=False,
+        help="Spell transposed chords with sharps.",
+    )
+
+
+__all__ = [
+    "add_transpose_arguments",
+    "chord_key",
+    "key_prefers_flats",
+    "transpose",
+    "transpose_chord",
+    "transpose_compact",
+    "transpose_key",
+    "transpose_table",
+]
@@ -0,0 +1,252 @@
+"""Watch ChordPro files and keep their RTF output up to date incrementally.
+
+Each poll compares file mtimes and sizes, then content hashes, so only files
+whose bytes changed are reconverted. Within a file, the two-line segments of
+each section are memoized by the section's content, so editing one verse
+lays out only that section and splices it between the cached ones.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .batch import collect_sources, plan_jobs
+from .chord_layout import RenderSegment, iter_metadata_segments, iter_section_segments
+from .chordpro_parser import parse_chordpro
+from .models import ChordLyricLine, ChordOnlyLine, LyricLine, Section, Song, SongLine
+from .rtf import write_segments_rtf
+from .transpose import transpose
+
+DEFAULT_INTERVAL = 0.5
+DEFAULT_MAX_SECTIONS = 4096
+_SEPARATOR = RenderSegment(kind="blank", text="")
+
+
+def _line_key(entry: SongLine) -> Hashable:
+    if isinstance(entry, ChordLyricLine):
+        return (entry.lyrics, tuple((p.chord, p.column) for p in entry.placements))
+    if isinstance(entry, LyricLine):
+        return entry.text
+    if isinstance(entry, ChordOnlyLine):
+        return (entry.raw_text, tuple(entry.chords))
+    return None
+
+
+def section_key(section: Section) -> Hashable:
+    """Return a hashable key equal for sections with the same content."""
+    return (section.name, tuple(_line_key(entry) for entry in section.lines))
+
+
+class SectionSegmentCache:
+    """LRU memo of each section's two-line segments, keyed by section content."""
+
+    def __init__(self, max_sections: int = DEFAULT_MAX_SECTIONS) -> None:
+        self.max_sections = max_sections
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, List[RenderSegment]]" = OrderedDict()
+
+    def segments(self, section: Section) -> List[RenderSegment]:
+        key = section_key(section)
+        cached = self._entries.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return cached
+        self.misses += 1
+        cached = self._entries[key] = list(iter_section_segments(section))
+        if len(self._entries) > self.max_sections:
+            self._entries.popitem(last=False)
+        return cached
+
+    def song_segments(self, song: Song) -> List[RenderSegment]:
+        """Return the same segments as ``song_to_two_line_segments``, reusing cached sections."""
+        segments = list(iter_metadata_segments(song.metadata))
+        last = len(song.sections) - 1
+        for idx, section in enumerate(song.sections):
+            segments.extend(self.segments(section))
+            if idx != last:
+                segments.append(_SEPARATOR)
+        return segments
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass(slots=True)
+class _FileState:
+    mtime_ns: int
+    size: int
+    digest: bytes
+
+
+@dataclass(slots=True)
+class WatchEvent:
+    source: Path
+    destination: Path
+    sections: int = 0
+    sections_rendered: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def format(self) -> str:
+        if not self.ok:
+            return f"error: {self.source}: {self.error}"
+        return (
+            f"updated {self.destination} ({self.sections_rendered} of {self.sections} "
+            f"sections re-rendered) in {self.seconds * 1000:.1f}ms"
+        )
+
+
+class Watcher:
+    """Polls ``sources`` and rewrites the RTF of every file whose content changed."""
+
+    def __init__(
+        self,
+        sources: Sequence[str],
+        output_dir: Path,
+        pattern: str = "*.cho",
+        suffix: str = ".rtf",
+        cache: Optional[SectionSegmentCache] = None,
+        transpose: int = 0,
+        prefer_flats: Optional[bool] = None,
+    ) -> None:
+        self.sources = list(sources)
+        self.output_dir = output_dir
+        self.pattern = pattern
+        self.suffix = suffix
+        self.cache = cache if cache is not None else SectionSegmentCache()
+        self.transpose = transpose
+        self.prefer_flats = prefer_flats
+        self._states: Dict[Path, _FileState] = {}
+        self._plan_error: Optional[str] = None
+
+    def _changed(self) -> List[Tuple[Path, Path, bytes]]:
+        changed: List[Tuple[Path, Path, bytes]] = []
+        seen = set()
+        sources = collect_sources(self.sources, self.pattern)
+        for job in plan_jobs(sources, self.output_dir, self.suffix):
+            seen.add(job.source)
+            state = self._states.get(job.source)
+            try:
+                stat = job.source.stat()
+                if (
+                    state is not None
+                    and state.mtime_ns == stat.st_mtime_ns
+                    and state.size == stat.st_size
+                ):
+                    continue
+                data = job.source.read_bytes()
+            except OSError:
+                # Gone or being replaced (e.g. save-by-rename); the next poll sees it.
+                continue
+            digest = hashlib.blake2b(data, digest_size=16).digest()
+            self._states[job.source] = _FileState(stat.st_mtime_ns, stat.st_size, digest)
+            if state is None or state.digest != digest:
+                changed.append((job.source, job.destination, data))
+        for path in set(self._states) - seen:
+            del self._states[path]
+        return changed
+
+    def _convert(self, source: Path, destination: Path, data: bytes) -> WatchEvent:
+        started = time.perf_counter()
+        event = WatchEvent(source, destination)
+        try:
+            song = parse_chordpro(data.decode("utf-8"))
+            if self.transpose or self.prefer_flats is not None:
+                song = transpose(song, self.transpose, self.prefer_flats)
+            misses = self.cache.misses
+            segments = self.cache.song_segments(song)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            with open(destination, "w", encoding="utf-8") as stream:
+                write_segments_rtf(segments, stream)
+            event.sections = len(song.sections)
+            event.sections_rendered = self.cache.misses - misses
+        except Exception as exc:
+            event.error = f"{type(exc).__name__}: {exc}"
+        event.seconds = time.perf_counter() - started
+        return event
+
+    def poll(self) -> List[WatchEvent]:
+        """Reconvert every file that changed since the previous poll.
+
+        If two sources would be written to the same file, nothing is converted
+        and the clash is reported once as an error event until it is resolved.
+        """
+        try:
+            changed = self._changed()
+        except ValueError as exc:
+            if str(exc) == self._plan_error:
+                return []
+            self._plan_error = str(exc)
+            return [WatchEvent(self.output_dir, self.output_dir, error=self._plan_error)]
+        self._plan_error = None
+        return [self._convert(*change) for change in changed]
+
+    def run(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        on_event: Optional[Callable[[WatchEvent], None]] = None,
+        polls: Optional[int] = None,
+    ) -> None:
+        """Poll every ``interval`` seconds, forever unless ``polls`` is given."""
+        count = 0
+        while polls is None or count < polls:
+            for event in self.poll():
+                if on_event is not None:
+                    on_event(event)
+            count += 1
+            if polls is None or count < polls:
+                time.sleep(interval)
+
+
+def add_watch_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("watch mode")
+    group.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and reconvert sources into --output-dir whenever they change.",
+    )
+    group.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help=f"Seconds between polls in watch mode (default: {DEFAULT_INTERVAL}).",
+    )
+
+
+def run_watch_cli(args: argparse.Namespace, sources: Sequence[str]) -> int:
+    """Run watch mode from parsed CLI arguments until interrupted."""
+    watcher = Watcher(
+        sources,
+        Path(args.output_dir),
+        pattern=args.pattern,
+        transpose=args.transpose,
+        prefer_flats=args.prefer_flats,
+    )
+    print(f"Watching {len(watcher.sources)} sources; press Ctrl+C to stop.", file=sys.stderr)
+    try:
+        watcher.run(args.interval, on_event=lambda event: print(event.format(), file=sys.stderr))
+    except KeyboardInterrupt:  # pragma: no cover - interactive shutdown
+        pass
+    return 0
+
+
+__all__ = [
+    "SectionSegmentCache",
+    "WatchEvent",
+    "Watcher",
+    "add_watch_arguments",
+    "run_watch_cli",
+    "section_key",
+]
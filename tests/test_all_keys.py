@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from tab_maker.all_keys import KEY_COUNT, KeyVariants, write_all_keys
+from tab_maker.cache import ConversionCache
+from tab_maker.chordpro import song_to_chordpro
+from tab_maker.chordpro_parser import parse_chordpro
+from tab_maker.convert import convert_text
+from tab_maker.transpose import transpose
+
+SONG = """{title: Test}
+{key: G}
+{comment: Verse}
+[G]Amazing [D/F#]grace, how [Em7]sweet the [CM7]sound
+[Am]  [D7sus4]
+
+[G]That saved a [Bb]wretch like me
+"""
+
+
+def test_chordpro_template_matches_transpose() -> None:
+    song = parse_chordpro(SONG)
+    variants = KeyVariants(song)
+    for semitones in range(KEY_COUNT):
+        for prefer_flats in (None, True, False):
+            expected = song_to_chordpro(transpose(song, semitones, prefer_flats))
+            assert variants.chordpro(semitones, prefer_flats) == expected
+
+
+def test_unparseable_key_falls_back_to_offsets(tmp_path: Path) -> None:
+    song = parse_chordpro("{key: Unknown}\n[G]la la\n")
+    written = write_all_keys(song, tmp_path, "s", ".rtf")
+    assert len(set(written)) == KEY_COUNT
+    assert written[0].name == "s.+0.rtf"
+    assert sorted(tmp_path.iterdir()) == sorted(written)
+
+
+def test_cache_entries_match_single_key_conversions(tmp_path: Path) -> None:
+    cache = ConversionCache(tmp_path / "cache")
+    data = SONG.encode("utf-8")
+    for _ in range(2):
+        written = write_all_keys(
+            parse_chordpro(SONG), tmp_path / "out", "s", ".rtf", cache=cache,
+            cache_input=(data, "chordpro", None),
+        )
+    assert (cache.stats.misses, cache.stats.hits) == (KEY_COUNT, KEY_COUNT)
+    for semitones, path in enumerate(written):
+        expected = convert_text(SONG, "chordpro", "rtf", transpose=semitones)
+        assert path.read_text(encoding="utf-8") == expected
@@ -0,0 +1,74 @@
+"""The compiled chord-token recognizer must agree with the character-level reference."""
+from __future__ import annotations
+
+import random
+import re
+import time
+from typing import List, Optional
+
+from tab_maker.models import ChordPlacement
+from tab_maker.parser import _extract_chords, _is_chord_token, _is_chord_token_reference
+
+_PIECES = [
+    "A", "B", "C", "D", "E", "F", "G", "H", "a", "c", "#", "b", "+", "-", "/", "(", ")",
+    "m", "M", "mMaj", "Maj", "maj", "min", "mi", "sus", "su", "dim", "aug", "add", "ad",
+    "0", "1", "7", "9", "11", "13", "111111", "x", "|", "||", "|:", ":|", "::", ".", "N.C.",
+    "n.c.", "N.C", "é", "⁷", "٣",
+]
+_ROOTS = ["A", "Bb", "C#", "D", "Eb", "F", "G", "Ab"]
+_NEAR_MISSES = [
+    "C" + "1" * 30 + "x",
+    "C" + "1" * 30,
+    "C" + "/Ab" * 20 + "x",
+    "C" + "/Ab" * 20,
+    "C" + "b" * 30 + "x",
+    "C" + "m" * 30 + "x",
+    "C" + "(9)" * 20 + "(",
+    "G" + "7sus" * 20 + "su",
+]
+
+
+def _random_token(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        head = rng.choice(_ROOTS)
+    else:
+        head = rng.choice(_PIECES)
+    return head + "".join(rng.choice(_PIECES) for _ in range(rng.randint(0, 6)))
+
+
+def _reference_chords(line: str) -> Optional[List[ChordPlacement]]:
+    placements: List[ChordPlacement] = []
+    for match in re.finditer(r"\S+", line):
+        token = match.group()
+        if token in {"|", "||", "|:", ":|", "||:", "::"}:
+            continue
+        if not _is_chord_token_reference(token):
+            return None
+        placements.append(ChordPlacement(chord=token, column=match.start()))
+    return placements or None
+
+
+def test_tokens_match_reference() -> None:
+    rng = random.Random(4)
+    tokens = [_random_token(rng) for _ in range(50_000)] + _NEAR_MISSES
+    for token in tokens:
+        assert _is_chord_token(token) == _is_chord_token_reference(token), token
+
+
+def test_lines_match_reference() -> None:
+    rng = random.Random(5)
+    for _ in range(20_000):
+        tokens = [_random_token(rng) for _ in range(rng.randint(0, 5))]
+        if rng.random() < 0.2:
+            tokens.append(rng.choice(_NEAR_MISSES))
+        line = "".join(rng.choice([" ", "  ", "\t"]) + token for token in tokens)
+        assert _extract_chords(line) == _reference_chords(line), line
+
+
+def test_near_misses_fail_fast() -> None:
+    started = time.perf_counter()
+    for token in _NEAR_MISSES:
+        _is_chord_token.cache_clear()
+        _is_chord_token(token)
+        _extract_chords(f"{token} {token}")
+    assert time.perf_counter() - started < 0.5
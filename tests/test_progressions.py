@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from tab_maker.progressions import (
+    QUALITY_MAJOR,
+    QUALITY_MINOR,
+    ProgressionIndex,
+    build_progression_index,
+    chord_degree,
+)
+
+
+@pytest.mark.parametrize(
+    ("chord", "quality"),
+    [
+        ("CM7", QUALITY_MAJOR),
+        ("GM7", QUALITY_MAJOR),
+        ("Cmaj7", QUALITY_MAJOR),
+        ("Cm7", QUALITY_MINOR),
+        ("CmMaj7", QUALITY_MINOR),
+    ],
+)
+def test_chord_degree_quality(chord: str, quality: int) -> None:
+    assert chord_degree(chord)[1] == quality
+
+
+def test_query_repeats_collapse_like_stored_sequences(tmp_path: Path) -> None:
+    (tmp_path / "song.cho").write_text(
+        "{key: G}\n[G]one [G]two [D]three [Em]four [C]five\n", encoding="utf-8"
+    )
+    index_path = tmp_path / "index.tmpi"
+    build_progression_index([str(tmp_path)], index_path)
+    with ProgressionIndex(index_path) as index:
+        assert [hit.progression for hit in index.search("I-I-V")] == ["I-V-vi-IV"]
+        assert len(index.search("I-V-V-vi")) == 1
+        assert len(index.search([0, 0, 21])) == 1
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from tab_maker.search_index import SearchIndex
+
+
+def _song(path: Path, words: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"{{title: {path.stem}}}\n[G]{words}\n", encoding="utf-8")
+
+
+def test_foreign_database_is_left_alone(tmp_path: Path) -> None:
+    db = tmp_path / "other.db"
+    with sqlite3.connect(db) as connection:
+        connection.execute("CREATE TABLE important (value TEXT)")
+    with pytest.raises(ValueError, match="not a tab-maker search index"):
+        SearchIndex(db)
+    with sqlite3.connect(db) as connection:
+        tables = connection.execute("SELECT name FROM sqlite_master").fetchall()
+    assert tables == [("important",)]
+
+
+def test_update_prunes_only_under_its_sources(tmp_path: Path) -> None:
+    _song(tmp_path / "a" / "first.cho", "amazing grace")
+    _song(tmp_path / "b" / "second.cho", "how sweet")
+    with SearchIndex(tmp_path / "index.db") as index:
+        index.update([str(tmp_path / "a")])
+        assert index.update([str(tmp_path / "b")]).removed == 0
+        assert len(index.search("amazing")) == 1
+
+        (tmp_path / "a" / "first.cho").unlink()
+        assert index.update([str(tmp_path / "b")]).removed == 0
+        assert index.update([str(tmp_path / "a")]).removed == 1
+        assert index.search("amazing") == []
+        assert len(index.search("sweet")) == 1
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tab_maker.server import ConversionServer
+
+
+async def _exchange(request: bytes) -> bytes:
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        app = ConversionServer(executor, workers=1)
+        server = await asyncio.start_server(app.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            await writer.wait_closed()
+    return response
+
+
+@pytest.mark.parametrize(
+    ("request_bytes", "status"),
+    [
+        (b"POST /" + b"a" * 70_000 + b" HTTP/1.1\r\n\r\n", b"400"),
+        (b"POST /rtf HTTP/1.1\r\nX-Big: " + b"a" * 70_000 + b"\r\n\r\n", b"431"),
+        (b"POST /rtf HTTP/1.1\r\nContent-Length: -1\r\n\r\n", b"400"),
+    ],
+)
+def test_oversized_lines_get_a_status(request_bytes: bytes, status: bytes) -> None:
+    response = asyncio.run(_exchange(request_bytes))
+    assert response.split(b" ", 2)[1] == status
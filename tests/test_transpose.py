@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import pytest
+
+from tab_maker.transpose import chord_key, key_prefers_flats
+
+
+@pytest.mark.parametrize(
+    ("chord", "key"),
+    [
+        ("CM7", "C"),
+        ("GM7", "G"),
+        ("Cmaj7", "C"),
+        ("Cm7", "Cm"),
+        ("CmMaj7", "Cm"),
+        ("Cmin", "Cm"),
+        ("C Min", "Cm"),
+        ("F#m/E", "F#m"),
+    ],
+)
+def test_chord_key_reads_minor_from_lowercase_m(chord: str, key: str) -> None:
+    assert chord_key(chord) == key
+
+
+def test_major_seventh_key_uses_major_signature() -> None:
+    assert key_prefers_flats("DM7") is False
+    assert key_prefers_flats("Dm7") is True
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from tab_maker.watch import Watcher
+
+
+def _song(path: Path, words: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"[G]{words}\n", encoding="utf-8")
+
+
+def test_output_clash_is_reported_and_watching_continues(tmp_path: Path) -> None:
+    _song(tmp_path / "a" / "x.cho", "one")
+    _song(tmp_path / "b" / "x.cho", "two")
+    watcher = Watcher([str(tmp_path / "a"), str(tmp_path / "b")], tmp_path / "out")
+    [event] = watcher.poll()
+    assert not event.ok and "would both be written to" in event.error
+    assert watcher.poll() == []
+
+    (tmp_path / "b" / "x.cho").rename(tmp_path / "b" / "y.cho")
+    events = watcher.poll()
+    assert sorted(event.destination.name for event in events) == ["x.rtf", "y.rtf"]
+    assert all(event.ok for event in events)
+
+
+def test_file_vanishing_before_read_is_skipped(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    source = tmp_path / "src" / "x.cho"
+    _song(source, "one")
+    watcher = Watcher([str(source.parent)], tmp_path / "out")
+
+    def vanished(self: Path) -> bytes:
+        raise FileNotFoundError(os.fspath(self))
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Path, "read_bytes", vanished)
+        assert watcher.poll() == []
+    [event] = watcher.poll()
+    assert event.ok